@@ -0,0 +1,198 @@
+#
+#  Copyright 2017 Red Hat | Ansible
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Action plugin for the Kubernetes and OpenShift modules, installed under each module's name by
+hacking/link_action_plugins.py. When a task runs on the controller, the module is executed by a worker process
+that stays up between tasks, with the client imported and configured, rather than by a new interpreter per task.
+Tasks that the worker cannot run the same way Ansible would are handed to the normal action, as are tasks that
+cannot reach the worker. A task the worker was sent, but did not reply to, fails rather than running again.
+"""
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import fcntl
+import hashlib
+import json
+import os
+import re
+import socket
+import sys
+
+from ansible.plugins.action import ActionBase
+from ansible.utils.display import Display
+
+# Plugins are not packaged like modules, so import module_utils from this role, ahead of any copy in Ansible
+import ansible.module_utils
+MODULE_UTILS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'module_utils')
+if MODULE_UTILS not in ansible.module_utils.__path__:
+    ansible.module_utils.__path__.insert(0, MODULE_UTILS)
+
+from ansible.module_utils.k8s_cache import env_enabled
+from ansible.module_utils.k8s_common import HAS_K8S_MODULE_HELPER, KubernetesAnsibleModule
+from ansible.module_utils.k8s_lazy import LAZY_CLIENT_ENV
+from ansible.module_utils.k8s_worker import (WORKER_SOCKET_ENV, KubernetesWorkerException,
+                                             KubernetesWorkerRequestFailed, request_timeout, start_worker,
+                                             worker_environ, worker_request)
+from ansible.module_utils.openshift_common import OpenShiftAnsibleModule
+
+display = Display()
+
+LOCAL_WORKER_ENV = 'K8S_LOCAL_WORKER'
+
+MODULE_CLASSES = (KubernetesAnsibleModule, OpenShiftAnsibleModule)
+
+# The module class, kind and API version a module's main() constructs
+MODULE_CALL = re.compile(r"(\w+AnsibleModule)\('(\w+)', '(\w+)'\)")
+
+# Worker started by the plugin, one per interpreter and role
+LOCAL_WORKER_SOCKET = '~/.ansible/k8s_local_{}.sock'
+LOCAL_WORKER_IDLE_TIMEOUT = 600
+
+# Task environment variables the worker has no use for. Any other variable, besides those the worker applies to each
+# request, is only seen by a module executed in a new process.
+IGNORED_ENVIRON = (WORKER_SOCKET_ENV, LAZY_CLIENT_ENV, LOCAL_WORKER_ENV)
+
+# Module name -> (module class, kind, API version), or None for modules the worker cannot run
+_module_calls = {}
+
+
+class ActionModule(ActionBase):
+
+    def run(self, tmp=None, task_vars=None):
+        task_vars = task_vars or {}
+        reason = self.local_worker_unavailable(task_vars)
+        if reason is None:
+            result = super(ActionModule, self).run(tmp, task_vars)
+            reply = self.run_in_worker(task_vars)
+            if reply is not None:
+                result.update(self._parse_returned_data(dict(rc=reply['rc'], stdout=reply['stdout'], stderr='')))
+                return result
+            reason = 'the worker could not be reached'
+        display.vvv('{}: executing the module in a new process, as {}'.format(self._task.action, reason))
+        return self.normal_action().run(tmp, task_vars)
+
+    def normal_action(self):
+        return self._shared_loader_obj.action_loader.get('normal',
+                                                         task=self._task,
+                                                         connection=self._connection,
+                                                         play_context=self._play_context,
+                                                         loader=self._loader,
+                                                         templar=self._templar,
+                                                         shared_loader_obj=self._shared_loader_obj)
+
+    def local_worker_unavailable(self, task_vars):
+        """ :return: str: why the task cannot be run by the worker, or None if it can """
+        if not env_enabled(LOCAL_WORKER_ENV):
+            return '{} is disabled'.format(LOCAL_WORKER_ENV)
+        if not HAS_K8S_MODULE_HELPER:
+            return 'the controller does not have the OpenShift client'
+        if getattr(self._connection, 'transport', None) != 'local':
+            return 'the task does not run on the controller'
+        if self._play_context.become:
+            return 'the task uses become'
+        if getattr(self._task, 'async_val', None) or getattr(self._task, 'async', None):
+            return 'the task is asynchronous'
+        interpreter = task_vars.get('ansible_python_interpreter')
+        if interpreter:
+            interpreter = self._templar.template(interpreter)
+            if os.path.realpath(os.path.expanduser(interpreter)) != os.path.realpath(sys.executable):
+                return 'ansible_python_interpreter is not the interpreter running Ansible'
+        environ = self.task_environ()
+        forwarded = worker_environ(environ)
+        unsupported = sorted(key for key in environ if key not in forwarded and key not in IGNORED_ENVIRON)
+        if unsupported:
+            return 'the task sets {}'.format(', '.join(unsupported))
+        if self.module_call() is None:
+            return 'the module is not run by the worker'
+        return None
+
+    def task_environ(self):
+        """ :return: dict: the task's environment, templated when the task was validated """
+        environ = {}
+        for entry in self._task.environment or []:
+            if isinstance(entry, dict):
+                environ.update(entry)
+        return environ
+
+    def module_call(self):
+        """ :return: tuple: (module class name, kind, API version) the module's main() constructs, or None """
+        name = self._task.action
+        if name not in _module_calls:
+            call = None
+            path = self._shared_loader_obj.module_loader.find_plugin(name, mod_type='.py')
+            if path:
+                with open(path) as f:
+                    match = MODULE_CALL.search(f.read())
+                classes = [cls.__name__ for cls in MODULE_CLASSES]
+                if match and match.group(1) in classes:
+                    call = match.groups()
+            _module_calls[name] = call
+        return _module_calls[name]
+
+    def socket_path(self):
+        environ = self.task_environ()
+        if environ.get(WORKER_SOCKET_ENV) or os.environ.get(WORKER_SOCKET_ENV):
+            return environ.get(WORKER_SOCKET_ENV) or os.environ[WORKER_SOCKET_ENV]
+        identity = '\0'.join([sys.executable, MODULE_UTILS])
+        return LOCAL_WORKER_SOCKET.format(hashlib.sha1(identity.encode('utf-8')).hexdigest()[:12])
+
+    def run_in_worker(self, task_vars):
+        """
+        Send the module arguments to the worker, starting it when none is listening.
+
+        :return: dict: containing the module's rc and stdout, or None if the worker could not be reached, and the
+                 module was not sent
+        """
+        module_class, kind, api_version = self.module_call()
+        module_args = self._task.args.copy()
+        self._update_module_args(self._task.action, module_args, task_vars)
+        environ = worker_environ(os.environ)
+        environ.update((key, str(value)) for key, value in worker_environ(self.task_environ()).items())
+        request = dict(module_class=module_class, kind=kind, api_version=api_version, args=module_args,
+                       environ=environ)
+        socket_path = self.socket_path()
+        timeout = request_timeout(module_args)
+        try:
+            reply = worker_request(socket_path, request, timeout=timeout)
+            if reply is None:
+                self.ensure_worker(socket_path)
+                reply = worker_request(socket_path, request, timeout=timeout)
+        except KubernetesWorkerRequestFailed as exc:
+            # The worker may still run the module, so running it again here could apply the task twice
+            return dict(rc=1, stdout=json.dumps(dict(failed=True, msg=str(exc))))
+        except (KubernetesWorkerException, socket.error, OSError, ValueError) as exc:
+            display.vvv('{}: worker on {} failed: {}'.format(self._task.action, socket_path, exc))
+            return None
+        return reply
+
+    @staticmethod
+    def ensure_worker(socket_path):
+        """ Start a worker, unless another task started one while this one waited for the lock """
+        lock_path = os.path.expanduser(socket_path) + '.lock'
+        if not os.path.isdir(os.path.dirname(lock_path)):
+            os.makedirs(os.path.dirname(lock_path))
+        with open(lock_path, 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                if worker_request(socket_path, dict(command='ping')) is None:
+                    pid = start_worker(socket_path, MODULE_CLASSES, idle_timeout=LOCAL_WORKER_IDLE_TIMEOUT)
+                    display.vvv('Started a Kubernetes module worker, pid {}, on {}'.format(pid, socket_path))
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
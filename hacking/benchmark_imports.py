@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+#
+#  Copyright 2017 Red Hat | Ansible
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Measure the cold start of each module: loading the module, importing the client and creating the helper for its
+kind, in a new interpreter, as Ansible does on every task. Each module is timed with the generated client packages
+imported in full, and with K8S_LAZY_CLIENT set, which only imports the model and API classes the kind uses.
+
+    hacking/benchmark_imports.py                                  # every module
+    hacking/benchmark_imports.py k8s_v1_pod openshift_v1_route    # a subset
+    hacking/benchmark_imports.py --iterations 10 --json imports.json
+
+Requires ansible and the openshift client.
+"""
+
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The module class, kind and API version a module's main() constructs
+MODULE_CALL = re.compile(r"(\w+AnsibleModule)\('(\w+)', '(\w+)'\)")
+
+# Run in a new interpreter for each measurement, with the module path, module_utils path, module class, kind and
+# API version as arguments. Prints the elapsed seconds and the number of modules imported.
+PROBE = """
+import os, sys, time
+start = time.time()
+import runpy
+import ansible.module_utils
+ansible.module_utils.__path__.insert(0, sys.argv[2])
+namespace = runpy.run_path(sys.argv[1], run_name='benchmark_imports')
+namespace[sys.argv[3]].get_helper(sys.argv[5], sys.argv[4])
+print('{} {}'.format(time.time() - start, len(sys.modules)))
+"""
+
+
+def module_subjects(library, names):
+    """ :return: list: (module name, path, module class, kind, API version) for each module with a main() """
+    if not names:
+        names = sorted(os.path.splitext(filename)[0] for filename in os.listdir(library)
+                       if filename.endswith('.py'))
+    subjects = []
+    for name in names:
+        path = os.path.join(library, name + '.py')
+        with open(path) as f:
+            match = MODULE_CALL.search(f.read())
+        if match:
+            subjects.append((name, path) + match.groups())
+    return subjects
+
+
+def measure(subject, lazy, iterations):
+    """ :return: tuple: (median milliseconds, modules imported) """
+    name, path, module_class, kind, api_version = subject
+    env = dict(os.environ)
+    env.pop('K8S_LAZY_CLIENT', None)
+    if lazy:
+        env['K8S_LAZY_CLIENT'] = '1'
+    samples = []
+    modules = 0
+    for _ in range(iterations):
+        output = subprocess.check_output(
+            [sys.executable, '-c', PROBE, path, os.path.join(ROOT, 'module_utils'), module_class, kind, api_version],
+            env=env)
+        seconds, modules = output.decode('utf-8').split()
+        samples.append(float(seconds) * 1000.0)
+    samples.sort()
+    return samples[len(samples) // 2], int(modules)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('modules', nargs='*', help='module names, such as k8s_v1_pod (default: every module)')
+    parser.add_argument('--library', default=os.path.join(ROOT, 'library'),
+                        help='directory containing the modules (default: library/)')
+    parser.add_argument('--iterations', type=int, default=5, help='interpreters started per measurement')
+    parser.add_argument('--json', metavar='PATH', help='write the results to PATH')
+    args = parser.parse_args()
+
+    header = '{:<56} {:>10} {:>10} {:>10} {:>10}'.format('module', 'eager ms', 'lazy ms', 'eager mods', 'lazy mods')
+    print(header)
+    print('-' * len(header))
+    results = {}
+    for subject in module_subjects(args.library, args.modules):
+        try:
+            eager = measure(subject, False, args.iterations)
+            lazy = measure(subject, True, args.iterations)
+        except subprocess.CalledProcessError as exc:
+            print('{:<56} failed: exit status {}'.format(subject[0], exc.returncode))
+            continue
+        results[subject[0]] = dict(eager_ms=round(eager[0], 3), lazy_ms=round(lazy[0], 3),
+                                   eager_modules=eager[1], lazy_modules=lazy[1])
+        print('{:<56} {:>10.2f} {:>10.2f} {:>10} {:>10}'.format(subject[0], eager[0], lazy[0], eager[1], lazy[1]))
+    print('-' * len(header))
+
+    if results:
+        eager_total = sum(result['eager_ms'] for result in results.values())
+        lazy_total = sum(result['lazy_ms'] for result in results.values())
+        print('\nCold start reduced by {:.1f}% on average over {} modules.'.format(
+            100.0 * (1 - lazy_total / eager_total), len(results)))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    return 0 if results else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
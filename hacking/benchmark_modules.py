@@ -0,0 +1,626 @@
+#!/usr/bin/env python
+#
+#  Copyright 2017 Red Hat | Ansible
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Benchmark KubernetesAnsibleModule.execute_module against an in-process stand-in for the Kubernetes and OpenShift
+APIs, which serves canned objects of a configurable size and count. No cluster is needed.
+
+    hacking/benchmark_modules.py                            # every kind and operation
+    hacking/benchmark_modules.py --kinds pod pod_list       # a subset
+    hacking/benchmark_modules.py --json results.json        # also write the results, to track regressions
+    hacking/benchmark_modules.py --baseline results.json    # compare with earlier results
+
+Modules are constructed and executed in this process, as Ansible would in a new one, so the figures include
+argument spec construction and client configuration, but not interpreter start-up or module transfer. Requires
+ansible and the openshift client.
+"""
+
+from __future__ import print_function
+
+import argparse
+import json
+import math
+import os
+import resource
+import sys
+import threading
+import time
+
+from datetime import datetime
+
+try:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from StringIO import StringIO
+    from urlparse import parse_qs, urlparse
+except ImportError:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from io import StringIO
+    from socketserver import ThreadingMixIn
+    from urllib.parse import parse_qs, urlparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NAMESPACE = 'benchmark'
+
+KINDS = {
+    'pods': 'Pod',
+    'deploymentconfigs': 'DeploymentConfig',
+    'templates': 'Template',
+    'namespaces': 'Namespace',
+}
+
+try:
+    monotonic = time.monotonic
+except AttributeError:
+    monotonic = time.time
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+# Stand-in API server
+
+def status(code, reason, message):
+    return dict(kind='Status', apiVersion='v1', metadata={}, status='Failure', message=message, reason=reason,
+                code=code)
+
+
+def selected(obj, query):
+    """
+    True, if the object matches the equality-based labelSelector and fieldSelector of a query, such as
+    app=web,tier=frontend and metadata.name=web
+    """
+    labels = obj['metadata'].get('labels') or {}
+    for requirement in filter(None, (query.get('labelSelector') or '').split(',')):
+        key, _, value = requirement.partition('=')
+        if labels.get(key.strip()) != value.lstrip('=').strip():
+            return False
+    for requirement in filter(None, (query.get('fieldSelector') or '').split(',')):
+        path, _, value = requirement.partition('=')
+        field = obj
+        for key in path.strip().split('.'):
+            field = field.get(key) if isinstance(field, dict) else None
+        if field != value.lstrip('=').strip():
+            return False
+    return True
+
+
+def merge_patch(target, patch):
+    """ RFC 7386 JSON Merge Patch. Also used for strategic merge patches, with lists replaced whole. """
+    if not isinstance(patch, dict):
+        return patch
+    result = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = merge_patch(result.get(key), value)
+    return result
+
+
+def apply_json_patch(obj, operations):
+    """ RFC 6902 JSON Patch, for the add, remove, replace and test operations """
+    for operation in operations:
+        parts = [part.replace('~1', '/').replace('~0', '~') for part in operation['path'].split('/')[1:]]
+        parent = obj
+        for part in parts[:-1]:
+            parent = parent[int(part)] if isinstance(parent, list) else parent[part]
+        key = int(parts[-1]) if isinstance(parent, list) and parts[-1] != '-' else parts[-1]
+        if operation['op'] == 'test':
+            if parent.get(key) != operation['value']:
+                raise ValueError('test failed for {}'.format(operation['path']))
+        elif operation['op'] == 'remove':
+            del parent[key]
+        elif operation['op'] == 'add' and isinstance(parent, list):
+            parent.insert(len(parent) if key == '-' else key, operation['value'])
+        else:
+            parent[key] = operation['value']
+    return obj
+
+
+class FakeAPIServer(ThreadingMixIn, HTTPServer):
+    """
+    Serves objects from memory, at the same paths as the Kubernetes and OpenShift APIs. Supports get, list, with
+    limit and continue, watch, create, replace, patch (merge, strategic merge, JSON Patch and apply), delete
+    and delete by label selector. A watch streams the changes after its resourceVersion, or every object, and
+    stays open for timeoutSeconds, or ends once it has caught up when none is given.
+    """
+    daemon_threads = True
+
+    def __init__(self):
+        HTTPServer.__init__(self, ('127.0.0.1', 0), FakeAPIHandler)
+        self.collections = {}
+        self.deleted = {}
+        self.created = {}
+        self.resource_version = 0
+        # The method and path of every request received, for tests counting them
+        self.requests = []
+        # Watches from an older resourceVersion fail with 410 Gone, as once the API server has compacted its history
+        self.oldest_resource_version = 0
+        # Notified whenever an object is stored or removed, for the watches waiting on changes
+        self.lock = threading.Condition()
+        self.thread = None
+
+    @property
+    def url(self):
+        return 'http://{}:{}'.format(*self.server_address)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def next_resource_version(self):
+        self.resource_version += 1
+        return str(self.resource_version)
+
+    def store(self, prefix, namespace, plural, obj):
+        """ Create or replace an object, as the API server would, and return the stored copy """
+        obj = json.loads(json.dumps(obj))
+        metadata = obj.setdefault('metadata', {})
+        with self.lock:
+            collection = self.collections.setdefault((prefix, namespace, plural), {})
+            existing = collection.get(metadata['name'])
+            if existing:
+                metadata.setdefault('uid', existing['metadata']['uid'])
+                metadata.setdefault('creationTimestamp', existing['metadata']['creationTimestamp'])
+            metadata.setdefault('uid', '{}-{}'.format(plural, metadata['name']))
+            metadata.setdefault('creationTimestamp', datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ'))
+            if namespace:
+                metadata['namespace'] = namespace
+            metadata['resourceVersion'] = self.next_resource_version()
+            obj.setdefault('status', {})
+            if not existing:
+                self.created[(prefix, namespace, plural, metadata['name'])] = metadata['resourceVersion']
+            collection[metadata['name']] = obj
+            self.deleted.get((prefix, namespace, plural), {}).pop(metadata['name'], None)
+            self.lock.notify_all()
+        return obj
+
+    def get(self, prefix, namespace, plural, name):
+        with self.lock:
+            return self.collections.get((prefix, namespace, plural), {}).get(name)
+
+    def remove(self, prefix, namespace, plural, name):
+        with self.lock:
+            obj = self.collections.get((prefix, namespace, plural), {}).pop(name, None)
+            if obj is not None:
+                obj = dict(obj, metadata=dict(obj['metadata'], resourceVersion=self.next_resource_version()))
+                self.deleted.setdefault((prefix, namespace, plural), {})[name] = obj
+                self.lock.notify_all()
+            return obj
+
+    def items(self, prefix, namespace, plural):
+        with self.lock:
+            if namespace:
+                collection = self.collections.get((prefix, namespace, plural), {})
+                return [collection[name] for name in sorted(collection)]
+            return [obj for key in sorted(self.collections, key=str) if key[0] == prefix and key[2] == plural
+                    for _, obj in sorted(self.collections[key].items())]
+
+    def events(self, prefix, namespace, plural, since, deadline):
+        """
+        Wait until an object is stored or removed after resourceVersion since, or the deadline passes.
+
+        :return: tuple: (list of watch events, in resourceVersion order, resourceVersion to continue from)
+        """
+        with self.lock:
+            while True:
+                events = []
+                for obj in self.items(prefix, namespace, plural):
+                    metadata = obj['metadata']
+                    if int(metadata['resourceVersion']) > since:
+                        created = self.created.get((prefix, metadata.get('namespace'), plural, metadata['name']))
+                        events.append(dict(type='ADDED' if int(created or 0) > since else 'MODIFIED', object=obj))
+                if since:
+                    events += [dict(type='DELETED', object=obj) for key, deleted in self.deleted.items()
+                               if key[0] == prefix and key[1] == (namespace or key[1]) and key[2] == plural
+                               for obj in deleted.values() if int(obj['metadata']['resourceVersion']) > since]
+                remaining = deadline - monotonic()
+                if events or remaining <= 0:
+                    events.sort(key=lambda event: int(event['object']['metadata']['resourceVersion']))
+                    return events, self.resource_version
+                self.lock.wait(remaining)
+
+
+class FakeAPIHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.dispatch('GET')
+
+    def do_POST(self):
+        self.dispatch('POST')
+
+    def do_PUT(self):
+        self.dispatch('PUT')
+
+    def do_PATCH(self):
+        self.dispatch('PATCH')
+
+    def do_DELETE(self):
+        self.dispatch('DELETE')
+
+    def respond(self, code, body):
+        data = json.dumps(body).encode('utf-8') if not isinstance(body, bytes) else body
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def watch(self, prefix, namespace, plural, query):
+        """ Stream watch events, one JSON document per chunk, as the API server does """
+        since = int(query.get('resourceVersion') or 0)
+        deadline = monotonic() + int(query.get('timeoutSeconds') or 0)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        if since and since < self.server.oldest_resource_version:
+            self.write_event(dict(type='ERROR', object=status(410, 'Expired',
+                                                              'too old resource version: {}'.format(since))))
+            self.wfile.write(b'0\r\n\r\n')
+            return
+        while True:
+            events, since = self.server.events(prefix, namespace, plural, since, deadline)
+            for event in events:
+                if selected(event['object'], query):
+                    self.write_event(event)
+            self.wfile.flush()
+            if monotonic() >= deadline:
+                break
+        self.wfile.write(b'0\r\n\r\n')
+
+    def write_event(self, event):
+        data = json.dumps(event).encode('utf-8') + b'\n'
+        self.wfile.write('{:x}\r\n'.format(len(data)).encode('ascii') + data + b'\r\n')
+
+    def read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return None
+        return json.loads(self.rfile.read(length).decode('utf-8'))
+
+    def dispatch(self, method):
+        self.server.requests.append((method, self.path))
+        url = urlparse(self.path)
+        query = dict((key, values[0]) for key, values in parse_qs(url.query).items())
+        parts = [part for part in url.path.split('/') if part]
+        if parts and parts[0] == 'version':
+            return self.respond(200, dict(major='1', minor='9', gitVersion='v1.9.0'))
+        if not parts or parts[0] not in ('api', 'oapi', 'apis'):
+            return self.respond(404, status(404, 'NotFound', 'the server could not find the requested resource'))
+
+        width = 3 if parts[0] == 'apis' else 2
+        prefix, rest = '/'.join(parts[:width]), parts[width:]
+        namespace = None
+        if len(rest) > 2 and rest[0] == 'namespaces':
+            namespace, rest = rest[1], rest[2:]
+        if not rest:
+            return self.respond(200, dict(kind='APIResourceList', groupVersion='/'.join(parts[1:width]),
+                                          resources=[]))
+        plural, name = rest[0], rest[1] if len(rest) > 1 else None
+        server = self.server
+        body = self.read_body()
+
+        if method == 'GET' and name is None:
+            return self.list(prefix, namespace, plural, query)
+        if method == 'DELETE' and name is None:
+            return self.delete_collection(prefix, namespace, plural, query)
+        if method == 'POST':
+            if server.get(prefix, namespace, plural, body['metadata']['name']):
+                return self.respond(409, status(409, 'AlreadyExists', '{} already exists'.format(plural)))
+            return self.respond(201, server.store(prefix, namespace, plural, body))
+
+        existing = server.get(prefix, namespace, plural, name)
+        if existing is None and method == 'PATCH' and 'apply-patch' in self.headers.get('Content-Type', ''):
+            # A server-side apply creates the object, and records the fields as set by its field manager
+            body['metadata']['managedFields'] = [dict(manager=query.get('fieldManager', 'unknown'), operation='Apply',
+                                                      time=datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ'))]
+            if query.get('dryRun'):
+                return self.respond(201, body)
+            return self.respond(201, server.store(prefix, namespace, plural, body))
+        if existing is None:
+            return self.respond(404, status(404, 'NotFound', '{} "{}" not found'.format(plural, name)))
+        if method == 'GET':
+            return self.respond(200, existing)
+        if method == 'DELETE':
+            server.remove(prefix, namespace, plural, name)
+            return self.respond(200, dict(kind='Status', apiVersion='v1', metadata={}, status='Success'))
+        if method == 'PUT':
+            return self.respond(200, server.store(prefix, namespace, plural, body))
+        return self.patch(prefix, namespace, plural, existing, body, query)
+
+    def list(self, prefix, namespace, plural, query):
+        if (query.get('watch') or '').lower() in ('true', '1'):
+            return self.watch(prefix, namespace, plural, query)
+        items = [obj for obj in self.server.items(prefix, namespace, plural) if selected(obj, query)]
+        kind = KINDS.get(plural, plural.capitalize())
+        api_version = prefix.split('/', 1)[1]
+
+        start = int(query.get('continue') or 0)
+        limit = int(query.get('limit') or 0)
+        end = start + limit if limit else len(items)
+        metadata = dict(resourceVersion=str(self.server.resource_version))
+        if end < len(items):
+            metadata['continue'] = str(end)
+        for obj in items[start:end]:
+            obj.setdefault('kind', kind)
+            obj.setdefault('apiVersion', api_version)
+        self.respond(200, dict(kind=kind + 'List', apiVersion=api_version, metadata=metadata,
+                               items=items[start:end]))
+
+    def delete_collection(self, prefix, namespace, plural, query):
+        if not namespace:
+            return self.respond(405, status(405, 'MethodNotAllowed', 'the server does not allow this method'))
+        for obj in self.server.items(prefix, namespace, plural):
+            if selected(obj, query):
+                self.server.remove(prefix, namespace, plural, obj['metadata']['name'])
+        self.respond(200, dict(kind='Status', apiVersion='v1', metadata={}, status='Success'))
+
+    def patch(self, prefix, namespace, plural, existing, body, query):
+        content_type = self.headers.get('Content-Type', '')
+        patched = json.loads(json.dumps(existing))
+        if 'json-patch' in content_type:
+            try:
+                patched = apply_json_patch(patched, body)
+            except (KeyError, IndexError, ValueError) as exc:
+                return self.respond(422, status(422, 'Invalid', str(exc)))
+        else:
+            patched = merge_patch(patched, body)
+        changed = patched != existing
+        if 'apply-patch' in content_type:
+            manager = query.get('fieldManager', 'unknown')
+            entries = [entry for entry in patched['metadata'].get('managedFields') or []
+                       if entry.get('manager') != manager]
+            previous = [entry for entry in existing['metadata'].get('managedFields') or []
+                        if entry.get('manager') == manager]
+            now = datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ')
+            entries.append(dict(manager=manager, operation='Apply',
+                                time=now if changed or not previous else previous[0].get('time')))
+            patched['metadata']['managedFields'] = entries
+        if not changed or query.get('dryRun'):
+            return self.respond(200, patched)
+        patched['metadata'].pop('resourceVersion', None)
+        self.respond(200, self.server.store(prefix, namespace, plural, patched))
+
+
+# Canned objects
+
+def make_pod(name, size, revision=0):
+    containers = [dict(name='container-{}'.format(index),
+                       image='registry.example.com/benchmark/app:{}'.format(index),
+                       env=[dict(name='VARIABLE_{}'.format(var), value='value-{}'.format(var)) for var in range(8)],
+                       ports=[dict(containerPort=8000 + index, protocol='TCP')],
+                       volumeMounts=[dict(name='volume-{}'.format(index), mountPath='/data/{}'.format(index))])
+                  for index in range(size)]
+    return dict(apiVersion='v1', kind='Pod',
+                metadata=dict(name=name, namespace=NAMESPACE, labels=dict(app='benchmark', revision=str(revision))),
+                spec=dict(containers=containers,
+                          volumes=[dict(name='volume-{}'.format(index), emptyDir={}) for index in range(size)]))
+
+
+def make_deployment_config(name, size, revision=0):
+    pod = make_pod(name, size)
+    return dict(apiVersion='v1', kind='DeploymentConfig',
+                metadata=dict(name=name, namespace=NAMESPACE, labels=dict(app='benchmark', revision=str(revision))),
+                spec=dict(replicas=1, selector=dict(app='benchmark'),
+                          template=dict(metadata=dict(labels=dict(app='benchmark')), spec=pod['spec'])))
+
+
+def make_template(name, size, revision=0):
+    # No objects: the client reads them as RuntimeRawExtension models without fields, which the helper cannot
+    # compare to the requested objects, so a template holding any cannot be updated. The helper also rejects an
+    # empty list.
+    parameters = [dict(name='PARAMETER_{}'.format(index), displayName='Parameter {}'.format(index),
+                       description='Parameter {} of the benchmark template'.format(index), value='value',
+                       required=True)
+                  for index in range(size * 8)]
+    return dict(apiVersion='v1', kind='Template',
+                metadata=dict(name=name, namespace=NAMESPACE, labels=dict(app='benchmark', revision=str(revision))),
+                parameters=parameters)
+
+
+# kind: (module class, API version, object factory, API path prefix, plural)
+SUBJECTS = {
+    'pod': ('KubernetesAnsibleModule', 'V1', make_pod, 'api/v1', 'pods'),
+    'deployment_config': ('OpenShiftAnsibleModule', 'V1', make_deployment_config, 'oapi/v1', 'deploymentconfigs'),
+    'template': ('OpenShiftAnsibleModule', 'V1', make_template, 'oapi/v1', 'templates'),
+    'pod_list': ('KubernetesAnsibleModule', 'V1', make_pod, 'api/v1', 'pods'),
+}
+OPERATIONS = ('create', 'noop', 'patch', 'delete', 'list')
+
+
+# Module execution
+
+def load_module_classes():
+    """ Import the module_utils in this repository as ansible.module_utils, as Ansible does when it builds a module """
+    import ansible.module_utils
+    ansible.module_utils.__path__.insert(0, os.path.join(ROOT, 'module_utils'))
+    from ansible.module_utils import basic
+    from ansible.module_utils.k8s_common import KubernetesAnsibleModule
+    from ansible.module_utils.openshift_common import OpenShiftAnsibleModule
+    classes = dict(KubernetesAnsibleModule=KubernetesAnsibleModule, OpenShiftAnsibleModule=OpenShiftAnsibleModule)
+    return basic, classes
+
+
+def run_module(basic, module_class, kind, api_version, args):
+    """ Execute a module in-process, the way its main() would, and return its result """
+    basic._ANSIBLE_ARGS = json.dumps(dict(ANSIBLE_MODULE_ARGS=args)).encode('utf-8')
+    stdout, sys.stdout = sys.stdout, StringIO()
+    try:
+        module = module_class(kind, api_version)
+        module.execute_module()
+    except SystemExit:
+        pass
+    finally:
+        output, sys.stdout = sys.stdout.getvalue(), stdout
+        basic._ANSIBLE_ARGS = None
+    try:
+        result = json.loads(output)
+    except ValueError:
+        raise BenchmarkError('{} produced no result: {}'.format(kind, output))
+    if result.get('failed'):
+        raise BenchmarkError('{} failed: {}'.format(kind, result.get('msg')))
+    return result
+
+
+def scenario(server, kind, operation, size, count):
+    """
+    Return the module arguments for each iteration of an operation on a kind, and the setup, which is not timed,
+    that puts the server in the state the operation starts from.
+
+    :return: tuple: (setup function, argument function), both taking the iteration number
+    """
+    _, _, factory, prefix, plural = SUBJECTS[kind]
+    connection = dict(host=server.url, api_key='benchmark', verify_ssl=False)
+    name = 'benchmark-{}'.format(kind.replace('_', '-'))
+
+    def present(iteration, revision=0):
+        return dict(connection, state='present', resource_definition=factory(name, size, revision))
+
+    def seed(iteration):
+        server.store(prefix, NAMESPACE, plural, factory(name, size))
+
+    def remove(iteration):
+        server.remove(prefix, NAMESPACE, plural, name)
+
+    if operation == 'list':
+        def seed_list(iteration):
+            if iteration == 0:
+                for index in range(count):
+                    server.store(prefix, NAMESPACE, plural, factory('{}-{}'.format(name, index), size))
+        return seed_list, lambda iteration: dict(connection, namespace=NAMESPACE)
+    if operation == 'create':
+        return remove, present
+    if operation == 'noop':
+        return seed, present
+    if operation == 'patch':
+        return seed, lambda iteration: present(iteration, revision=iteration + 1)
+    return seed, lambda iteration: dict(connection, state='absent', name=name, namespace=NAMESPACE)
+
+
+def peak_rss():
+    """ Peak resident set size of this process, in MiB """
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return rss / (1024.0 * 1024.0) if sys.platform == 'darwin' else rss / 1024.0
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    return ordered[max(0, int(math.ceil(percent / 100.0 * len(ordered))) - 1)]
+
+
+def benchmark(server, basic, classes, kind, operation, iterations, warmup, size, count):
+    module_class_name, api_version = SUBJECTS[kind][:2]
+    setup, arguments = scenario(server, kind, operation, size, count)
+    latencies = []
+    for iteration in range(warmup + iterations):
+        setup(iteration)
+        args = arguments(iteration)
+        start = monotonic()
+        run_module(basic, classes[module_class_name], kind, api_version, args)
+        if iteration >= warmup:
+            latencies.append(monotonic() - start)
+    return dict(kind=kind, operation=operation, iterations=iterations,
+                ops_per_sec=len(latencies) / sum(latencies),
+                p50_ms=percentile(latencies, 50) * 1000.0,
+                p99_ms=percentile(latencies, 99) * 1000.0,
+                peak_rss_mb=peak_rss())
+
+
+def print_results(results, baseline=None):
+    baseline = dict(((row['kind'], row['operation']), row) for row in baseline or [])
+    header = '{:<20} {:<8} {:>10} {:>10} {:>10} {:>12}'.format('kind', 'op', 'ops/sec', 'p50 (ms)', 'p99 (ms)',
+                                                               'peak RSS (MB)')
+    if baseline:
+        header += ' {:>10}'.format('vs base')
+    print(header)
+    print('-' * len(header))
+    for row in results:
+        line = '{kind:<20} {operation:<8} {ops_per_sec:>10.1f} {p50_ms:>10.2f} {p99_ms:>10.2f} ' \
+               '{peak_rss_mb:>12.1f}'.format(**row)
+        previous = baseline.get((row['kind'], row['operation']))
+        if previous:
+            line += ' {:>+9.1f}%'.format(100.0 * (row['ops_per_sec'] / previous['ops_per_sec'] - 1))
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--kinds', nargs='+', choices=sorted(SUBJECTS), default=sorted(SUBJECTS),
+                        help='kinds to benchmark (default: all)')
+    parser.add_argument('--operations', nargs='+', choices=OPERATIONS, default=list(OPERATIONS),
+                        help='operations to benchmark (default: all). list only applies to *_list kinds, and the '
+                             'others only to the rest.')
+    parser.add_argument('--iterations', type=int, default=50, help='timed executions per operation')
+    parser.add_argument('--warmup', type=int, default=3, help='untimed executions before each operation')
+    parser.add_argument('--size', type=int, default=10,
+                        help='containers and volumes per pod, or objects per template (default: 10)')
+    parser.add_argument('--count', type=int, default=500, help='objects served to list operations (default: 500)')
+    parser.add_argument('--json', metavar='PATH', help='write the results to PATH')
+    parser.add_argument('--baseline', metavar='PATH', help='compare ops/sec with results written by --json')
+    args = parser.parse_args()
+
+    # Modules must run in this process, and must not pick up the user's cluster
+    os.environ.pop('K8S_WORKER_SOCKET', None)
+    for key in [key for key in os.environ if key.startswith('K8S_AUTH_')]:
+        os.environ.pop(key)
+
+    basic, classes = load_module_classes()
+    server = FakeAPIServer().start()
+    results = []
+    try:
+        for kind in args.kinds:
+            for operation in args.operations:
+                if (operation == 'list') != kind.endswith('_list'):
+                    continue
+                results.append(benchmark(server, basic, classes, kind, operation, args.iterations, args.warmup,
+                                         args.size, args.count))
+    except BenchmarkError as exc:
+        print('Benchmark failed: {}'.format(exc), file=sys.stderr)
+        return 1
+    finally:
+        server.stop()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+    print_results(results, baseline)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(dict(size=args.size, count=args.count, iterations=args.iterations, results=results), f,
+                      indent=2, sort_keys=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
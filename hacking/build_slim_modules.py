@@ -0,0 +1,309 @@
+#!/usr/bin/env python
+#
+#  Copyright 2017 Red Hat | Ansible
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Split the modules in library/ into slim runtime modules, holding only the imports and main(), and doc-only
+stubs holding DOCUMENTATION, EXAMPLES and RETURN for ansible-doc.
+
+    hacking/build_slim_modules.py                 # write build/library and build/docs
+    hacking/build_slim_modules.py --check         # exit 1 if build/ is out of sync with library/
+    hacking/build_slim_modules.py --report        # compare payload size and load time
+    hacking/build_slim_modules.py --latency       # compare the end-to-end latency of ansible-playbook tasks
+
+Point the library setting in ansible.cfg at build/library to execute the slim modules, and run
+ansible-doc -M build/docs to read their documentation.
+"""
+
+from __future__ import print_function
+
+import argparse
+import ast
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+
+try:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+except ImportError:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DOC_VARIABLES = ('DOCUMENTATION', 'EXAMPLES', 'RETURN')
+
+SLIM_HEADER = (
+    "# Generated by hacking/build_slim_modules.py from library/{name}. Do not edit.\n"
+    "# DOCUMENTATION, EXAMPLES and RETURN are in docs/{name}.\n"
+)
+
+DOCS_HEADER = (
+    "# Generated by hacking/build_slim_modules.py from library/{name}. Do not edit.\n"
+    "# Documentation only. The module executed by Ansible is in library/{name}.\n"
+)
+
+
+def split_module(name, source):
+    """
+    Split a module's source into its runtime code and its documentation.
+
+    :return: tuple: (slim module source, doc stub source)
+    """
+    lines = source.splitlines(True)
+    body = ast.parse(source).body
+    doc_ranges = []
+    for index, node in enumerate(body):
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and \
+                getattr(node.targets[0], 'id', None) in DOC_VARIABLES:
+            end = body[index + 1].lineno - 1 if index + 1 < len(body) else len(lines)
+            doc_ranges.append((node.lineno - 1, end))
+
+    slim, docs = [], []
+    position = 0
+    for start, end in doc_ranges:
+        slim.extend(lines[position:start] + ['\n', '\n'])
+        docs.extend(lines[start:end])
+        position = end
+    slim.extend(lines[position:])
+
+    # The shebang stays first, and runs of blank lines left by the removed assignments are collapsed
+    shebang = slim.pop(0) if slim and slim[0].startswith('#!') else ''
+    slim_source = shebang + '\n' + SLIM_HEADER.format(name=name) + '\n' + _collapse_blank_lines(''.join(slim))
+    docs_source = DOCS_HEADER.format(name=name) + '\n' + ''.join(docs).rstrip() + '\n'
+    return slim_source, docs_source
+
+
+def _collapse_blank_lines(source):
+    result = []
+    blank = 0
+    for line in source.splitlines(True):
+        blank = blank + 1 if not line.strip() else 0
+        if blank <= 2:
+            result.append(line)
+    return ''.join(result).strip('\n') + '\n'
+
+
+def iter_modules(library):
+    for filename in sorted(os.listdir(library)):
+        if filename.endswith('.py'):
+            with open(os.path.join(library, filename)) as f:
+                yield filename, f.read()
+
+
+def build(library, output, check=False):
+    stale = []
+    for name, source in iter_modules(library):
+        slim, docs = split_module(name, source)
+        for subdir, content in (('library', slim), ('docs', docs)):
+            path = os.path.join(output, subdir, name)
+            existing = None
+            if os.path.exists(path):
+                with open(path) as f:
+                    existing = f.read()
+            if existing == content:
+                continue
+            if check:
+                stale.append(path)
+                continue
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            with open(path, 'w') as f:
+                f.write(content)
+
+    # Remove output for modules that no longer exist
+    modules = set(name for name, _ in iter_modules(library))
+    for subdir in ('library', 'docs'):
+        directory = os.path.join(output, subdir)
+        if not os.path.isdir(directory):
+            continue
+        for filename in os.listdir(directory):
+            if filename.endswith('.py') and filename not in modules:
+                if check:
+                    stale.append(os.path.join(directory, filename))
+                else:
+                    os.unlink(os.path.join(directory, filename))
+    return stale
+
+
+def _load_time(source, iterations):
+    """ Time spent by the target to inflate and compile the module source from the payload, in ms """
+    compressed = zlib.compress(source.encode('utf-8'), 6)
+    start = time.time()
+    for _ in range(iterations):
+        compile(zlib.decompress(compressed).decode('utf-8'), '<module>', 'exec')
+    return (time.time() - start) * 1000.0 / iterations
+
+
+def report(library, iterations, top):
+    rows = []
+    for name, source in iter_modules(library):
+        slim, _ = split_module(name, source)
+        rows.append((
+            name,
+            len(zlib.compress(source.encode('utf-8'), 6)),
+            len(zlib.compress(slim.encode('utf-8'), 6)),
+            _load_time(source, iterations),
+            _load_time(slim, iterations),
+        ))
+
+    header = '{:<56} {:>10} {:>10} {:>10} {:>10}'.format('module', 'full (B)', 'slim (B)', 'full (ms)', 'slim (ms)')
+    print(header)
+    print('-' * len(header))
+    for row in sorted(rows, key=lambda r: r[1], reverse=True)[:top]:
+        print('{:<56} {:>10} {:>10} {:>10.2f} {:>10.2f}'.format(*row))
+    print('-' * len(header))
+    totals = [sum(row[i] for row in rows) for i in range(1, 5)]
+    print('{:<56} {:>10} {:>10} {:>10.2f} {:>10.2f}'.format('total ({} modules)'.format(len(rows)), *totals))
+    print('\nCompressed payload reduced by {:.1f}%, inflate and compile time by {:.1f}%.'.format(
+        100.0 * (1 - float(totals[1]) / totals[0]), 100.0 * (1 - totals[3] / totals[2])))
+
+
+class NotFoundHandler(BaseHTTPRequestHandler):
+    """ Answers every request with 404, so that a module with state: absent finds nothing to delete """
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        data = json.dumps(dict(kind='Status', apiVersion='v1', metadata={}, status='Failure', reason='NotFound',
+                               code=404, message='not found')).encode('utf-8')
+        self.send_response(404)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def _ansible_playbook():
+    path = os.path.join(os.path.dirname(sys.executable), 'ansible-playbook')
+    return path if os.path.exists(path) else 'ansible-playbook'
+
+
+def _run_playbook(directory, library, module, tasks, host):
+    """ Run a playbook of tasks tasks executing module on localhost, and return its wall time, in seconds """
+    args = dict(name='benchmark', namespace='benchmark', state='absent', host=host, api_key='token')
+    playbook = os.path.join(directory, 'playbook.yml')
+    with open(playbook, 'w') as f:
+        json.dump([dict(hosts='localhost', gather_facts=False, tasks=[{module: args}] * tasks)], f)
+    inventory = os.path.join(directory, 'inventory')
+    with open(inventory, 'w') as f:
+        f.write('localhost ansible_connection=local ansible_python_interpreter={}\n'.format(sys.executable))
+    env = dict(os.environ, ANSIBLE_LIBRARY=library, ANSIBLE_MODULE_UTILS=os.path.join(ROOT, 'module_utils'),
+               ANSIBLE_RETRY_FILES_ENABLED='false', ANSIBLE_LOCAL_TEMP=os.path.join(directory, 'tmp'))
+    start = time.time()
+    process = subprocess.Popen([_ansible_playbook(), '-i', inventory, playbook], env=env,
+                               stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    output = process.communicate()[0]
+    elapsed = time.time() - start
+    if process.returncode:
+        raise RuntimeError('ansible-playbook failed:\n{}'.format(output.decode('utf-8', 'replace')))
+    return elapsed
+
+
+def _median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    return values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2.0
+
+
+def latency(library, module, tasks, rounds):
+    """
+    Time ansible-playbook runs of tasks tasks executing module, from the full and the slim modules, against a local
+    server answering 404, so that each task looks the object up once and finds it absent. Subtracting the time
+    taken by a playbook without tasks leaves the end-to-end latency of a task: building and transferring the
+    payload, starting the interpreter, and executing the module.
+    """
+    directory = tempfile.mkdtemp(prefix='slim-latency-')
+    server = HTTPServer(('127.0.0.1', 0), NotFoundHandler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    host = 'http://{}:{}'.format(*server.server_address)
+    try:
+        slim_library = os.path.join(directory, 'build')
+        build(library, slim_library)
+        libraries = (('full', library), ('slim', os.path.join(slim_library, 'library')))
+        times = dict((label, []) for label, _ in libraries)
+        empty = []
+        # Alternate the runs, so that both are equally affected by changes in the load of the machine
+        for _ in range(rounds):
+            empty.append(_run_playbook(directory, library, module, 0, host))
+            for label, path in libraries:
+                times[label].append(_run_playbook(directory, path, module, tasks, host))
+    finally:
+        server.shutdown()
+        server.server_close()
+        shutil.rmtree(directory, ignore_errors=True)
+
+    startup = _median(empty)
+    print('{}, {} tasks per playbook, median of {} runs, {:.2f} s for a playbook without tasks\n'.format(
+        module, tasks, rounds, startup))
+    header = '{:<8} {:>14} {:>14}'.format('modules', 'playbook (s)', 'per task (ms)')
+    print(header)
+    print('-' * len(header))
+    per_task = {}
+    for label, _ in libraries:
+        playbook = _median(times[label])
+        per_task[label] = (playbook - startup) * 1000.0 / tasks
+        print('{:<8} {:>14.2f} {:>14.1f}'.format(label, playbook, per_task[label]))
+    print('\nTask latency reduced by {:.1f}%.'.format(100.0 * (1 - per_task['slim'] / per_task['full'])))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--library', default=os.path.join(ROOT, 'library'),
+                        help='directory containing the modules (default: library/)')
+    parser.add_argument('--output', default=os.path.join(ROOT, 'build'),
+                        help='directory to write library/ and docs/ into (default: build/)')
+    parser.add_argument('--check', action='store_true',
+                        help='do not write anything, and exit 1 if the output is out of sync')
+    parser.add_argument('--report', action='store_true',
+                        help='compare the compressed payload size and load time of full and slim modules')
+    parser.add_argument('--iterations', type=int, default=20, help='iterations used to time loading (--report)')
+    parser.add_argument('--top', type=int, default=15, help='number of modules listed (--report)')
+    parser.add_argument('--latency', action='store_true',
+                        help='compare the end-to-end latency of ansible-playbook tasks executing full and slim modules')
+    parser.add_argument('--module', default='k8s_v2alpha1_cron_job',
+                        help='module executed by the tasks (--latency, default: k8s_v2alpha1_cron_job)')
+    parser.add_argument('--tasks', type=int, default=20, help='tasks per playbook (--latency)')
+    parser.add_argument('--rounds', type=int, default=5, help='playbook runs of each kind (--latency)')
+    args = parser.parse_args()
+
+    if args.report:
+        report(args.library, args.iterations, args.top)
+        return 0
+    if args.latency:
+        latency(args.library, args.module, args.tasks, args.rounds)
+        return 0
+
+    stale = build(args.library, args.output, check=args.check)
+    if stale:
+        print('Out of sync with {}. Run hacking/build_slim_modules.py to regenerate:'.format(args.library))
+        for path in stale:
+            print('  {}'.format(path))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
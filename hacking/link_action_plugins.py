@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+#
+#  Copyright 2017 Red Hat | Ansible
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Link action_plugins/k8s_local.py under the name of each module it can run, so that tasks running on the controller
+are executed by a worker that keeps the client imported, rather than by a new interpreter per task.
+
+    hacking/link_action_plugins.py              # link every module
+    hacking/link_action_plugins.py --check      # exit 1 if the links are out of sync with library/
+    hacking/link_action_plugins.py --remove     # remove the links, executing every task as usual
+"""
+
+from __future__ import print_function
+
+import argparse
+import os
+import re
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PLUGIN = 'k8s_local.py'
+
+# The module class, kind and API version a module's main() constructs
+MODULE_CALL = re.compile(r"(KubernetesAnsibleModule|OpenShiftAnsibleModule)\('(\w+)', '(\w+)'\)")
+
+
+def linked_modules(library):
+    """ :return: list: names of the modules whose main() constructs a module class the worker runs """
+    names = []
+    for filename in sorted(os.listdir(library)):
+        if not filename.endswith('.py'):
+            continue
+        with open(os.path.join(library, filename)) as f:
+            if MODULE_CALL.search(f.read()):
+                names.append(filename)
+    return names
+
+
+def existing_links(action_plugins):
+    return sorted(filename for filename in os.listdir(action_plugins)
+                  if os.path.islink(os.path.join(action_plugins, filename)) and
+                  os.readlink(os.path.join(action_plugins, filename)) == PLUGIN)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--library', default=os.path.join(ROOT, 'library'),
+                        help='directory containing the modules (default: library/)')
+    parser.add_argument('--action-plugins', default=os.path.join(ROOT, 'action_plugins'),
+                        help='directory containing {} (default: action_plugins/)'.format(PLUGIN))
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--check', action='store_true', help='exit 1 if the links are out of sync with library/')
+    group.add_argument('--remove', action='store_true', help='remove the links')
+    args = parser.parse_args()
+
+    wanted = [] if args.remove else linked_modules(args.library)
+    existing = existing_links(args.action_plugins)
+    stale = sorted(set(existing) - set(wanted))
+    missing = sorted(set(wanted) - set(existing))
+
+    if args.check:
+        for filename in missing:
+            print('missing: {}'.format(filename))
+        for filename in stale:
+            print('stale: {}'.format(filename))
+        return 1 if missing or stale else 0
+
+    for filename in stale:
+        os.unlink(os.path.join(args.action_plugins, filename))
+    linked = 0
+    for filename in missing:
+        path = os.path.join(args.action_plugins, filename)
+        if os.path.lexists(path):
+            print('skipping {}: not a link to {}'.format(path, PLUGIN))
+            continue
+        os.symlink(PLUGIN, path)
+        linked += 1
+    print('{} linked, {} removed, {} modules run by the worker'.format(linked, len(stale), len(wanted)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
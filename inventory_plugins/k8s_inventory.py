@@ -0,0 +1,297 @@
+#
+#  Copyright 2017 Red Hat | Ansible
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = '''
+name: k8s_inventory
+plugin_type: inventory
+short_description: Kubernetes and OpenShift inventory source
+description:
+- Adds a host for each pod, and, optionally, each node, read with the OpenShift client helpers, rather than
+  by registering the result of a list module and looping over it.
+- Pods are named C(<name>.<namespace>), and grouped in C(pods), C(namespace_<namespace>),
+  C(label_<key>_<value>) for each of their labels, and C(node_<node>), with the node they run on. Nodes are
+  grouped in C(nodes) and C(label_<key>_<value>).
+- Reads configuration from a YAML file whose name ends with C(k8s.yml) or C(k8s.yaml).
+- The lists are kept in Ansible's inventory cache, when enabled, so that repeated runs within
+  I(cache_timeout) do not list the cluster again.
+requirements:
+- openshift >= 0.3
+options:
+  plugin:
+    description: Token that ensures this is a source file for the plugin.
+    required: true
+    choices: ['k8s_inventory']
+  api_key:
+    description: Token used to connect to the API.
+    env:
+    - name: K8S_AUTH_API_KEY
+  cert_file:
+    description: Path to a certificate used to authenticate with the API.
+    type: path
+    env:
+    - name: K8S_AUTH_CERT_FILE
+  context:
+    description: The name of a context found in the Kubernetes config file.
+    env:
+    - name: K8S_AUTH_CONTEXT
+  host:
+    description: Provide a URL for accessing the Kubernetes API.
+    env:
+    - name: K8S_AUTH_HOST
+  key_file:
+    description: Path to a key file used to authenticate with the API.
+    type: path
+    env:
+    - name: K8S_AUTH_KEY_FILE
+  kubeconfig:
+    description: Path to an existing Kubernetes config file.
+    type: path
+    env:
+    - name: K8S_AUTH_KUBECONFIG
+  password:
+    description: Provide a password for connecting to the API. Use in conjunction with I(username).
+    env:
+    - name: K8S_AUTH_PASSWORD
+  ssl_ca_cert:
+    description: Path to a CA certificate used to authenticate with the API.
+    type: path
+    env:
+    - name: K8S_AUTH_SSL_CA_CERT
+  username:
+    description: Provide a username for connecting to the API.
+    env:
+    - name: K8S_AUTH_USERNAME
+  verify_ssl:
+    description: Whether or not to verify the API server's SSL certificates.
+    type: bool
+    env:
+    - name: K8S_AUTH_VERIFY_SSL
+  namespaces:
+    description: Only add the pods in these namespaces. If not provided, pods in all namespaces are added.
+    type: list
+  label_selector:
+    description: Only add pods with labels matching the selector, e.g. C(app=hello,tier!=db).
+  field_selector:
+    description: Only add pods with fields matching the selector.
+    default: status.phase=Running
+  include_nodes:
+    description: Add a host for each node.
+    type: bool
+    default: true
+  include_projects:
+    description:
+    - Add a C(namespace_<project>) group for every OpenShift project, including those without pods, with
+      the project's display name and description as I(project_display_name) and I(project_description).
+    type: bool
+    default: false
+extends_documentation_fragment:
+- inventory_cache
+- constructed
+'''
+
+EXAMPLES = '''
+# k8s.yml
+plugin: k8s_inventory
+namespaces:
+- hello
+label_selector: tier=frontend
+cache: yes
+cache_plugin: jsonfile
+cache_connection: ~/.ansible/inventory_cache
+cache_timeout: 300
+keyed_groups:
+- key: pod_labels.app
+  prefix: app
+'''
+
+import os
+import re
+
+from ansible.errors import AnsibleError
+from ansible.plugins.inventory import BaseInventoryPlugin, Cacheable, Constructable
+
+# Plugins are not packaged like modules, so import module_utils from this role, ahead of any copy in Ansible
+import ansible.module_utils
+MODULE_UTILS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'module_utils')
+if MODULE_UTILS not in ansible.module_utils.__path__:
+    ansible.module_utils.__path__.insert(0, MODULE_UTILS)
+
+from ansible.module_utils.k8s_batch import AUTH_ARG_SPEC
+from ansible.module_utils.k8s_cache import CredentialCache
+from ansible.module_utils.k8s_common import (HAS_K8S_MODULE_HELPER, KubernetesAnsibleFailure, KubernetesAnsibleModule,
+                                             import_client, list_objects, set_client_config)
+from ansible.module_utils.openshift_common import OpenShiftAnsibleModule
+
+DISPLAY_NAME_ANNOTATION = 'openshift.io/display-name'
+DESCRIPTION_ANNOTATION = 'openshift.io/description'
+
+
+def safe_group_name(name):
+    return re.sub(r'[^A-Za-z0-9_]', '_', name)
+
+
+def pod_facts(pod):
+    """ The fields of a pod, as returned by to_dict(), that the inventory uses. Stored in the cache. """
+    metadata = pod.get('metadata') or {}
+    spec = pod.get('spec') or {}
+    status = pod.get('status') or {}
+    return dict(name=metadata.get('name'),
+                namespace=metadata.get('namespace'),
+                labels=metadata.get('labels') or {},
+                annotations=metadata.get('annotations') or {},
+                node_name=spec.get('node_name'),
+                pod_ip=status.get('pod_ip'),
+                phase=status.get('phase'),
+                containers=[container.get('name') for container in spec.get('containers') or []])
+
+
+def node_facts(node):
+    metadata = node.get('metadata') or {}
+    status = node.get('status') or {}
+    return dict(name=metadata.get('name'),
+                labels=metadata.get('labels') or {},
+                addresses=dict((address.get('type'), address.get('address'))
+                               for address in status.get('addresses') or []))
+
+
+def project_facts(project):
+    metadata = project.get('metadata') or {}
+    annotations = metadata.get('annotations') or {}
+    return dict(name=metadata.get('name'),
+                display_name=annotations.get(DISPLAY_NAME_ANNOTATION),
+                description=annotations.get(DESCRIPTION_ANNOTATION))
+
+
+class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
+    NAME = 'k8s_inventory'
+
+    def __init__(self):
+        super(InventoryModule, self).__init__()
+        self.api_client = None
+
+    def verify_file(self, path):
+        return super(InventoryModule, self).verify_file(path) and path.endswith(('k8s.yml', 'k8s.yaml'))
+
+    def parse(self, inventory, loader, path, cache=True):
+        super(InventoryModule, self).parse(inventory, loader, path, cache=cache)
+        self._read_config_data(path)
+
+        cache_key = self.get_cache_key(path)
+        use_cache = self.get_option('cache')
+        facts = None
+        if use_cache and cache:
+            try:
+                facts = self._cache[cache_key]
+            except KeyError:
+                pass
+        if facts is None:
+            facts = self.fetch()
+            if use_cache:
+                self._cache[cache_key] = facts
+        self.populate(facts)
+
+    def fetch(self):
+        """
+        List the pods, nodes and projects, with one paged list request per namespace.
+
+        :return: dict: the facts used to build the inventory, which can be cached
+        """
+        if not HAS_K8S_MODULE_HELPER:
+            raise AnsibleError("This plugin requires the OpenShift Python client. Try `pip install openshift`")
+        import_client()
+        auth_options = dict((key, self.get_option(key)) for key in AUTH_ARG_SPEC
+                            if self.get_option(key) is not None)
+        selectors = dict((key, self.get_option(key)) for key in ('label_selector', 'field_selector')
+                         if self.get_option(key))
+        facts = dict(pods=[], nodes=[], projects=[])
+        try:
+            helper = self.get_helper(KubernetesAnsibleModule, 'pod_list', auth_options)
+            for namespace in self.get_option('namespaces') or [None]:
+                facts['pods'].extend(pod_facts(pod) for pod in list_objects(helper, namespace, selectors)['items'])
+            if self.get_option('include_nodes'):
+                helper = self.get_helper(KubernetesAnsibleModule, 'node_list', auth_options)
+                facts['nodes'] = [node_facts(node) for node in list_objects(helper, None)['items']]
+            if self.get_option('include_projects'):
+                helper = self.get_helper(OpenShiftAnsibleModule, 'project_list', auth_options)
+                facts['projects'] = [project_facts(project) for project in list_objects(helper, None)['items']]
+        except KubernetesAnsibleFailure as exc:
+            raise AnsibleError('{}: {}'.format(exc.msg, exc.kwargs.get('error', '')))
+        return facts
+
+    def get_helper(self, module_class, kind, auth_options):
+        """ Return a helper for kind, sharing one configured client, and its connection pool, across kinds """
+        try:
+            helper = module_class.get_helper('V1', kind)
+        except Exception as exc:
+            raise AnsibleError("Error initializing AnsibleModuleHelper: {}".format(exc))
+        if self.api_client is None:
+            set_client_config(helper, auth_options, CredentialCache(auth_options))
+            self.api_client = helper.api_client
+        else:
+            helper.api_client = self.api_client
+        return helper
+
+    def populate(self, facts):
+        strict = self.get_option('strict')
+        for project in facts['projects']:
+            group = self.add_group('namespace_' + project['name'])
+            self.inventory.set_variable(group, 'project_display_name', project['display_name'])
+            self.inventory.set_variable(group, 'project_description', project['description'])
+
+        for node in facts['nodes']:
+            host = node['name']
+            self.inventory.add_host(host, group=self.add_group('nodes'))
+            self.inventory.add_host(host, group=self.add_group('node_' + host))
+            self.add_label_groups(host, node['labels'])
+            self.inventory.set_variable(host, 'node_labels', node['labels'])
+            self.inventory.set_variable(host, 'node_addresses', node['addresses'])
+            address = node['addresses'].get('InternalIP') or node['addresses'].get('ExternalIP')
+            if address:
+                self.inventory.set_variable(host, 'ansible_host', address)
+            self.construct(host, strict)
+
+        for pod in facts['pods']:
+            host = '{}.{}'.format(pod['name'], pod['namespace'])
+            self.inventory.add_host(host, group=self.add_group('pods'))
+            self.inventory.add_host(host, group=self.add_group('namespace_' + pod['namespace']))
+            if pod['node_name']:
+                self.inventory.add_host(host, group=self.add_group('node_' + pod['node_name']))
+            self.add_label_groups(host, pod['labels'])
+            for key, value in pod.items():
+                self.inventory.set_variable(host, 'pod_' + key, value)
+            # Used by the kubectl connection plugin
+            self.inventory.set_variable(host, 'ansible_kubectl_pod', pod['name'])
+            self.inventory.set_variable(host, 'ansible_kubectl_namespace', pod['namespace'])
+            self.construct(host, strict)
+
+    def add_group(self, name):
+        return self.inventory.add_group(safe_group_name(name)) or safe_group_name(name)
+
+    def add_label_groups(self, host, labels):
+        for key, value in sorted(labels.items()):
+            self.inventory.add_host(host, group=self.add_group('label_{}_{}'.format(key, value)))
+
+    def construct(self, host, strict):
+        """ Apply the compose, groups and keyed_groups options """
+        variables = self.inventory.get_host(host).get_vars()
+        self._set_composite_vars(self.get_option('compose'), variables, host, strict=strict)
+        self._add_host_to_composed_groups(self.get_option('groups'), variables, host, strict=strict)
+        self._add_host_to_keyed_groups(self.get_option('keyed_groups'), variables, host, strict=strict)
@@ -0,0 +1,259 @@
+#!/usr/bin/env python
+
+from ansible.module_utils.k8s_batch import KubernetesBatchModule
+from ansible.module_utils.k8s_common import KubernetesAnsibleException
+
+DOCUMENTATION = '''
+module: k8s_batch
+short_description: Apply many Kubernetes and OpenShift resource definitions
+description:
+- Create, patch, replace or delete a list of objects, of any kind, in a single task. Each definition is
+  handled the same way as by the module for its kind, and all of them share one configured client and
+  connection pool. Supports check mode, and attempts to be idempotent.
+version_added: 2.3.0
+author: OpenShift (@openshift)
+options:
+  api_key:
+    description:
+    - Token used to connect to the API.
+  apply_strategy:
+    description:
+    - Determines how an existing object is updated when I(state) is C(present). With C(patch), the object
+      is read, compared to the requested parameters, and patched if they differ. C(json_patch) does the
+      same, but sends a JSON Patch holding only the fields that differ, which fails if the object changed
+      after it was read. With C(server), the object is created or updated by a single server-side apply
+      request, which the API server merges. A change is detected from the time the server records for
+      I(field_manager), so an apply within a second of another change by the same manager is reported as
+      changed. The module builds the request itself, as the kubernetes 3.0.0 client it requires, written
+      for Kubernetes 1.7, has no apply method, but the API server must run Kubernetes 1.16 or later. With
+      I(force), fields owned by other managers are taken over, rather than the object being replaced.
+    default: patch
+    choices:
+    - patch
+    - json_patch
+    - server
+  cert_file:
+    description:
+    - Path to a certificate used to authenticate with the API.
+    type: path
+  context:
+    description:
+    - The name of a context found in the Kubernetes config file.
+  debug:
+    description:
+    - Enable debug output from the OpenShift helper. Logging info is written to KubeObjHelper.log
+    default: false
+    type: bool
+  dry_run:
+    description:
+    - If set to C(True) the module will exit without executing any action, returning the request for
+      each resource.
+    default: false
+    type: bool
+  field_manager:
+    description:
+    - Name recorded as the owner of the fields set by a server-side apply.
+    default: ansible
+  force:
+    description:
+    - If set to C(True), and I(state) is C(present), existing objects will be replaced, rather than
+      patched.
+    default: false
+    type: bool
+  host:
+    description:
+    - Provide a URL for acessing the Kubernetes API.
+  key_file:
+    description:
+    - Path to a key file used to authenticate with the API.
+    type: path
+  kubeconfig:
+    description:
+    - Path to an existing Kubernetes config file. If not provided, and no other connection
+      options are provided, the openshift client will attempt to load the default
+      configuration file from I(~/.kube/config.json).
+    type: path
+  namespace:
+    description:
+    - Namespace for definitions that do not set I(metadata.namespace).
+  offline_check:
+    description:
+    - In check mode, compare the requested state with the objects in this file, rather than reading the
+      object from the API server, so no requests are sent. The file may hold the registered result of a
+      list module, or of this module, the output of C(kubectl get -o yaml), or a list of objects, as YAML
+      or JSON. Objects missing from the file are treated as absent. Ignored outside check mode.
+    type: path
+  parallelism:
+    description:
+    - Number of definitions applied concurrently. Each definition's read, compare and write cycle is
+      run by one of a bounded pool of threads sharing the client's connection pool. Results are
+      returned in the order of the definitions.
+    default: 1
+    type: int
+  password:
+    description:
+    - Provide a password for connecting to the API. Use in conjunction with I(username).
+  profile:
+    description:
+    - If set to C(True), the result includes I(timings), holding the time, in milliseconds, spent in each
+      phase of the module, such as C(argspec), C(set_client_config), C(get_object), C(compare), C(patch)
+      and C(to_dict), and the number of HTTP requests made and bytes transferred. Profiling can also be
+      enabled by setting the I(K8S_PROFILE) environment variable to C(true).
+    default: false
+    type: bool
+  resources:
+    description:
+    - List of resource definitions. Each requires I(apiVersion), I(kind) and I(metadata.name). Mutually
+      exclusive with I(src).
+    type: list
+  retries:
+    description:
+    - Number of times a definition is retried, with exponential backoff, when the API server
+      responds with 429 Too Many Requests or a 5xx error.
+    default: 5
+    type: int
+  return_fields:
+    description:
+    - List of dotted or JSONPath style paths, such as C(metadata.name) or C(status.phase), relative
+      to each returned object. When provided, returned objects are trimmed to the requested fields.
+    type: list
+  return_request:
+    description:
+    - If set to C(False), request bodies are not included in the results.
+    default: true
+    type: bool
+  src:
+    description:
+    - Path to a file of one or more YAML documents, or to a directory, in which case every C(.yml), C(.yaml)
+      and C(.json) file below it is read, in path order. Documents are applied as they are parsed, without
+      loading the whole manifest in memory. Mutually exclusive with I(resources).
+    type: path
+  ssl_ca_cert:
+    description:
+    - Path to a CA certificate used to authenticate with the API.
+    type: path
+  state:
+    description:
+    - Determines if the objects should be created or patched, when set to C(present), or deleted, when
+      set to C(absent).
+    default: present
+    choices:
+    - present
+    - absent
+  username:
+    description:
+    - Provide a username for connecting to the API.
+  verify_ssl:
+    description:
+    - Whether or not to verify the API server's SSL certificates.
+    type: bool
+  wait:
+    description:
+    - Wait for the object to become ready, or, when I(state) is C(absent), to be deleted. A single watch
+      is opened from the object's resourceVersion, and the module returns as soon as the object is ready.
+      If the watch fails, the object is polled with exponential backoff. Objects are ready when their
+      observed generation is current, and their ready or available replicas, completions or phase say
+      so. Ignored in check mode.
+    default: false
+    type: bool
+  wait_condition:
+    description:
+    - Wait for a condition in the object's I(status.conditions), rather than for the object to become
+      ready. Holds the condition's I(type), I(status), which defaults to C(True), and, optionally,
+      I(reason).
+    type: dict
+  wait_timeout:
+    description:
+    - Number of seconds to wait, after which the module fails.
+    default: 120
+    type: int
+requirements:
+- openshift == 0.3.1
+'''
+
+EXAMPLES = '''
+- name: Create a config map and a service
+  k8s_batch:
+    namespace: hello
+    resources:
+    - apiVersion: v1
+      kind: ConfigMap
+      metadata:
+        name: hello-config
+      data:
+        greeting: Hello.
+    - apiVersion: v1
+      kind: Service
+      metadata:
+        name: hello-service
+      spec:
+        ports:
+        - port: 8080
+          targetPort: 8080
+        selector:
+          app: hello
+
+- name: Apply every manifest in a directory
+  k8s_batch:
+    src: /path/to/manifests
+    parallelism: 4
+'''
+
+RETURN = '''
+changed:
+  type: bool
+  description: True, if any of the objects changed
+results:
+  type: list
+  description: The outcome for each resource definition, in the order they were provided
+  contains:
+    api_version:
+      description:
+      - API version of the definition.
+      type: str
+    changed:
+      description:
+      - True, if the object was created, patched, replaced or deleted.
+      type: bool
+    failed:
+      description:
+      - True, if the operation failed. I(msg) holds the reason.
+      type: bool
+    kind:
+      description:
+      - Kind of the definition.
+      type: str
+    name:
+      description:
+      - Name of the object.
+      type: str
+    namespace:
+      description:
+      - Namespace of the object.
+      type: str
+    request:
+      description:
+      - The request body sent to the API.
+      type: dict
+    result:
+      description:
+      - A dict representing the object's state.
+      type: dict
+'''
+
+
+def main():
+    try:
+        module = KubernetesBatchModule()
+    except KubernetesAnsibleException as exc:
+        # The helper failed to init, so there is no module object. All we can do is raise the error.
+        raise Exception(exc.message)
+
+    try:
+        module.execute_module()
+    except KubernetesAnsibleException as exc:
+        module.fail_json(msg="Module failed!", error=str(exc))
+
+
+if __name__ == '__main__':
+    main()
@@ -71,6 +71,25 @@ options:
   password:
     description:
     - Provide a password for connecting to the API. Use in conjunction with I(username).
+  profile:
+    description:
+    - If set to C(True), the result includes I(timings), holding the time, in milliseconds, spent in each
+      phase of the module, such as C(argspec), C(set_client_config), C(get_object), C(compare), C(patch)
+      and C(to_dict), and the number of HTTP requests made and bytes transferred. Profiling can also be
+      enabled by setting the I(K8S_PROFILE) environment variable to C(true).
+    default: false
+    type: bool
+  return_fields:
+    description:
+    - List of dotted or JSONPath style paths, such as C(metadata.name) or C(items[*].status.phase),
+      relative to the returned object. When provided, the returned object is trimmed to the requested
+      fields. Lists are traversed implicitly, so C(items.metadata.name) selects the name of every item.
+    type: list
+  return_request:
+    description:
+    - If set to C(False), the request body is not included in the result.
+    default: true
+    type: bool
   ssl_ca_cert:
     description:
     - Path to a CA certificate used to authenticate with the API.
@@ -20,6 +20,22 @@ options:
   api_key:
     description:
     - Token used to connect to the API.
+  apply_strategy:
+    description:
+    - Determines how an existing object is updated when I(state) is C(present). With C(patch), the object
+      is read, compared to the requested parameters, and patched if they differ. C(json_patch) does the
+      same, but sends a JSON Patch holding only the fields that differ, which fails if the object changed
+      after it was read. With C(server), the object is created or updated by a single server-side apply
+      request, which the API server merges. A change is detected from the time the server records for
+      I(field_manager), so an apply within a second of another change by the same manager is reported as
+      changed. The module builds the request itself, as the kubernetes 3.0.0 client it requires, written
+      for Kubernetes 1.7, has no apply method, but the API server must run Kubernetes 1.16 or later. With
+      I(force), fields owned by other managers are taken over, rather than the object being replaced.
+    default: patch
+    choices:
+    - patch
+    - json_patch
+    - server
   cert_file:
     description:
     - Path to a certificate used to authenticate with the API.
@@ -32,6 +48,10 @@ options:
     - Enable debug output from the OpenShift helper. Logging info is written to KubeObjHelper.log
     default: false
     type: bool
+  field_manager:
+    description:
+    - Name recorded as the owner of the fields set by a server-side apply.
+    default: ansible
   force:
     description:
     - If set to C(True), and I(state) is C(present), an existing object will updated,
@@ -68,18 +88,48 @@ options:
       is equivalent to the "default" namespace, but "default" is the canonical representation.
       Not all objects are required to be scoped to a namespace - the value of this
       field for those objects will be empty. Must be a DNS_LABEL. Cannot be updated.
+  offline_check:
+    description:
+    - In check mode, compare the requested state with the objects in this file, rather than reading the
+      object from the API server, so no requests are sent. The file may hold the registered result of a
+      list module, or of this module, the output of C(kubectl get -o yaml), or a list of objects, as YAML
+      or JSON. Objects missing from the file are treated as absent. Ignored outside check mode.
+    type: path
   password:
     description:
     - Provide a password for connecting to the API. Use in conjunction with I(username).
+  profile:
+    description:
+    - If set to C(True), the result includes I(timings), holding the time, in milliseconds, spent in each
+      phase of the module, such as C(argspec), C(set_client_config), C(get_object), C(compare), C(patch)
+      and C(to_dict), and the number of HTTP requests made and bytes transferred. Profiling can also be
+      enabled by setting the I(K8S_PROFILE) environment variable to C(true).
+    default: false
+    type: bool
   resource_definition:
     description:
     - Provide the YAML definition for the object, bypassing any modules parameters
       intended to define object attributes.
     type: dict
+  return_fields:
+    description:
+    - List of dotted or JSONPath style paths, such as C(metadata.name) or C(items[*].status.phase),
+      relative to the returned object. When provided, the returned object is trimmed to the requested
+      fields. Lists are traversed implicitly, so C(items.metadata.name) selects the name of every item.
+    type: list
+  return_request:
+    description:
+    - If set to C(False), the request body is not included in the result.
+    default: true
+    type: bool
   src:
     description:
     - Provide a path to a file containing the YAML definition of the object. Mutually
       exclusive with I(resource_definition).
+    - The file may hold several YAML documents, and the path may be a directory, in which case every
+      C(.yml), C(.yaml) and C(.json) file below it is read, in path order. Each document is applied as it is
+      parsed, and the module returns I(results), holding the outcome for each object, rather than a single
+      object. Every document must be of the module's kind; use M(k8s_batch) to apply several kinds.
     type: path
   ssl_ca_cert:
     description:
@@ -115,6 +165,26 @@ options:
     description:
     - Whether or not to verify the API server's SSL certificates.
     type: bool
+  wait:
+    description:
+    - Wait for the object to become ready, or, when I(state) is C(absent), to be deleted. A single watch
+      is opened from the object's resourceVersion, and the module returns as soon as the object is ready.
+      If the watch fails, the object is polled with exponential backoff. Objects are ready when their
+      observed generation is current, and their ready or available replicas, completions or phase say
+      so. Ignored in check mode.
+    default: false
+    type: bool
+  wait_condition:
+    description:
+    - Wait for a condition in the object's I(status.conditions), rather than for the object to become
+      ready. Holds the condition's I(type), I(status), which defaults to C(True), and, optionally,
+      I(reason).
+    type: dict
+  wait_timeout:
+    description:
+    - Number of seconds to wait, after which the module fails.
+    default: 120
+    type: int
 requirements:
 - kubernetes == 3.0.0
 '''
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+
+import os
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.k8s_common import KubernetesAnsibleModule
+from ansible.module_utils.k8s_worker import (DEFAULT_WORKER_SOCKET, WORKER_SOCKET_ENV, KubernetesWorkerException,
+                                             start_worker, stop_worker, worker_request)
+from ansible.module_utils.openshift_common import OpenShiftAnsibleModule
+
+MODULE_CLASSES = (KubernetesAnsibleModule, OpenShiftAnsibleModule)
+
+DOCUMENTATION = '''
+module: k8s_worker
+short_description: Manage a persistent worker for the Kubernetes and OpenShift modules
+description:
+- Starts or stops a local worker process that executes the Kubernetes and OpenShift modules on behalf of
+  individual tasks. The worker keeps the OpenShift client imported, and keeps configured API clients
+  warm, keyed by API version, kind and authentication options, so tasks skip interpreter start-up and
+  configuration loading.
+- Modules hand their parameters to the worker when the I(K8S_WORKER_SOCKET) environment variable points
+  at its socket. When no worker is listening, modules fall back to executing in-process.
+version_added: 2.3.0
+author: OpenShift (@openshift)
+options:
+  idle_timeout:
+    description:
+    - Number of seconds the worker waits for a request before exiting. Set to C(0) to keep it running
+      until it is stopped.
+    default: 600
+    type: int
+  socket:
+    description:
+    - Path to the Unix socket the worker listens on. Defaults to the value of the I(K8S_WORKER_SOCKET)
+      environment variable, or I(~/.ansible/k8s_worker.sock).
+    type: path
+  state:
+    description:
+    - Set to C(started) to start the worker, if it is not running, C(stopped) to stop it, or C(restarted)
+      to replace a running worker with a new one.
+    default: started
+    choices:
+    - started
+    - stopped
+    - restarted
+requirements:
+- openshift == 0.3.1
+'''
+
+EXAMPLES = '''
+- name: Start the worker
+  k8s_worker:
+    socket: /tmp/k8s_worker.sock
+
+- name: Create a config map, executed by the worker
+  k8s_v1_config_map:
+    name: hello
+    namespace: hello
+    data:
+      greeting: Hello.
+  environment:
+    K8S_WORKER_SOCKET: /tmp/k8s_worker.sock
+
+- name: Stop the worker
+  k8s_worker:
+    socket: /tmp/k8s_worker.sock
+    state: stopped
+'''
+
+RETURN = '''
+socket:
+  type: string
+  description: Path to the worker's socket
+pid:
+  type: int
+  description: Process ID of the worker
+  returned: when I(state) = C(started) or C(restarted)
+'''
+
+
+def main():
+    module = AnsibleModule(
+        argument_spec=dict(
+            idle_timeout=dict(type='int', default=600),
+            socket=dict(type='path'),
+            state=dict(default='started', choices=['started', 'stopped', 'restarted'])
+        ),
+        supports_check_mode=True
+    )
+    socket_path = module.params['socket'] or os.environ.get(WORKER_SOCKET_ENV, DEFAULT_WORKER_SOCKET)
+    state = module.params['state']
+    changed = False
+
+    running = worker_request(socket_path, dict(command='ping'))
+    if state in ('stopped', 'restarted') and running:
+        changed = True
+        if not module.check_mode:
+            stop_worker(socket_path)
+            running = None
+    if state == 'stopped':
+        module.exit_json(changed=changed, socket=socket_path)
+
+    if not running:
+        changed = True
+        if not module.check_mode:
+            try:
+                running = dict(pid=start_worker(socket_path, MODULE_CLASSES,
+                                                idle_timeout=module.params['idle_timeout'] or None))
+            except (KubernetesWorkerException, OSError) as exc:
+                module.fail_json(msg="Failed to start worker: {}".format(exc))
+    module.exit_json(changed=changed, socket=socket_path, pid=(running or {}).get('pid'))
+
+
+if __name__ == '__main__':
+    main()
@@ -27,6 +27,17 @@ options:
     - Enable debug output from the OpenShift helper. Logging info is written to KubeObjHelper.log
     default: false
     type: bool
+  delete_collection:
+    description:
+    - If set to C(True), delete the listed objects. Rather than one request per object, a single DELETE
+      request is sent for the collection in each namespace holding any of them, with the same
+      I(label_selector) and I(field_selector). The result holds the objects that were deleted.
+    default: false
+    type: bool
+  field_selector:
+    description:
+    - Only list objects with fields matching the selector, for example C(status.phase=Running).
+      Filtering is performed by the API server.
   force:
     description:
     - If set to C(True), and I(state) is C(present), an existing object will updated,
@@ -46,13 +57,74 @@ options:
       options are provided, the openshift client will attempt to load the default
       configuration file from I(~/.kube/config.json).
     type: path
+  label_selector:
+    description:
+    - Only list objects with labels matching the selector, for example C(app=hello,tier!=db).
+      Filtering is performed by the API server.
+  max_events:
+    description:
+    - With I(watch), stop watching once this many events have been received.
+    type: int
+  namespace:
+    description:
+    - Only list objects in the namespace. If not provided, objects in all namespaces are listed.
+  page_size:
+    description:
+    - Number of items to request from the API at a time. Each page is converted and released
+      before the next is requested, limiting memory use for large lists. Set to C(0) to request
+      all items in a single response. API servers older than Kubernetes 1.9 always return all items
+      in a single response.
+    default: 500
+    type: int
   password:
     description:
     - Provide a password for connecting to the API. Use in conjunction with I(username).
+  profile:
+    description:
+    - If set to C(True), the result includes I(timings), holding the time, in milliseconds, spent in each
+      phase of the module, such as C(argspec), C(set_client_config), C(get_object), C(compare), C(patch)
+      and C(to_dict), and the number of HTTP requests made and bytes transferred. Profiling can also be
+      enabled by setting the I(K8S_PROFILE) environment variable to C(true).
+    default: false
+    type: bool
+  propagation_policy:
+    description:
+    - With I(delete_collection), whether objects owned by the deleted objects are deleted in the background,
+      deleted before their owners, in the foreground, or orphaned. Defaults to the kind's own policy.
+    choices:
+    - Foreground
+    - Background
+    - Orphan
+  return_fields:
+    description:
+    - List of dotted or JSONPath style paths, such as C(metadata.name) or C(items[*].status.phase),
+      relative to the returned object. When provided, the returned object is trimmed to the requested
+      fields. Lists are traversed implicitly, so C(items.metadata.name) selects the name of every item.
+    type: list
+  return_request:
+    description:
+    - If set to C(False), the request body is not included in the result.
+    default: true
+    type: bool
+  since_resource_version:
+    description:
+    - With I(watch), watch from this resourceVersion, as returned in I(resource_version) by an earlier
+      call, rather than listing the objects first, so that only the changes since are transferred. If the
+      API server no longer holds the changes since that version, the objects are listed again, and
+      I(relisted) is returned as C(true).
   ssl_ca_cert:
     description:
     - Path to a CA certificate used to authenticate with the API.
     type: path
+  store:
+    description:
+    - Path to a file holding the list returned by an earlier run, along with its resourceVersion. When the
+      file was written for the same I(namespace), I(label_selector) and I(field_selector), the module
+      watches for the changes since, briefly, and applies them to the stored list, rather than listing
+      every object again. The objects are only listed in full when the API server no longer holds the
+      changes since, in which case I(relisted) is returned as C(true). The updated list is written back
+      to the file, and returned.
+    type: path
   username:
     description:
     - Provide a username for connecting to the API.
@@ -60,6 +132,30 @@ options:
     description:
     - Whether or not to verify the API server's SSL certificates.
     type: bool
+  wait:
+    description:
+    - With I(delete_collection), wait for the deleted objects to be gone, which, with finalizers or
+      the C(Foreground) policy, may take a while. Ignored in check mode.
+    default: false
+    type: bool
+  wait_timeout:
+    description:
+    - Number of seconds to wait.
+    default: 120
+    type: int
+  watch:
+    description:
+    - If set to C(True), list the objects, or, with I(since_resource_version), skip the list, then watch
+      them, with the same I(namespace), I(label_selector) and I(field_selector). The result holds
+      I(events), each with a I(type) of C(ADDED), C(MODIFIED) or C(DELETED), and the changed I(object),
+      and I(resource_version), the last resourceVersion seen, from which the next call can resume.
+    default: false
+    type: bool
+  watch_timeout:
+    description:
+    - Number of seconds to watch for, unless I(max_events) are received first.
+    default: 60
+    type: int
 requirements:
 - openshift == 0.3.1
 '''
@@ -0,0 +1,268 @@
+#
+#  Copyright 2017 Red Hat | Ansible
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = '''
+lookup: k8s_read
+short_description: Read Kubernetes and OpenShift objects on the controller
+description:
+- Reads objects with the OpenShift client helpers, in the controller process, rather than running a module on
+  a target. Returns an object by I(name), or the objects matching the selectors, as the modules return them.
+- Identical reads are memoized for the rest of the run of ansible-playbook, or for I(cache_ttl) seconds,
+  so that templates and tasks reading the same objects do not each make a request. Objects changed by the
+  play are not read again while memoized; set I(cache_ttl) to C(0) to always read them.
+- Each term may be a dict holding a query, with the options given as keywords applying to every query.
+  Several objects of the same kind, in the same namespace, are read with a single list request.
+requirements:
+- openshift >= 0.3
+options:
+  kind:
+    description: Kind of the objects, e.g. C(Pod) or C(DeploymentConfig).
+    required: true
+  api_version:
+    description: API version of the kind, e.g. C(v1) or C(apps/v1beta1).
+    default: v1
+  name:
+    description: Name of the object. If not provided, the objects matching the selectors are returned.
+  namespace:
+    description: Namespace of the objects. If not provided for a list, objects in all namespaces are returned.
+  label_selector:
+    description: Only return objects with labels matching the selector.
+  field_selector:
+    description: Only return objects with fields matching the selector.
+  cache_ttl:
+    description:
+    - Number of seconds reads are memoized for. If not provided, they are memoized for the rest of the run.
+      Set to C(0) to disable memoization.
+    type: int
+  batch:
+    description: Read several objects of the same kind and namespace with a single list request.
+    type: bool
+    default: true
+  host:
+    description: Provide a URL for accessing the Kubernetes API. Defaults to I(K8S_AUTH_HOST).
+  api_key:
+    description: Token used to connect to the API. Defaults to I(K8S_AUTH_API_KEY).
+  kubeconfig:
+    description: Path to an existing Kubernetes config file. Defaults to I(K8S_AUTH_KUBECONFIG).
+  context:
+    description: The name of a context found in the Kubernetes config file. Defaults to I(K8S_AUTH_CONTEXT).
+  username:
+    description: Provide a username for connecting to the API.
+  password:
+    description: Provide a password for connecting to the API.
+  cert_file:
+    description: Path to a certificate used to authenticate with the API.
+  key_file:
+    description: Path to a key file used to authenticate with the API.
+  ssl_ca_cert:
+    description: Path to a CA certificate used to authenticate with the API.
+  verify_ssl:
+    description: Whether or not to verify the API server's SSL certificates.
+    type: bool
+'''
+
+EXAMPLES = '''
+- name: Read a config map
+  debug:
+    msg: "{{ lookup('k8s_read', kind='ConfigMap', namespace='hello', name='settings') }}"
+
+- name: Read the pods of an application
+  debug:
+    msg: "{{ query('k8s_read', kind='Pod', namespace='hello', label_selector='app=hello') }}"
+
+- name: Read several services with one request
+  debug:
+    msg: "{{ query('k8s_read', {'name': 'web'}, {'name': 'db'}, kind='Service', namespace='hello') }}"
+'''
+
+RETURN = '''
+_list:
+  description: The object read by name, or the objects matching the selectors, as dicts
+  type: list
+'''
+
+import multiprocessing
+import os
+
+from ansible.errors import AnsibleError
+from ansible.plugins.lookup import LookupBase
+
+# Plugins are not packaged like modules, so import module_utils from this role, ahead of any copy in Ansible
+import ansible.module_utils
+MODULE_UTILS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'module_utils')
+if MODULE_UTILS not in ansible.module_utils.__path__:
+    ansible.module_utils.__path__.insert(0, MODULE_UTILS)
+
+from ansible.module_utils import k8s_common
+from ansible.module_utils.k8s_batch import AUTH_ARG_SPEC
+from ansible.module_utils.k8s_cache import CredentialCache, LookupCache, marshal_safe
+from ansible.module_utils.k8s_common import (HAS_K8S_MODULE_HELPER, KubernetesAnsibleFailure, KubernetesAnsibleModule,
+                                             api_client_class, import_client, kind_to_snake, list_objects,
+                                             set_client_config, share_client)
+from ansible.module_utils.openshift_common import OpenShiftAnsibleModule
+
+QUERY_OPTIONS = ('api_version', 'kind', 'name', 'namespace', 'label_selector', 'field_selector')
+
+# Fewest objects of a kind and namespace read with a single list request rather than one request each
+BATCH_MIN_NAMES = 2
+
+
+def playbook_pid():
+    """
+    The pid of the process running the playbook. Lookups are templated both by that process, for play and task
+    arguments, and by the worker processes it forks to execute tasks, whose parent it is.
+    """
+    if multiprocessing.current_process().name == 'MainProcess':
+        return os.getpid()
+    return os.getppid()
+
+
+class LookupModule(LookupBase):
+
+    def run(self, terms, variables=None, **kwargs):
+        if not HAS_K8S_MODULE_HELPER:
+            raise AnsibleError("This lookup requires the OpenShift Python client. Try `pip install openshift`")
+
+        auth_options = {}
+        for key in AUTH_ARG_SPEC:
+            value = kwargs.get(key, os.environ.get('K8S_AUTH_{}'.format(key.upper())))
+            if value is not None:
+                auth_options[key] = value
+        self.auth_options = auth_options
+        self.api_client = None
+        self.api_clients = {}
+        self.helpers = {}
+
+        defaults = dict((key, kwargs.get(key)) for key in QUERY_OPTIONS)
+        defaults['api_version'] = defaults['api_version'] or 'v1'
+        queries = []
+        for term in terms or [{}]:
+            if not isinstance(term, dict):
+                raise AnsibleError("k8s_read terms must be dicts, holding {}".format(', '.join(QUERY_OPTIONS)))
+            query = dict(defaults)
+            query.update((key, value) for key, value in term.items() if key in QUERY_OPTIONS)
+            if not query['kind']:
+                raise AnsibleError("k8s_read requires a kind")
+            queries.append(tuple(query[key] for key in QUERY_OPTIONS))
+
+        # Memoize for the run of ansible-playbook
+        ttl = kwargs.get('cache_ttl')
+        cache = LookupCache(playbook_pid(), int(ttl) if ttl is not None else None)
+        cache.prune()
+        identity = [(variables or {}).get('ansible_play_name'),
+                    sorted((key, str(value)) for key, value in auth_options.items())]
+        results = {}
+        missing = []
+        for query in set(queries):
+            hit, value = cache.load(identity + [query])
+            if hit:
+                results[query] = value
+            else:
+                missing.append(query)
+
+        try:
+            # Dates are returned as strings, as they are read from the cache
+            results.update(marshal_safe(self.read(missing, kwargs.get('batch', True))))
+        except KubernetesAnsibleFailure as exc:
+            raise AnsibleError('{}: {}'.format(exc.msg, exc.kwargs.get('error', '')))
+        for query in missing:
+            cache.store(identity + [query], results[query])
+
+        objects = []
+        for query in queries:
+            if query[2]:
+                if results[query] is not None:
+                    objects.append(results[query])
+            else:
+                objects.extend(results[query])
+        return objects
+
+    def read(self, queries, batch=True):
+        """
+        Read each query's object, or, for queries without a name, the list of matching objects. Names of the same
+        kind and namespace are read with one list request, when batch is set.
+
+        :return: dict: the object, or None, or the list of items, for each query
+        """
+        results = {}
+        by_namespace = {}
+        for query in queries:
+            api_version, kind, name, namespace, label_selector, field_selector = query
+            if name and not (label_selector or field_selector):
+                by_namespace.setdefault((api_version, kind, namespace), []).append(query)
+                continue
+            selectors = dict((key, value) for key, value in (('label_selector', label_selector),
+                                                             ('field_selector', field_selector)) if value)
+            items = list_objects(self.get_helper(api_version, kind + '_list'), namespace, selectors)['items']
+            if name:
+                items = [item for item in items if (item.get('metadata') or {}).get('name') == name]
+                results[query] = items[0] if items else None
+            else:
+                results[query] = items
+
+        for (api_version, kind, namespace), named in by_namespace.items():
+            if batch and len(named) >= BATCH_MIN_NAMES:
+                helper = self.get_helper(api_version, kind + '_list')
+                items = dict(((item.get('metadata') or {}).get('name'), item)
+                             for item in list_objects(helper, namespace)['items'])
+                for query in named:
+                    results[query] = items.get(query[2])
+                continue
+            helper = self.get_helper(api_version, kind)
+            for query in named:
+                k8s_obj = self.get_object(helper, query[2], namespace)
+                results[query] = k8s_obj.to_dict() if k8s_obj is not None else None
+        return results
+
+    @staticmethod
+    def get_object(helper, name, namespace):
+        try:
+            return helper.get_object(name, namespace)
+        except k8s_common.KubernetesException as exc:
+            raise KubernetesAnsibleFailure('Failed to retrieve requested object: {}'.format(exc.message),
+                                           error=exc.value.get('status'))
+
+    def get_helper(self, api_version, kind):
+        """ Return a helper for the kind, sharing one configured client, and its connection pool, across kinds """
+        api_version = api_version.split('/')[-1].capitalize()
+        kind = kind_to_snake(kind)
+        key = (api_version, kind)
+        if key in self.helpers:
+            return self.helpers[key]
+        import_client()
+        helper = None
+        errors = []
+        for module_class in (KubernetesAnsibleModule, OpenShiftAnsibleModule):
+            try:
+                helper = module_class.get_helper(api_version, kind)
+                break
+            except Exception as exc:
+                errors.append(str(exc))
+        if helper is None:
+            raise KubernetesAnsibleFailure("Unsupported resource {} {}".format(api_version, kind),
+                                           error='; '.join(errors))
+        if self.api_client is None:
+            set_client_config(helper, self.auth_options, CredentialCache(self.auth_options))
+            self.api_client = helper.api_client
+        else:
+            helper.api_client = share_client(self.api_client, api_client_class(helper), self.api_clients)
+        self.helpers[key] = helper
+        return helper
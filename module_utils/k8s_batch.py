@@ -0,0 +1,180 @@
+#
+#  Copyright 2017 Red Hat | Ansible
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+
+import copy
+import threading
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.k8s_cache import CredentialCache, env_enabled
+from ansible.module_utils.k8s_common import (APPLY_STRATEGIES, DEFAULT_FIELD_MANAGER, DEFAULT_WAIT_TIMEOUT,
+                                             HAS_K8S_MODULE_HELPER, KubernetesAnsibleException,
+                                             KubernetesAnsibleFailure, KubernetesAnsibleModule, Snapshot,
+                                             api_client_class, import_client, set_client_config,
+                                             set_offline_client, share_client)
+from ansible.module_utils.k8s_profile import PROFILE_ENV, Profiler
+from ansible.module_utils.openshift_common import OpenShiftAnsibleModule
+
+AUTH_ARG_SPEC = {
+    'api_key': {'no_log': True},
+    'cert_file': {'type': 'path'},
+    'context': {},
+    'host': {},
+    'key_file': {'type': 'path'},
+    'kubeconfig': {'type': 'path'},
+    'password': {'no_log': True},
+    'ssl_ca_cert': {'type': 'path'},
+    'username': {},
+    'verify_ssl': {'type': 'bool'},
+}
+
+
+class KubernetesBatchModule(KubernetesAnsibleModule):
+    """
+    Applies a list of resource definitions, of any kind, in a single module invocation. Each definition is handled
+    by the create, patch, replace and delete logic of KubernetesAnsibleModule, and every kind shares one
+    configured API client. With parallelism greater than 1, definitions are applied by a bounded pool of threads.
+    """
+
+    def __init__(self):
+        self.api_version = None
+        self.kind = None
+        self.argspec_cache = None
+        self.helper = None
+        self.helpers = {}
+        self.helpers_lock = threading.Lock()
+        self.api_client = None
+        self.api_clients = {}
+        self.credential_cache = None
+        self.snapshot = None
+        self.profiler = Profiler(enabled=env_enabled(PROFILE_ENV, default=False))
+
+        if not HAS_K8S_MODULE_HELPER:
+            raise KubernetesAnsibleException(
+                "This module requires the OpenShift Python client. Try `pip install openshift`"
+            )
+
+        with self.profiler.phase('argspec'):
+            AnsibleModule.__init__(self,
+                                   argument_spec=self.argspec,
+                                   supports_check_mode=True,
+                                   mutually_exclusive=[('resources', 'src')],
+                                   required_one_of=[('resources', 'src')])
+        if self.params.get('profile'):
+            self.profiler.enabled = True
+
+    @property
+    def argspec(self):
+        if not self.argspec_cache:
+            spec = {
+                'resources': {'type': 'list'},
+                'src': {'type': 'path'},
+                'state': {'default': 'present', 'choices': ['present', 'absent']},
+                'force': {'type': 'bool', 'default': False},
+                'namespace': {},
+                'debug': {'type': 'bool', 'default': False},
+                'dry_run': {'type': 'bool', 'default': False},
+                'return_fields': {'type': 'list'},
+                'return_request': {'type': 'bool', 'default': True},
+                'profile': {'type': 'bool', 'default': False},
+                'parallelism': {'type': 'int', 'default': 1},
+                'retries': {'type': 'int', 'default': 5},
+                'apply_strategy': {'default': 'patch', 'choices': APPLY_STRATEGIES},
+                'field_manager': {'default': DEFAULT_FIELD_MANAGER},
+                'wait': {'type': 'bool', 'default': False},
+                'wait_condition': {'type': 'dict'},
+                'wait_timeout': {'type': 'int', 'default': DEFAULT_WAIT_TIMEOUT},
+                'offline_check': {'type': 'path'},
+            }
+            spec.update(copy.deepcopy(AUTH_ARG_SPEC))
+            self.argspec_cache = spec
+        return self.argspec_cache
+
+    def execute_module(self):
+        """
+        Applies each resource definition, from resources or src, in order. Ends by calling
+        AnsibleModule.exit_json() with a dict containing:
+          changed: True, if any resource changed
+          results: a list with a result for each resource definition
+        or AnsibleModule.fail_json(), with the same dict, if any resource failed.
+        :return: None
+        """
+        dry_run = self.params.pop('dry_run', False)
+        if self.check_mode and self.params.get('offline_check'):
+            try:
+                self.snapshot = Snapshot(self.params['offline_check'])
+            except KubernetesAnsibleFailure as exc:
+                self.fail_json(msg=exc.msg, **exc.kwargs)
+        if self.params.get('src'):
+            definitions = self.load_resource_definitions(self.params['src'])
+        else:
+            definitions = self.params['resources']
+        self.apply_definitions(definitions, dry_run=dry_run)
+
+    def get_kind_helper(self, api_version, kind):
+        """ Return the helper for a definition's kind, creating and configuring it on first use """
+        with self.helpers_lock:
+            return self._get_kind_helper(api_version, kind)
+
+    def _get_kind_helper(self, api_version, kind):
+        key = (api_version, kind)
+        if key in self.helpers:
+            return self.helpers[key]
+
+        with self.profiler.phase('import'):
+            import_client()
+        helper = None
+        errors = []
+        for module_class in (KubernetesAnsibleModule, OpenShiftAnsibleModule):
+            try:
+                helper = module_class.get_helper(api_version, kind)
+                break
+            except Exception as exc:
+                errors.append(str(exc))
+        if helper is None:
+            raise KubernetesAnsibleFailure("Unsupported resource {} {}".format(api_version, kind),
+                                           error='; '.join(errors))
+        if self.params.get('debug'):
+            helper.enable_debug(reset_logfile=False)
+
+        if self.api_client is None and self.snapshot is not None:
+            set_offline_client(helper)
+            self.api_client = helper.api_client
+        elif self.api_client is None:
+            auth_options = dict((key, self.params[key]) for key in AUTH_ARG_SPEC if self.params.get(key) is not None)
+            self.credential_cache = CredentialCache(auth_options)
+            with self.profiler.phase('set_client_config'):
+                set_client_config(helper, auth_options, self.credential_cache)
+            self.api_client = getattr(helper, 'api_client', None)
+            self.size_connection_pool()
+            self.profiler.attach(self.api_client)
+        else:
+            # Share one configured client, and its connection pool, across kinds
+            helper.api_client = share_client(self.api_client, api_client_class(helper), self.api_clients)
+        self.helpers[key] = helper
+        return helper
+
+    def size_connection_pool(self):
+        """
+        Let the shared client keep a connection per worker thread. The pool manager applies connection_pool_kw
+        to the pools it creates, so this has to happen before the first request.
+        """
+        pool_manager = getattr(getattr(self.api_client, 'rest_client', None), 'pool_manager', None)
+        parallelism = self.params.get('parallelism') or 1
+        if pool_manager is not None and parallelism > 1:
+            maxsize = pool_manager.connection_pool_kw.get('maxsize') or 1
+            pool_manager.connection_pool_kw['maxsize'] = max(maxsize, parallelism)
@@ -0,0 +1,390 @@
+#
+#  Copyright 2017 Red Hat | Ansible
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+
+import datetime
+import errno
+import hashlib
+import marshal
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from ansible.module_utils.k8s_lazy import package_directory
+from ansible.module_utils.six import binary_type, text_type
+
+CACHE_DIR_ENV = 'K8S_CACHE_DIR'
+DEFAULT_CACHE_DIR = '~/.ansible/k8s_cache'
+ARGSPEC_CACHE_ENV = 'K8S_ARGSPEC_CACHE'
+MANIFEST_CACHE_ENV = 'K8S_MANIFEST_CACHE'
+CREDENTIAL_CACHE_ENV = 'K8S_CREDENTIAL_CACHE'
+CREDENTIAL_CACHE_TTL_ENV = 'K8S_CREDENTIAL_CACHE_TTL'
+DEFAULT_CREDENTIAL_CACHE_TTL = 600
+
+
+# Assignment of the version in a package's __init__
+VERSION_ASSIGNMENT = re.compile(r"""^__version__ = ['"]([^'"]+)['"]""", re.MULTILINE)
+
+
+def client_version():
+    """
+    The version of the installed OpenShift client, or None, if it is not installed. Read from the distribution
+    metadata, or from the package's __init__, as importing the package imports every generated client class.
+    """
+    try:
+        from importlib.metadata import PackageNotFoundError, version
+    except ImportError:
+        pass
+    else:
+        try:
+            return version('openshift')
+        except PackageNotFoundError:
+            pass
+    directory = package_directory('openshift')
+    if directory is None:
+        return None
+    try:
+        with open(os.path.join(directory, '__init__.py')) as f:
+            match = VERSION_ASSIGNMENT.search(f.read())
+    except IOError:
+        return None
+    return match.group(1) if match else None
+
+
+CLIENT_VERSION = client_version()
+
+
+def cache_dir(*parts):
+    """ Path to a directory under the cache root, which defaults to ~/.ansible/k8s_cache """
+    root = os.environ.get(CACHE_DIR_ENV) or DEFAULT_CACHE_DIR
+    return os.path.join(os.path.expanduser(root), *parts)
+
+
+def cache_key(*parts):
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+
+
+def python_version():
+    return list(sys.version_info[:2])
+
+
+def env_enabled(name, default=True):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.lower() not in ('0', 'false', 'no', 'off')
+
+
+def read_marshal(path, key):
+    """
+    Load a value written by write_marshal, if it was stored under the same key.
+
+    :return: the value, or None on a miss
+    """
+    try:
+        with open(path, 'rb') as f:
+            entry = marshal.load(f)
+    except (IOError, OSError, EOFError, ValueError, TypeError):
+        return None
+    if not isinstance(entry, dict) or entry.get('key') != key:
+        return None
+    return entry.get('value')
+
+
+def write_marshal(path, key, value):
+    """
+    Atomically store a value, along with the key it is valid for. Failures are ignored, as the cache is only an
+    optimization.
+
+    :return: bool: True, if the value was stored
+    """
+    directory = os.path.dirname(path)
+    try:
+        if not os.path.isdir(directory):
+            os.makedirs(directory, 0o700)
+        fd, tmp_path = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                marshal.dump(dict(key=key, value=value), f)
+            os.rename(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+    except (IOError, OSError, ValueError):
+        return False
+    return True
+
+
+class ArgspecCache(object):
+    """
+    Stores module argument specs on disk, keyed by helper class, API version, kind, and the versions of the
+    OpenShift client and Python interpreter. Upgrading the client invalidates every entry.
+    """
+
+    def __init__(self, helper_class, api_version, kind):
+        self.key = (helper_class, api_version, kind, CLIENT_VERSION, tuple(python_version()))
+        self.path = os.path.join(cache_dir('argspec'), '{}.marshal'.format(cache_key(*self.key)))
+        self.enabled = CLIENT_VERSION is not None and env_enabled(ARGSPEC_CACHE_ENV)
+
+    def load(self):
+        if not self.enabled:
+            return None
+        return read_marshal(self.path, list(self.key))
+
+    def store(self, value):
+        if self.enabled:
+            write_marshal(self.path, list(self.key), value)
+
+
+class ManifestCache(object):
+    """
+    Stores the documents parsed from a manifest file, and the module parameters each of them maps to, keyed by the
+    file's path, mtime, size and content hash. Disabled unless K8S_MANIFEST_CACHE is set, as manifests may hold
+    secrets.
+    """
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        self.cache_path = os.path.join(cache_dir('manifest'), '{}.marshal'.format(cache_key(self.path)))
+        self.enabled = CLIENT_VERSION is not None and env_enabled(MANIFEST_CACHE_ENV, default=False)
+        self.key = None
+        self.content = None
+        self.documents = None
+        self.parameters = {}
+        self.lock = threading.Lock()
+
+    def load(self):
+        """
+        Read the file, and look up the entry stored for its current content.
+
+        :return: list: the cached documents, or None on a miss, in which case content holds the file's bytes
+        """
+        with open(self.path, 'rb') as f:
+            content = f.read()
+            stat = os.fstat(f.fileno())
+        self.key = [self.path, stat.st_mtime, stat.st_size, hashlib.sha1(content).hexdigest(), CLIENT_VERSION,
+                    python_version()]
+        entry = read_marshal(self.cache_path, self.key)
+        if not isinstance(entry, dict) or not isinstance(entry.get('documents'), list):
+            self.content = content
+            return None
+        self.documents = entry['documents']
+        self.parameters = entry.get('parameters') or {}
+        return self.documents
+
+    def store(self, documents):
+        self.content = None
+        self.documents = documents
+        self.parameters = {}
+        self._write()
+
+    def get_parameters(self, index, helper_key):
+        """ :return: dict: the parameters stored for a document and helper, or None """
+        entry = self.parameters.get(index)
+        if entry and entry[0] == helper_key:
+            return entry[1]
+        return None
+
+    def set_parameters(self, index, helper_key, parameters):
+        """ Record a document's parameters. The entry is written once every document has them. """
+        with self.lock:
+            self.parameters[index] = (helper_key, parameters)
+            if len(self.parameters) == len(self.documents):
+                self._write()
+
+    def _write(self):
+        write_marshal(self.cache_path, self.key, dict(documents=self.documents, parameters=self.parameters))
+
+
+class CredentialCache(object):
+    """
+    Stores the client configuration resolved from a kubeconfig file, such as the host, bearer token and CA bundle,
+    keyed by the file's path and mtime, the context, and the other authentication options. Entries expire, so
+    that tokens obtained from exec plugins or OAuth are refreshed. Disabled unless K8S_CREDENTIAL_CACHE is set, as
+    entries hold credentials.
+    """
+
+    def __init__(self, auth_options):
+        options = dict((key, value) for key, value in auth_options.items() if value is not None)
+        for key, value in os.environ.items():
+            if key.startswith('K8S_AUTH_'):
+                options.setdefault(key[len('K8S_AUTH_'):].lower(), value)
+        self.kubeconfig = os.path.expanduser(options.get('kubeconfig') or
+                                             os.environ.get('KUBECONFIG', '~/.kube/config'))
+        identity = (self.kubeconfig, options.get('context'),
+                    tuple(sorted((key, str(value)) for key, value in options.items())))
+        self.path = os.path.join(cache_dir('credentials'), '{}.marshal'.format(cache_key(*identity)))
+        self.enabled = CLIENT_VERSION is not None and env_enabled(CREDENTIAL_CACHE_ENV, default=False) and \
+            os.path.isfile(self.kubeconfig)
+        if self.enabled:
+            self.key = list(identity[:2]) + [os.path.getmtime(self.kubeconfig), CLIENT_VERSION, python_version()]
+            self.key.append([list(option) for option in identity[2]])
+
+    def load(self):
+        """
+        :return: dict: the configuration attributes, with files, such as the CA bundle, restored under the cache
+                 directory, or None if there is no valid entry
+        """
+        if not self.enabled:
+            return None
+        entry = read_marshal(self.path, self.key)
+        if not isinstance(entry, dict) or entry.get('expiry', 0) <= time.time():
+            return None
+        config = dict(entry['config'])
+        for attribute, content in entry.get('files', {}).items():
+            path = self._restore_file(content)
+            if path is None:
+                return None
+            config[attribute] = path
+        return config
+
+    def store(self, config, files, expiry=None):
+        """
+        Store configuration attributes, and the content of the files they refer to, which may be temporary files
+        removed when the process exits.
+        """
+        if not self.enabled:
+            return
+        ttl = os.environ.get(CREDENTIAL_CACHE_TTL_ENV)
+        ttl = int(ttl) if ttl and ttl.isdigit() else DEFAULT_CREDENTIAL_CACHE_TTL
+        now = time.time()
+        expiry = min(expiry, now + ttl) if expiry else now + ttl
+        write_marshal(self.path, self.key, dict(config=config, files=files, expiry=expiry))
+
+    def invalidate(self):
+        if self.enabled:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+    def _restore_file(self, content):
+        path = os.path.join(cache_dir('credentials'), '{}.pem'.format(hashlib.sha1(content).hexdigest()))
+        if os.path.isfile(path):
+            return path
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            os.rename(tmp_path, path)
+        except (IOError, OSError):
+            return None
+        return path
+
+
+def marshal_safe(value):
+    """ Copy of value holding only types marshal can store, with dates in the ISO format Ansible returns them in """
+    if isinstance(value, dict):
+        return dict((builtin_string(key), marshal_safe(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return [marshal_safe(item) for item in value]
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return builtin_string(value)
+
+
+def builtin_string(value):
+    """ marshal refuses subclasses of the built-in types, such as the strings Ansible templates, so copy them """
+    for base in (text_type, binary_type):
+        if isinstance(value, base) and type(value) is not base:
+            return base(value)
+    return value
+
+
+class ListStore(object):
+    """
+    Stores the result of a list module, and the resourceVersion it is current at, in a file chosen by the user, so
+    that later runs can bring it up to date with a watch rather than listing every object again. Entries are keyed
+    by the query, so a file written for different selectors, or by another client version, is ignored.
+    """
+
+    def __init__(self, path, helper_class, api_version, kind, namespace, label_selector, field_selector):
+        self.path = os.path.abspath(os.path.expanduser(path))
+        self.key = [helper_class, api_version, kind, namespace, label_selector, field_selector, CLIENT_VERSION,
+                    python_version()]
+
+    def load(self):
+        """ :return: tuple: (the stored list, its resourceVersion), or (None, None) on a miss """
+        entry = read_marshal(self.path, self.key)
+        if not isinstance(entry, dict) or not entry.get('resource_version'):
+            return None, None
+        return entry['list'], entry['resource_version']
+
+    def store(self, result, resource_version):
+        """ :return: the list, as stored """
+        result = marshal_safe(result)
+        if resource_version:
+            write_marshal(self.path, self.key, dict(list=result, resource_version=resource_version))
+        return result
+
+
+class LookupCache(object):
+    """
+    Memoizes the reads of the k8s_read lookup plugin for one run of ansible-playbook. Lookups are executed by
+    worker processes forked for each task, so entries are kept on disk, in a directory named after the process
+    running the playbook, which later runs remove once that process has exited. Entries expire after ttl seconds,
+    or last for the whole run when ttl is None.
+    """
+
+    def __init__(self, run_id, ttl=None):
+        self.run_id = run_id
+        self.directory = cache_dir('lookup', str(run_id))
+        self.ttl = ttl
+        self.enabled = ttl is None or ttl > 0
+
+    def load(self, key):
+        """ :return: tuple: (True, the value) on a hit, or (False, None) """
+        if not self.enabled:
+            return False, None
+        key = marshal_safe(key)
+        entry = read_marshal(self._path(key), key)
+        if not isinstance(entry, dict) or (entry['expiry'] is not None and entry['expiry'] <= time.time()):
+            return False, None
+        return True, entry['value']
+
+    def store(self, key, value):
+        if self.enabled:
+            key = marshal_safe(key)
+            expiry = time.time() + self.ttl if self.ttl is not None else None
+            write_marshal(self._path(key), key, dict(expiry=expiry, value=marshal_safe(value)))
+
+    def prune(self):
+        """ Remove the entries of runs whose process has exited """
+        root = cache_dir('lookup')
+        try:
+            names = os.listdir(root)
+        except OSError:
+            return
+        for name in names:
+            if name.isdigit() and int(name) != self.run_id and not process_exists(int(name)):
+                shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, '{}.marshal'.format(cache_key(*key)))
+
+
+def process_exists(pid):
+    try:
+        os.kill(pid, 0)
+    except OSError as exc:
+        # EPERM means the process exists, but belongs to another user
+        return exc.errno == errno.EPERM
+    return True
@@ -16,45 +16,755 @@
 # You should have received a copy of the GNU General Public License
 # along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
 
+import base64
+import calendar
 import copy
+import hashlib
+import importlib
+import itertools
 import json
+import math
 import os
+import random
+import re
+import sys
+import threading
+import time
+import traceback
+
+from email.utils import mktime_tz, parsedate_tz
+
+from multiprocessing.pool import ThreadPool
 
 from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.k8s_cache import ArgspecCache, CredentialCache, ListStore, ManifestCache, env_enabled
+from ansible.module_utils.k8s_lazy import LAZY_CLIENT_ENV, install_lazy_client, module_available
+from ansible.module_utils.k8s_profile import PROFILE_ENV, Profiler, monotonic
+from ansible.module_utils.k8s_worker import (WORKER_SOCKET_ENV, KubernetesWorkerRequestFailed, request_timeout,
+                                             worker_environ, worker_request)
 
 try:
-    from openshift.helper.ansible import KubernetesAnsibleModuleHelper, ARG_ATTRIBUTES_BLACKLIST
+    from ansible.module_utils.basic import _load_params
+    HAS_LOAD_PARAMS = True
+except ImportError:
+    HAS_LOAD_PARAMS = False
+
+
+class ClientNotImported(Exception):
+    """ Stands in for the client's exception classes until import_client() has run, and is never raised """
+
+
+# Bound by import_client(). Importing the client loads every generated model and API class, which dominates the
+# start up time of a module, so it is deferred until a module actually needs it.
+KubernetesAnsibleModuleHelper = None
+ARG_ATTRIBUTES_BLACKLIST = ()
+KubernetesException = ClientNotImported
+ApiException = ClientNotImported
+MaxRetryError = ClientNotImported
+kubernetes_client = None
+watch = None
+
+HAS_K8S_MODULE_HELPER = module_available('openshift') and module_available('kubernetes')
+
+
+def import_client():
+    """
+    Import the OpenShift and Kubernetes clients, on first use. With K8S_LAZY_CLIENT set, the generated client
+    packages are replaced by stand-ins which only import the model and API classes that are actually used.
+    """
+    global KubernetesAnsibleModuleHelper, ARG_ATTRIBUTES_BLACKLIST, KubernetesException, ApiException
+    global MaxRetryError, kubernetes_client, watch
+    if KubernetesAnsibleModuleHelper is not None:
+        return
+    if env_enabled(LAZY_CLIENT_ENV, default=False):
+        install_lazy_client()
     from openshift.helper.exceptions import KubernetesException
-    HAS_K8S_MODULE_HELPER = True
-except ImportError as exc:
-    HAS_K8S_MODULE_HELPER = False
+    from kubernetes.client.rest import ApiException
+    from urllib3.exceptions import MaxRetryError
+    from kubernetes import client as kubernetes_client, watch
+    # Bound last, as it marks the import as complete
+    from openshift.helper.ansible import KubernetesAnsibleModuleHelper, ARG_ATTRIBUTES_BLACKLIST
+
 
 try:
     import yaml
+    # Prefer the LibYAML based loader, which parses large manifests many times faster
+    YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
     HAS_YAML = True
 except ImportError:
     HAS_YAML = False
 
 
+DEFAULT_PAGE_SIZE = 500
+
+# Options the module adds to the argument spec built from the helper. The helper rejects any parameter missing from
+# its own argspec, so KubernetesAnsibleModule.helper_params() removes these before params are handed to it. Those
+# the helper also has, such as the namespace of a namespaced kind, are passed on.
+MODULE_OPTIONS = (
+    'apply_strategy',
+    'delete_collection',
+    'dry_run',
+    'field_manager',
+    'field_selector',
+    'label_selector',
+    'max_events',
+    'namespace',
+    'offline_check',
+    'page_size',
+    'parallelism',
+    'profile',
+    'propagation_policy',
+    'return_fields',
+    'return_request',
+    'retries',
+    'since_resource_version',
+    'store',
+    'wait',
+    'wait_condition',
+    'wait_timeout',
+    'watch',
+    'watch_timeout',
+)
+
+MANIFEST_EXTENSIONS = ('.yml', '.yaml', '.json')
+
+APPLY_STRATEGIES = ['patch', 'json_patch', 'server']
+DEFAULT_FIELD_MANAGER = 'ansible'
+APPLY_PATCH_CONTENT_TYPE = 'application/apply-patch+yaml'
+
+DEFAULT_WAIT_TIMEOUT = 120
+DEFAULT_WATCH_TIMEOUT = 60
+
+# Seconds spent watching for the changes since a stored list was written. The server sends them as soon as the
+# watch opens, so this is only the time allowed for them to arrive.
+STORE_SYNC_TIMEOUT = 1
+
+PROPAGATION_POLICIES = ['Foreground', 'Background', 'Orphan']
+
+# Phases of pods, builds, namespaces and claims that end a wait
+READY_PHASES = ('Active', 'Bound', 'Complete', 'Running', 'Succeeded')
+FAILED_PHASES = ('Cancelled', 'Error', 'Failed')
+
+# Client configuration attributes kept by the credential cache, and those naming files
+CLIENT_CONFIG_ATTRIBUTES = ('host', 'api_key', 'api_key_prefix', 'username', 'password', 'verify_ssl',
+                            'ssl_ca_cert', 'cert_file', 'key_file')
+CLIENT_CONFIG_FILES = ('ssl_ca_cert', 'cert_file', 'key_file')
+
+# Seconds before a token's expiry at which a cached token is no longer used
+TOKEN_EXPIRY_MARGIN = 60
+
+# Exponential backoff, in seconds, applied when the API server is overloaded or failing
+RETRY_BACKOFF_BASE = 0.5
+RETRY_BACKOFF_MAX = 30
+
+# Packages holding the generated model classes, and the swagger types that are not models
+MODEL_PACKAGES = ('openshift.client', 'kubernetes.client')
+PRIMITIVE_TYPES = ('bool', 'date', 'datetime', 'float', 'int', 'long', 'object', 'str')
+
+# Matches one step of a return_fields path: ['key'], ["key"], [*], [0], or a plain key
+FIELD_PATH_TOKEN = re.compile(r"""\[\s*'([^']*)'\s*\]|\[\s*"([^"]*)"\s*\]|\[\s*(\*|-?\d+)\s*\]|([^.\[\]]+)""")
+
+
+class ManifestDocument(dict):
+    """ A document read through the manifest cache, which remembers where it came from """
+
+    def __init__(self, document, manifest, index):
+        dict.__init__(self, document)
+        self.manifest = manifest
+        self.index = index
+
+
 class KubernetesAnsibleException(Exception):
     pass
 
 
+class KubernetesAnsibleFailure(KubernetesAnsibleException):
+    """ Raised when an operation fails. Carries the arguments for AnsibleModule.fail_json() """
+
+    def __init__(self, msg, **kwargs):
+        super(KubernetesAnsibleFailure, self).__init__(msg)
+        self.msg = msg
+        self.kwargs = kwargs
+
+
+def parse_field_path(path):
+    """
+    Split a dotted or JSONPath style path, such as metadata.name, items[*].status.phase or
+    $.metadata.labels['app'], into a list of keys and list indexes. '*' selects every list item.
+    """
+    path = path.strip()
+    if path.startswith('$'):
+        path = path[1:]
+    tokens = []
+    for quoted, double_quoted, index, key in FIELD_PATH_TOKEN.findall(path):
+        if index:
+            tokens.append(index if index == '*' else int(index))
+        else:
+            tokens.append(quoted or double_quoted or key)
+    return tokens
+
+
+def _project(value, tokens):
+    if not tokens:
+        return value
+    token, rest = tokens[0], tokens[1:]
+    if isinstance(value, list):
+        if isinstance(token, int):
+            if -len(value) <= token < len(value):
+                return [_project(value[token], rest)]
+            return []
+        # Lists are traversed implicitly, so items.metadata.name is the same as items[*].metadata.name
+        if token == '*':
+            return [_project(item, rest) for item in value]
+        return [_project(item, tokens) for item in value]
+    if isinstance(value, dict) and token in value:
+        return {token: _project(value[token], rest)}
+    return {}
+
+
+def _merge_projections(first, second):
+    if isinstance(first, dict) and isinstance(second, dict):
+        merged = dict(first)
+        for key, value in second.items():
+            merged[key] = _merge_projections(merged[key], value) if key in merged else value
+        return merged
+    if isinstance(first, list) and isinstance(second, list) and len(first) == len(second):
+        return [_merge_projections(a, b) for a, b in zip(first, second)]
+    return second
+
+
+def project_fields(obj, paths):
+    """
+    Trim obj to the fields selected by paths, keeping the structure of the original object.
+
+    :return: dict: containing only the requested fields
+    """
+    result = {}
+    for path in paths:
+        result = _merge_projections(result, _project(obj, parse_field_path(path)))
+    return result
+
+
+def projects_per_item(paths):
+    """
+    Whether every path selects the same fields from each list item, so that a list can be trimmed one page at a
+    time. A path indexing the list's items, such as items[0], depends on the whole list.
+    """
+    for path in paths:
+        tokens = parse_field_path(path)
+        if len(tokens) > 1 and tokens[0] == 'items' and isinstance(tokens[1], int):
+            return False
+    return True
+
+
+def _escape_pointer(key):
+    return key.replace('~', '~0').replace('/', '~1')
+
+
+def json_patch(source, target, path=''):
+    """
+    Build the RFC 6902 JSON Patch operations that turn source into target. Dicts, and lists of the same length, are
+    compared member by member, so only the paths that differ are included. Other values are replaced whole.
+
+    :return: list: of operations
+    """
+    if isinstance(source, dict) and isinstance(target, dict):
+        operations = []
+        for key in sorted(source):
+            if key not in target:
+                operations.append(dict(op='remove', path=path + '/' + _escape_pointer(key)))
+        for key in sorted(target):
+            child_path = path + '/' + _escape_pointer(key)
+            if key not in source:
+                operations.append(dict(op='add', path=child_path, value=target[key]))
+            else:
+                operations.extend(json_patch(source[key], target[key], child_path))
+        return operations
+    if isinstance(source, list) and isinstance(target, list) and len(source) == len(target):
+        operations = []
+        for index, (source_item, target_item) in enumerate(zip(source, target)):
+            operations.extend(json_patch(source_item, target_item, '{}/{}'.format(path, index)))
+        return operations
+    if source != target:
+        return [dict(op='replace', path=path, value=target)]
+    return []
+
+
+def project_onto(value, shape):
+    """
+    Trim value to the keys present in shape, recursively. Lists are projected item by item, and only when both have
+    the same length, so that a list with extra or missing items never matches.
+    """
+    if isinstance(value, dict) and isinstance(shape, dict):
+        return dict((key, project_onto(value[key], shape[key])) for key in shape if key in value)
+    if isinstance(value, list) and isinstance(shape, list) and len(value) == len(shape):
+        return [project_onto(item, item_shape) for item, item_shape in zip(value, shape)]
+    return value
+
+
+def structural_hash(value):
+    """ Hash of the canonical JSON form of a value, which is the same for equal values regardless of key order """
+    return hashlib.sha1(json.dumps(value, sort_keys=True, separators=(',', ':')).encode('utf-8')).hexdigest()
+
+
+def condition_met(obj, condition):
+    """ True if the object's status holds a condition matching the type, status and, optionally, reason given """
+    for entry in (obj.get('status') or {}).get('conditions') or []:
+        if entry.get('type') == condition.get('type') and \
+                str(entry.get('status')) == str(condition.get('status') or 'True') and \
+                (not condition.get('reason') or entry.get('reason') == condition['reason']):
+            return True
+    return False
+
+
+def is_ready(kind, obj):
+    """
+    Decide whether an object, as returned by to_dict(), has settled, based on what its kind reports: the observed
+    generation, the ready or available replicas, completions, or the phase.
+
+    :raises: KubernetesAnsibleFailure, if the object reached a phase it cannot recover from
+    """
+    metadata = obj.get('metadata') or {}
+    spec = obj.get('spec') or {}
+    status = obj.get('status') or {}
+    if status.get('observed_generation') is not None and metadata.get('generation') and \
+            status['observed_generation'] < metadata['generation']:
+        return False
+    if kind == 'job':
+        return (status.get('succeeded') or 0) >= (spec.get('completions') or 1)
+    if kind == 'daemon_set':
+        return status.get('desired_number_scheduled') is not None and \
+            (status.get('number_ready') or 0) >= status['desired_number_scheduled']
+    if spec.get('replicas') is not None:
+        available = status.get('available_replicas')
+        if available is None:
+            available = status.get('ready_replicas')
+        updated = status.get('updated_replicas')
+        return (available or 0) >= spec['replicas'] and (updated is None or updated >= spec['replicas'])
+    phase = status.get('phase')
+    if phase in FAILED_PHASES:
+        raise KubernetesAnsibleFailure("{} {} is {}".format(kind, metadata.get('name'), phase),
+                                       **{kind: obj})
+    if phase == 'Running' and status.get('conditions'):
+        return condition_met(obj, dict(type='Ready'))
+    if phase:
+        return phase in READY_PHASES
+    return True
+
+
+def token_expiry(token):
+    """ The expiry of a JSON Web Token, from its exp claim, or None for tokens of any other kind """
+    parts = (token or '').split(' ')[-1].split('.')
+    if len(parts) != 3:
+        return None
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(str(parts[1] + '=' * (-len(parts[1]) % 4))).decode('utf-8'))
+        return float(payload['exp']) - TOKEN_EXPIRY_MARGIN
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def client_configuration(api_client):
+    """
+    The configuration used by api_client, held in config by clients up to kubernetes 3.0, and in configuration by
+    newer ones. Older clients only have the global Configuration.
+    """
+    for attribute in ('config', 'configuration'):
+        configuration = getattr(api_client, attribute, None)
+        if configuration is not None:
+            return configuration
+    return kubernetes_client.Configuration()
+
+
+def client_from_configuration(configuration, client_class=None):
+    """ A client using configuration, or None, if the client only reads the global Configuration """
+    client_class = client_class or kubernetes_client.ApiClient
+    for keyword in ('config', 'configuration'):
+        try:
+            return client_class(**{keyword: configuration})
+        except TypeError:
+            continue
+    return None
+
+
+def set_client_config(helper, auth_options, cache=None):
+    """
+    Configure the helper's client, reusing the configuration resolved by an earlier run when the credential cache
+    holds a valid entry, rather than parsing the kubeconfig file and authenticating again.
+    """
+    config = cache.load() if cache else None
+    if config is not None:
+        configuration = kubernetes_client.Configuration()
+        for attribute, value in config.items():
+            setattr(configuration, attribute, value)
+        api_client = client_from_configuration(configuration, api_client_class(helper))
+        if api_client is not None:
+            helper.api_client = api_client
+            return
+
+    try:
+        helper.set_client_config(**auth_options)
+    except KubernetesException as exc:
+        raise KubernetesAnsibleFailure('Error loading config', error=str(exc))
+    if cache and cache.enabled:
+        configuration = client_configuration(helper.api_client)
+        config = dict((attribute, getattr(configuration, attribute, None)) for attribute in CLIENT_CONFIG_ATTRIBUTES)
+        # Clients up to kubernetes 3.0 keep the host given to the helper on the client, rather than its configuration
+        config['host'] = getattr(helper.api_client, 'host', None) or config['host']
+        files = {}
+        for attribute in CLIENT_CONFIG_FILES:
+            if config[attribute] and os.path.isfile(config[attribute]):
+                with open(config[attribute], 'rb') as f:
+                    files[attribute] = f.read()
+                config[attribute] = None
+        cache.store(config, files, expiry=token_expiry((config['api_key'] or {}).get('authorization')))
+
+
+def is_retryable(exc):
+    """ True if the failure is due to throttling (429) or a server error (5xx) """
+    status = exc.kwargs.get('error')
+    return isinstance(status, int) and (status == 429 or status >= 500)
+
+
+def retry_delay(attempt):
+    """ Exponential backoff with full jitter, so that throttled workers do not retry in lock step """
+    return random.uniform(0, min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * 2 ** attempt))
+
+
+def kind_to_snake(kind):
+    """ Convert a resource kind, such as DeploymentConfig, to the name used by the helpers, deployment_config """
+    name = re.sub(r'(.)([A-Z][a-z]+)', r'\1_\2', kind)
+    return re.sub(r'([a-z0-9])([A-Z])', r'\1_\2', name).lower()
+
+
+def parse_server_time(value, rfc1123=False):
+    """
+    Parse an API server timestamp, either RFC 3339, as used in object metadata, or RFC 1123, as used in the Date
+    header.
+
+    :return: int: seconds since the epoch, or None
+    """
+    if not value:
+        return None
+    try:
+        if rfc1123:
+            return mktime_tz(parsedate_tz(value))
+        return calendar.timegm(time.strptime(value[:19], '%Y-%m-%dT%H:%M:%S'))
+    except (TypeError, ValueError):
+        return None
+
+
+def record_request(api_client, method, *args, **kwargs):
+    """
+    Call a method of a generated API class with a RequestRecorder in place of its ApiClient.
+
+    :return: dict: the request the method would have sent
+    """
+    recorder = RequestRecorder(api_client)
+    api = copy.copy(method.__self__)
+    api.api_client = recorder
+    getattr(api, method.__name__)(*args, **kwargs)
+    return recorder.request
+
+
+class RequestRecorder(object):
+    """
+    Stands in for the ApiClient of a generated API class, recording the request one of its methods would send
+    rather than sending it. Used to find the path, parameters and response type of an operation.
+    """
+
+    def __init__(self, api_client):
+        self.api_client = api_client
+        self.request = None
+
+    def __getattr__(self, name):
+        return getattr(self.api_client, name)
+
+    def call_api(self, resource_path, method, path_params=None, query_params=None, header_params=None, **kwargs):
+        self.request = dict(resource_path=resource_path,
+                            method=method,
+                            path_params=path_params or {},
+                            query_params=list(query_params.items() if isinstance(query_params, dict) else
+                                              query_params or []),
+                            header_params=dict(header_params or {}),
+                            response_type=kwargs.get('response_type'),
+                            auth_settings=kwargs.get('auth_settings'))
+
+
+def model_class(name, packages=MODEL_PACKAGES):
+    """ The generated model class called name, from the first of the client packages that has one, or None """
+    for package in packages:
+        try:
+            module = importlib.import_module(package)
+        except ImportError:
+            continue
+        klass = getattr(module, name, None)
+        if isinstance(klass, type) and (hasattr(klass, 'swagger_types') or '.models.' in klass.__module__):
+            return klass
+    return None
+
+
+def model_attributes(klass):
+    """
+    The swagger_types and attribute_map of a model class. Clients up to kubernetes 3.0 only set them on instances,
+    in an __init__ whose arguments all default to None.
+
+    :return: tuple: (swagger_types, attribute_map)
+    """
+    if hasattr(klass, 'swagger_types'):
+        return klass.swagger_types, klass.attribute_map
+    instance = klass()
+    return instance.swagger_types, instance.attribute_map
+
+
+def model_from_dict(data, type_name, packages=MODEL_PACKAGES):
+    """
+    Build an object of the swagger type type_name, such as V1Pod or list[V1Container], from data holding either
+    the API's field names, as sent by the server, or the model's attribute names, as returned by to_dict(). Fields
+    the model does not have are ignored.
+    """
+    if data is None:
+        return None
+    if type_name.startswith('list['):
+        return [model_from_dict(item, type_name[5:-1], packages) for item in data]
+    if type_name.startswith('dict('):
+        value_type = type_name[5:-1].split(',', 1)[1].strip()
+        return dict((key, model_from_dict(value, value_type, packages)) for key, value in data.items())
+    klass = None if type_name in PRIMITIVE_TYPES else model_class(type_name, packages)
+    if klass is None or not isinstance(data, dict):
+        return data
+    kwargs = {}
+    swagger_types, attribute_map = model_attributes(klass)
+    for attribute, attribute_type in swagger_types.items():
+        field = attribute_map.get(attribute, attribute)
+        value = data.get(field, data.get(attribute))
+        if value is not None:
+            kwargs[attribute] = model_from_dict(value, attribute_type, packages)
+    return klass(**kwargs)
+
+
+class Snapshot(object):
+    """
+    Objects read from a YAML or JSON file, such as the registered result of a list module, or the output of
+    kubectl get -o json, which stand in for the API server in check mode. Objects are indexed by kind, namespace
+    and name. Items of a list that does not name its kind match any kind.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.objects = {}
+        try:
+            with open(path, 'r') as f:
+                for document in yaml.load_all(f, Loader=YAML_LOADER):
+                    self._add(document, None)
+        except (IOError, yaml.YAMLError) as exc:
+            raise KubernetesAnsibleFailure("Error loading offline_check snapshot {}: {}".format(path, exc))
+
+    def _add(self, document, kind):
+        if isinstance(document, list):
+            for item in document:
+                self._add(item, kind)
+        elif not isinstance(document, dict):
+            return
+        elif isinstance(document.get('items'), list):
+            list_kind = document.get('kind') or ''
+            if list_kind.endswith('List') and list_kind != 'List':
+                kind = kind_to_snake(list_kind[:-4])
+            self._add(document['items'], kind)
+        elif isinstance(document.get('metadata'), dict) and document['metadata'].get('name'):
+            metadata = document['metadata']
+            if document.get('kind'):
+                kind = kind_to_snake(document['kind'])
+            self.objects[(kind, metadata.get('namespace') or None, metadata['name'])] = document
+        else:
+            # A module result, such as {"pod_list": {"items": [...]}}, or a loop's {"results": [...]}
+            for key, value in document.items():
+                if key != 'request':
+                    self._add(value, key[:-5] if key.endswith('_list') else kind)
+
+    def get_object(self, model, kind, name, namespace):
+        """ :return: the object, as an instance of model, or None, if the snapshot does not hold it """
+        key = (namespace or None, name)
+        document = self.objects.get((kind,) + key, self.objects.get((None,) + key))
+        if document is None:
+            return None
+        # Prefer the client package the model comes from, as nested models may exist in both
+        root = model.__module__.split('.')[0]
+        packages = sorted(MODEL_PACKAGES, key=lambda package: not package.startswith(root + '.'))
+        return model_from_dict(document, model.__name__, packages)
+
+
+def merge_events(result, events, resource_version):
+    """
+    Apply watch events to a list, as returned by to_dict(), replacing added and modified objects and removing
+    deleted ones. Items are kept in namespace and name order, as the API server lists them.
+
+    :return: dict: the updated list, current at resource_version
+    """
+    if not events:
+        return result
+    items = dict((_item_key(item), item) for item in result.get('items') or [])
+    for event in events:
+        if event['type'] == 'DELETED':
+            items.pop(_item_key(event['object']), None)
+        elif event['type'] in ('ADDED', 'MODIFIED'):
+            items[_item_key(event['object'])] = event['object']
+    result['items'] = [items[key] for key in sorted(items)]
+    result['metadata'] = dict(result.get('metadata') or {}, resource_version=resource_version)
+    return result
+
+
+def _item_key(item):
+    metadata = item.get('metadata') or {}
+    return metadata.get('namespace') or '', metadata.get('name') or ''
+
+
+def list_method(helper, namespace):
+    """ The helper's method listing its kind in namespace, or, without one, in every namespace """
+    try:
+        return helper.lookup_method('list', namespace)
+    except KubernetesException:
+        if namespace:
+            raise
+    # Namespaced kinds are listed across all namespaces with list_<kind>_for_all_namespaces
+    return helper.lookup_method(
+        method_name='list_{}_for_all_namespaces'.format(re.sub(r'_list$', '', helper.base_model_name_snake))
+    )
+
+
+def list_objects(helper, namespace, selectors=None, page_size=DEFAULT_PAGE_SIZE, project=None):
+    """
+    Read the helper's list one page at a time, following the continue token returned with each page. The list
+    methods of the kubernetes 3.0 client take neither limit nor continue, and their models drop the token, so the
+    request a method would send is recorded, and sent with both as query parameters. Each page is converted to
+    dicts, trimmed by project when given, and its response released, before the next page is requested.
+
+    :return: dict: the list, with the items of every page
+    """
+    try:
+        method = list_method(helper, namespace)
+    except KubernetesException as exc:
+        raise KubernetesAnsibleFailure('Failed to retrieve requested object: {}'.format(exc.message))
+    api_client = helper.api_client
+    request = record_request(api_client, method, *((namespace,) if namespace else ()), **(selectors or {}))
+    result = None
+    continue_token = None
+    while True:
+        query_params = list(request['query_params'])
+        if page_size:
+            query_params.append(('limit', page_size))
+        if continue_token:
+            query_params.append(('continue', continue_token))
+        try:
+            response = api_client.call_api(request['resource_path'], 'GET', request['path_params'], query_params,
+                                           request['header_params'], auth_settings=request['auth_settings'],
+                                           _return_http_data_only=True, _preload_content=False)
+            data = json.loads(response_text(response.data))
+        except ApiException as exc:
+            raise KubernetesAnsibleFailure(
+                'Failed to retrieve requested object: {}'.format(api_exception_message(exc)), error=exc.status
+            )
+        except MaxRetryError as exc:
+            raise KubernetesAnsibleFailure('Failed to retrieve requested object: {}'.format(exc.reason))
+        response = None
+        continue_token = (data.get('metadata') or {}).get('continue')
+        # Deserialize the parsed page with the client's own deserializer, which the OpenShift client overrides to
+        # find its models
+        page = api_client._ApiClient__deserialize(data, request['response_type']).to_dict()
+        data = None
+        if project:
+            page = project(page)
+        if result is None:
+            result = page
+            if not project:
+                result['items'] = result.get('items') or []
+        else:
+            items = page.pop('items', None)
+            if items:
+                result.setdefault('items', []).extend(items)
+            result.update(page)
+        if not continue_token or not page_size:
+            break
+    return result
+
+
+def set_offline_client(helper):
+    """ Give the helper an unconfigured client, which serializes objects, but never sends a request """
+    helper.api_client = api_client_class(helper)()
+
+
+def response_text(data):
+    """ A response body, which is bytes when the request was sent without preloading the content, as text """
+    return data.decode('utf-8') if isinstance(data, bytes) else data
+
+
+def api_exception_message(exc):
+    """ Extract the message from the Status object returned with a failed API request """
+    body = response_text(exc.body)
+    if body and body.startswith('{'):
+        return json.loads(body).get('message', exc.reason)
+    return body or exc.reason
+
+
+def api_client_class(helper):
+    """
+    The ApiClient class for the helper's models. The Kubernetes client cannot deserialize OpenShift models, such as
+    V1DeploymentConfig, so OpenShift helpers need the OpenShift client's.
+    """
+    from openshift.helper.openshift import OpenShiftObjectHelper
+    if isinstance(helper, OpenShiftObjectHelper):
+        from openshift.client import ApiClient
+        return ApiClient
+    return kubernetes_client.ApiClient
+
+
+def share_client(api_client, client_class, copies):
+    """
+    api_client as an instance of client_class, which reads the models of the helpers using it. A copy keeps the
+    configuration, host, headers and rest client of api_client, so requests from every kind go through the same
+    connection pool. Copies are kept in copies, by class.
+    """
+    if type(api_client) is client_class:
+        return api_client
+    if client_class not in copies:
+        shared = client_class.__new__(client_class)
+        shared.__dict__.update(api_client.__dict__)
+        copies[client_class] = shared
+    return copies[client_class]
+
+
 class KubernetesAnsibleModule(AnsibleModule):
+    # Set to False by the worker, so that modules it runs are executed in-process
+    delegate_to_worker = True
+
     @staticmethod
     def get_helper(api_version, kind):
+        import_client()
         return KubernetesAnsibleModuleHelper(api_version, kind)
 
     def __init__(self, kind, api_version):
         self.api_version = api_version
         self.kind = kind
         self.argspec_cache = None
+        self.snapshot = None
+        self.profiler = Profiler(enabled=env_enabled(PROFILE_ENV, default=False))
+
+        if self.delegate_to_worker and os.environ.get(WORKER_SOCKET_ENV):
+            self.execute_in_worker(os.environ[WORKER_SOCKET_ENV])
 
         if not HAS_K8S_MODULE_HELPER:
             raise KubernetesAnsibleException(
                 "This module requires the OpenShift Python client. Try `pip install openshift`"
             )
 
+        try:
+            with self.profiler.phase('import'):
+                import_client()
+        except ImportError as exc:
+            raise KubernetesAnsibleException(
+                "Error importing the OpenShift Python client: {}".format(exc)
+            )
+
         if not HAS_YAML:
             raise KubernetesAnsibleException(
                 "This module requires PyYAML. Try `pip install PyYAML`"
@@ -71,10 +781,13 @@ class KubernetesAnsibleModule(AnsibleModule):
             ('resource_definition', 'src'),
         )
 
-        AnsibleModule.__init__(self,
-                               argument_spec=self.argspec,
-                               supports_check_mode=True,
-                               mutually_exclusive=mutually_exclusive)
+        with self.profiler.phase('argspec'):
+            AnsibleModule.__init__(self,
+                                   argument_spec=self.argspec,
+                                   supports_check_mode=True,
+                                   mutually_exclusive=mutually_exclusive)
+        if self.params.get('profile'):
+            self.profiler.enabled = True
 
     @property
     def argspec(self):
@@ -93,10 +806,121 @@ class KubernetesAnsibleModule(AnsibleModule):
                         "If set to C(True) the module will exit without executing any action."
                         "Useful to only generate YAML file definitions for the resources in the tasks."
                     ]
+                },
+                'return_fields': {
+                    'type': 'list',
+                    'description': [
+                        "List of dotted or JSONPath style paths, such as C(metadata.name) or "
+                        "C(items[*].status.phase). The returned object is trimmed to the requested fields."
+                    ]
+                },
+                'return_request': {
+                    'type': 'bool',
+                    'default': True,
+                    'description': [
+                        "If set to C(False), the request body is not included in the result."
+                    ]
+                },
+                'profile': {
+                    'type': 'bool',
+                    'default': False,
+                    'description': [
+                        "If set to C(True), the result includes I(timings), holding the time spent in each phase "
+                        "of the module, and the number of HTTP requests and bytes transferred."
+                    ]
                 }
             }
 
-            for arg_name, arg_properties in self.helper.argspec.items():
+            if self.is_list:
+                spec['page_size'] = {
+                    'type': 'int',
+                    'default': DEFAULT_PAGE_SIZE,
+                    'description': [
+                        "Number of items to request from the API at a time. Set to C(0) to request all items in a "
+                        "single response. API servers older than Kubernetes 1.9 always return all items at once."
+                    ]
+                }
+                spec['label_selector'] = {
+                    'type': 'str',
+                    'description': [
+                        "Only list objects with labels matching the selector, e.g. C(app=hello,tier!=db)."
+                    ]
+                }
+                spec['field_selector'] = {
+                    'type': 'str',
+                    'description': [
+                        "Only list objects with fields matching the selector, e.g. C(status.phase=Running)."
+                    ]
+                }
+                spec['namespace'] = {
+                    'type': 'str',
+                    'description': [
+                        "Only list objects in the namespace. If not provided, objects in all namespaces are listed."
+                    ]
+                }
+                spec['delete_collection'] = {
+                    'type': 'bool',
+                    'default': False,
+                    'description': [
+                        "If set to C(True), delete the selected objects, with one request per namespace."
+                    ]
+                }
+                spec['propagation_policy'] = {
+                    'choices': PROPAGATION_POLICIES,
+                    'description': [
+                        "Whether, and how, objects owned by the deleted objects are garbage collected."
+                    ]
+                }
+                spec['wait'] = {
+                    'type': 'bool',
+                    'default': False,
+                    'description': [
+                        "With I(delete_collection), wait for the deleted objects to be gone."
+                    ]
+                }
+                spec['wait_timeout'] = {
+                    'type': 'int',
+                    'default': DEFAULT_WAIT_TIMEOUT,
+                    'description': [
+                        "Number of seconds to wait."
+                    ]
+                }
+                spec['watch'] = {
+                    'type': 'bool',
+                    'default': False,
+                    'description': [
+                        "If set to C(True), watch the list, and return the events received, along with the last "
+                        "resourceVersion, which can be passed as I(since_resource_version) to resume."
+                    ]
+                }
+                spec['watch_timeout'] = {
+                    'type': 'int',
+                    'default': DEFAULT_WATCH_TIMEOUT,
+                    'description': [
+                        "Number of seconds to watch for."
+                    ]
+                }
+                spec['since_resource_version'] = {
+                    'type': 'str',
+                    'description': [
+                        "Watch from this resourceVersion, rather than listing the objects first."
+                    ]
+                }
+                spec['max_events'] = {
+                    'type': 'int',
+                    'description': [
+                        "Stop watching once this many events have been received."
+                    ]
+                }
+                spec['store'] = {
+                    'type': 'path',
+                    'description': [
+                        "Path to a file holding the list from an earlier run, which is brought up to date with a "
+                        "watch, rather than listing every object again."
+                    ]
+                }
+
+            for arg_name, arg_properties in self.load_helper_argspec().items():
                 spec[arg_name] = {}
                 for option, option_value in arg_properties.items():
                     if option not in ARG_ATTRIBUTES_BLACKLIST:
@@ -108,9 +932,97 @@ class KubernetesAnsibleModule(AnsibleModule):
                         else:
                             spec[arg_name][option] = option_value
 
+            if 'state' in spec and not self.is_list:
+                spec['apply_strategy'] = {
+                    'default': 'patch',
+                    'choices': APPLY_STRATEGIES,
+                    'description': [
+                        "Set to C(json_patch) to send only the fields that differ, as a JSON Patch, or to C(server) "
+                        "to create or update the object with a single server-side apply request, rather than "
+                        "reading, comparing and patching it."
+                    ]
+                }
+                spec['field_manager'] = {
+                    'default': DEFAULT_FIELD_MANAGER,
+                    'description': [
+                        "Name recorded as the owner of the fields set by a server-side apply."
+                    ]
+                }
+                spec['wait'] = {
+                    'type': 'bool',
+                    'default': False,
+                    'description': [
+                        "Wait for the object to become ready, or, when I(state) is C(absent), to be deleted."
+                    ]
+                }
+                spec['wait_condition'] = {
+                    'type': 'dict',
+                    'description': [
+                        "Wait for a condition of the object's status, given by I(type), I(status) and, "
+                        "optionally, I(reason), rather than for the object to become ready."
+                    ]
+                }
+                spec['wait_timeout'] = {
+                    'type': 'int',
+                    'default': DEFAULT_WAIT_TIMEOUT,
+                    'description': [
+                        "Number of seconds to wait."
+                    ]
+                }
+                spec['offline_check'] = {
+                    'type': 'path',
+                    'description': [
+                        "In check mode, compare the requested state with the objects in this file, rather than "
+                        "reading the object from the API server. No requests are sent."
+                    ]
+                }
+
             self.argspec_cache = spec
         return self.argspec_cache
 
+    def load_helper_argspec(self):
+        """
+        Return helper.argspec, reading it from the on-disk cache when a previous run has already derived it from
+        the model, and seeding the helper with the cached copy.
+
+        :return: dict
+        """
+        cache = ArgspecCache(type(self.helper).__name__, self.api_version, self.kind)
+        helper_argspec = cache.load()
+        if helper_argspec is None:
+            helper_argspec = self.helper.argspec
+            cache.store(helper_argspec)
+        elif hasattr(self.helper, '_argspec_cache'):
+            self.helper._argspec_cache = helper_argspec
+        return helper_argspec
+
+    def exit_json(self, **kwargs):
+        """ Trim the result to the requested fields before returning it """
+        if not self.params.get('return_request', True):
+            kwargs.pop('request', None)
+        if self.params.get('return_fields') and kwargs.get(self.kind):
+            kwargs[self.kind] = project_fields(kwargs[self.kind], self.params['return_fields'])
+        self._add_timings(kwargs)
+        AnsibleModule.exit_json(self, **kwargs)
+
+    def fail_json(self, **kwargs):
+        self._add_timings(kwargs)
+        AnsibleModule.fail_json(self, **kwargs)
+
+    def _add_timings(self, kwargs):
+        profiler = getattr(self, 'profiler', None)
+        if profiler is not None and profiler.enabled:
+            kwargs['timings'] = profiler.report()
+
+    def helper_params(self):
+        """ The params the helper accepts: those without the module's own options, unless the helper also has them """
+        argspec = self.helper.argspec
+        return dict((key, value) for key, value in self.params.items() if key not in MODULE_OPTIONS or key in argspec)
+
+    @property
+    def is_list(self):
+        return self.helper.base_model_name_snake.endswith('list')
+
     def execute_module(self):
         """
         Performs basic CRUD operations on the model object. Ends by calling
@@ -126,158 +1038,879 @@ class KubernetesAnsibleModule(AnsibleModule):
             self.helper.enable_debug(reset_logfile=False)
             self.helper.log_argspec()
 
-        resource_definition = self.params.get('resource_definition')
-        if self.params.get('src'):
-            resource_definition = self.load_resource_definition(self.params['src'])
-        if resource_definition:
-            resource_params = self.resource_to_parameters(resource_definition)
-            self.params.update(resource_params)
+        dry_run = self.params.pop('dry_run', False)
+
+        try:
+            if self.check_mode and self.params.get('offline_check'):
+                self.snapshot = Snapshot(self.params['offline_check'])
+            resource_definition = self.params.get('resource_definition')
+            if self.params.get('src'):
+                definitions = self.load_resource_definitions(self.params['src'])
+                with self.profiler.phase('load_definition'):
+                    resource_definition = next(definitions, None)
+                    following = next(definitions, None)
+                if following is not None:
+                    # Apply each document of a multi-document src, as it is parsed
+                    if not dry_run:
+                        self._configure_client()
+                    self.apply_definitions(itertools.chain([resource_definition, following], definitions),
+                                           dry_run=dry_run)
+            if resource_definition:
+                resource_params = self.resource_to_parameters(resource_definition)
+                self.params.update(resource_params)
+
+            if dry_run:
+                self.exit_json(**self._return_attributes())
+
+            self._configure_client()
+            return_attributes = self.execute_resource()
+        except KubernetesAnsibleFailure as exc:
+            if exc.kwargs.get('error') == 401:
+                self.invalidate_credentials()
+            self.fail_json(msg=exc.msg, **exc.kwargs)
+        self.exit_json(**return_attributes)
+
+    def _configure_client(self):
+        if self.snapshot is not None:
+            set_offline_client(self.helper)
+            return
+        try:
+            with self.profiler.phase('set_client_config'):
+                self.configure_client(self.get_auth_options())
+        except KubernetesAnsibleFailure as exc:
+            self.fail_json(msg=exc.msg, **exc.kwargs)
+        except KubernetesException as e:
+            self.fail_json(msg='Error loading config', error=str(e))
+        self.profiler.attach(self.helper.api_client)
+
+    def _return_attributes(self):
+        return_attributes = dict(changed=False,
+                                 api_version=self.api_version,
+                                 request=self.helper.request_body_from_params(self.helper_params()))
+        return_attributes[self.helper.base_model_name_snake] = {}
+        return return_attributes
+
+    def execute_resource(self):
+        """
+        Performs the CRUD operation requested by self.params, using a configured client, and waits for the
+        result when requested.
+
+        :return: dict: containing changed, api_version, request and <kind>
+        :raises: KubernetesAnsibleFailure, if the operation fails
+        """
+        return_attributes = self._execute_resource()
+        if self.params.get('wait') and self.params.get('state') and not self.check_mode:
+            with self.profiler.phase('wait'):
+                self._wait(return_attributes)
+        return return_attributes
 
+    def _execute_resource(self):
         state = self.params.get('state', None)
         force = self.params.get('force', False)
-        dry_run = self.params.pop('dry_run', False)
         name = self.params.get('name')
         namespace = self.params.get('namespace', None)
         existing = None
 
-        return_attributes = dict(changed=False,
-                                 api_version=self.api_version,
-                                 request=self.helper.request_body_from_params(self.params))
-        return_attributes[self.helper.base_model_name_snake] = {}
+        return_attributes = self._return_attributes()
 
-        if dry_run:
-            self.exit_json(**return_attributes)
+        if self.is_list and self.params.get('watch'):
+            self._list_watch(namespace, return_attributes)
+            return return_attributes
 
-        try:
-            auth_options = {}
-            for key, value in self.helper.argspec.items():
-                if value.get('auth_option') and self.params.get(key) is not None:
-                    auth_options[key] = self.params[key]
-            self.helper.set_client_config(**auth_options)
-        except KubernetesException as e:
-            self.fail_json(msg='Error loading config', error=str(e))
+        if self.is_list:
+            # For list modules, execute a GET, and exit
+            if self.params.get('store'):
+                self._sync_store(namespace, return_attributes)
+            else:
+                with self.profiler.phase('list'):
+                    return_attributes[self.kind] = self._list(namespace, self._page_projection())
+            if self.params.get('delete_collection'):
+                self._delete_collection(return_attributes)
+            return return_attributes
 
         if state is None:
-            # This is a list, rollback or ? module with no 'state' param
-            if self.helper.base_model_name_snake.endswith('list'):
-                # For list modules, execute a GET, and exit
-                k8s_obj = self._read(name, namespace)
-                return_attributes[self.kind] = k8s_obj.to_dict()
-                self.exit_json(**return_attributes)
-            elif self.helper.has_method('create'):
+            # This is a rollback or ? module with no 'state' param
+            if self.helper.has_method('create'):
                 # For a rollback, execute a POST, and exit
                 k8s_obj = self._create(namespace)
-                return_attributes[self.kind] = k8s_obj.to_dict()
+                return_attributes[self.kind] = self._to_dict(k8s_obj)
                 return_attributes['changed'] = True
-                self.exit_json(**return_attributes)
+                return return_attributes
             else:
-                self.fail_json(msg="Missing state parameter. Expected one of: present, absent")
+                raise KubernetesAnsibleFailure("Missing state parameter. Expected one of: present, absent")
+
+        if state == 'present' and self.params.get('apply_strategy') == 'server' and self.snapshot is None:
+            # Create or update the object with one request, letting the server merge the fields
+            return self._apply(name, namespace, return_attributes)
 
         # CRUD modules
         try:
-            existing = self.helper.get_object(name, namespace)
+            with self.profiler.phase('get_object'):
+                if self.snapshot is not None:
+                    existing = self.snapshot.get_object(self.helper.model, self.kind, name, namespace)
+                else:
+                    existing = self.helper.get_object(name, namespace)
         except KubernetesException as exc:
-            self.fail_json(msg='Failed to retrieve requested object: {}'.format(exc.message),
-                           error=exc.value.get('status'))
+            raise KubernetesAnsibleFailure('Failed to retrieve requested object: {}'.format(exc.message),
+                                           error=exc.value.get('status'))
+        except (TypeError, ValueError) as exc:
+            raise KubernetesAnsibleFailure('Failed to read {} from the offline_check snapshot: {}'.format(name, exc))
 
         if state == 'absent':
             if not existing:
                 # The object already does not exist
-                self.exit_json(**return_attributes)
+                return return_attributes
             else:
                 # Delete the object
                 if not self.check_mode:
                     try:
-                        self.helper.delete_object(name, namespace)
+                        with self.profiler.phase('delete'):
+                            self.helper.delete_object(name, namespace)
                     except KubernetesException as exc:
-                        self.fail_json(msg="Failed to delete object: {}".format(exc.message),
-                                       error=exc.value.get('status'))
+                        raise KubernetesAnsibleFailure("Failed to delete object: {}".format(exc.message),
+                                                       error=exc.value.get('status'))
                 return_attributes['changed'] = True
-                self.exit_json(**return_attributes)
+                return return_attributes
         else:
             if not existing:
                 k8s_obj = self._create(namespace)
-                return_attributes[self.kind] = k8s_obj.to_dict()
+                return_attributes[self.kind] = self._to_dict(k8s_obj)
                 return_attributes['changed'] = True
-                self.exit_json(**return_attributes)
+                return return_attributes
 
             if existing and force:
                 k8s_obj = None
-                request_body = self.helper.request_body_from_params(self.params)
+                request_body = self.helper.request_body_from_params(self.helper_params())
                 if not self.check_mode:
                     try:
-                        k8s_obj = self.helper.replace_object(name, namespace, body=request_body)
+                        with self.profiler.phase('replace'):
+                            k8s_obj = self.helper.replace_object(name, namespace, body=request_body)
                     except KubernetesException as exc:
-                        self.fail_json(msg="Failed to replace object: {}".format(exc.message),
-                                       error=exc.value.get('status'))
-                return_attributes[self.kind] = k8s_obj.to_dict()
+                        raise KubernetesAnsibleFailure("Failed to replace object: {}".format(exc.message),
+                                                       error=exc.value.get('status'))
+                return_attributes[self.kind] = self._to_dict(k8s_obj)
                 return_attributes['changed'] = True
-                self.exit_json(**return_attributes)
+                return return_attributes
 
             # Check if existing object should be patched
-            k8s_obj = copy.deepcopy(existing)
-            try:
-                self.helper.object_from_params(self.params, obj=k8s_obj)
-            except KubernetesException as exc:
-                self.fail_json(msg="Failed to patch object: {}".format(exc.message))
-            match, diff = self.helper.objects_match(existing, k8s_obj)
+            with self.profiler.phase('compare'):
+                if self._unchanged(existing, return_attributes['request']):
+                    match, diff = True, []
+                else:
+                    k8s_obj = copy.deepcopy(existing)
+                    try:
+                        self.helper.object_from_params(self.helper_params(), obj=k8s_obj)
+                    except KubernetesException as exc:
+                        raise KubernetesAnsibleFailure("Failed to patch object: {}".format(exc.message))
+                    match, diff = self.helper.objects_match(existing, k8s_obj)
             if match:
-                return_attributes[self.kind] = existing.to_dict()
-                self.exit_json(**return_attributes)
+                return_attributes[self.kind] = self._to_dict(existing)
+                return return_attributes
             else:
                 self.helper.log('Existing:')
-                self.helper.log(json.dumps(existing.to_dict(), indent=4))
+                self.helper.log(json.dumps(existing.to_dict(), indent=4, default=str))
                 self.helper.log('\nDifferences:')
                 self.helper.log(json.dumps(diff, indent=4))
             # Differences exist between the existing obj and requested params
-            if not self.check_mode:
+            if self.params.get('apply_strategy') == 'json_patch':
+                if not self.check_mode:
+                    with self.profiler.phase('patch'):
+                        k8s_obj = self._json_patch(name, namespace, existing, k8s_obj)
+            elif not self.check_mode:
                 try:
-                    k8s_obj = self.helper.patch_object(name, namespace, k8s_obj)
+                    with self.profiler.phase('patch'):
+                        k8s_obj = self.helper.patch_object(name, namespace, k8s_obj)
                 except KubernetesException as exc:
-                    self.fail_json(msg="Failed to patch object: {}".format(exc.message))
-            return_attributes[self.kind] = k8s_obj.to_dict()
+                    raise KubernetesAnsibleFailure("Failed to patch object: {}".format(exc.message),
+                                                   error=exc.value.get('status'))
+            return_attributes[self.kind] = self._to_dict(k8s_obj)
             return_attributes['changed'] = True
-            self.exit_json(**return_attributes)
+            return return_attributes
+
+    def _wait(self, return_attributes):
+        """
+        Wait for the object to satisfy wait_condition, or to become ready, or, with state absent, to be deleted.
+        A single watch is opened from the resourceVersion of the last response, so that the module returns as soon
+        as the object changes. If the watch fails, the object is polled with exponential backoff instead.
+        """
+        name = self.params.get('name')
+        namespace = self.params.get('namespace')
+        deadline = monotonic() + (self.params.get('wait_timeout') or DEFAULT_WAIT_TIMEOUT)
+        condition = self.params.get('wait_condition')
+        current = return_attributes.get(self.kind) or {}
+        last_seen = [current]
+        resource_version = (current.get('metadata') or {}).get('resource_version')
+
+        if self.params['state'] == 'absent':
+            if not return_attributes['changed']:
+                return
+            # The delete does not return the object, so read it: a watch started without its resourceVersion would
+            # not see a deletion that already happened
+            k8s_obj = self._read(name, namespace)
+            if k8s_obj is None:
+                return
+            resource_version = k8s_obj.metadata.resource_version
+
+            def check(event_type, obj):
+                return {} if event_type == 'DELETED' else None
+        else:
+            def check(event_type, obj):
+                if event_type == 'DELETED' or obj is None:
+                    return None
+                obj = obj if isinstance(obj, dict) else obj.to_dict()
+                last_seen[0] = obj
+                ready = condition_met(obj, condition) if condition else is_ready(self.kind, obj)
+                return obj if ready else None
+
+            result = check('ADDED', current)
+            if result is not None:
+                return
+
+        try:
+            result = self._wait_watch(name, namespace, resource_version, check, deadline)
+        except KubernetesAnsibleFailure:
+            raise
+        except Exception as exc:
+            self.helper.log('Watch failed, polling instead: {}'.format(exc))
+            result = self._wait_poll(name, namespace, check, deadline)
+        if result is None:
+            raise KubernetesAnsibleFailure(
+                "Timed out waiting for {} {}".format(self.kind, name),
+                **{'changed': return_attributes['changed'], self.kind: last_seen[0]}
+            )
+        if self.params['state'] != 'absent':
+            return_attributes[self.kind] = result
+
+    def _wait_watch(self, name, namespace, resource_version, check, deadline):
+        """ Watch the object until check returns a result, or the deadline passes, in which case return None """
+        list_method = self._list_method(namespace)
+        args = (namespace,) if namespace else ()
+        stream = watch.Watch()
+        while True:
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                return None
+            kwargs = dict(field_selector='metadata.name={}'.format(name), timeout_seconds=max(int(remaining), 1))
+            if resource_version:
+                kwargs['resource_version'] = resource_version
+            for event in stream.stream(list_method, *args, **kwargs):
+                if event['type'] == 'ERROR':
+                    # Typically 410 Gone, when the resourceVersion is too old to watch from
+                    raise KubernetesAnsibleException("Watch error: {}".format(event.get('raw_object')))
+                resource_version = event['object'].metadata.resource_version
+                result = check(event['type'], event['object'])
+                if result is not None:
+                    stream.stop()
+                    return result
+                if monotonic() >= deadline:
+                    stream.stop()
+                    return None
+
+    def _wait_poll(self, name, namespace, check, deadline):
+        """ Read the object, with exponential backoff between reads, until check returns a result or time is up """
+        attempt = 0
+        while True:
+            k8s_obj = self._read(name, namespace)
+            result = check('DELETED' if k8s_obj is None else 'MODIFIED', k8s_obj)
+            if result is not None:
+                return result
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                return None
+            time.sleep(min(RETRY_BACKOFF_BASE * 2 ** attempt, RETRY_BACKOFF_MAX, remaining))
+            attempt += 1
+
+    def execute_in_worker(self, socket_path):
+        """
+        Hand the module parameters to a worker listening on socket_path, and exit with its result. Returns
+        without doing anything when no worker is listening, so the module can run in-process. Once the request is
+        sent, the module fails if no reply comes back, as running it again could apply it twice.
+        """
+        if not HAS_LOAD_PARAMS:
+            return
+        args = _load_params()
+        request = dict(
+            module_class=type(self).__name__,
+            kind=self.kind,
+            api_version=self.api_version,
+            args=args,
+            environ=worker_environ(os.environ)
+        )
+        try:
+            reply = worker_request(socket_path, request, timeout=request_timeout(args))
+        except KubernetesWorkerRequestFailed as exc:
+            reply = dict(rc=1, stdout=json.dumps(dict(failed=True, msg=str(exc))))
+        if reply is None:
+            return
+        sys.stdout.write(reply['stdout'])
+        sys.stdout.flush()
+        sys.exit(reply['rc'])
+
+    def get_auth_options(self):
+        """ Collect the connection parameters that were passed to the module """
+        auth_options = {}
+        for key, value in self.helper.argspec.items():
+            if value.get('auth_option') and self.params.get(key) is not None:
+                auth_options[key] = self.params[key]
+        return auth_options
+
+    def configure_client(self, auth_options):
+        self.credential_cache = CredentialCache(auth_options)
+        set_client_config(self.helper, auth_options, self.credential_cache)
+
+    def invalidate_credentials(self):
+        """ Drop cached credentials the API server rejected, so the next run authenticates again """
+        cache = getattr(self, 'credential_cache', None)
+        if cache is not None:
+            cache.invalidate()
 
     def _create(self, namespace):
         request_body = None
         k8s_obj = None
         try:
-            request_body = self.helper.request_body_from_params(self.params)
+            request_body = self.helper.request_body_from_params(self.helper_params())
         except KubernetesException as exc:
-            self.fail_json(msg="Failed to create object: {}".format(exc.message))
+            raise KubernetesAnsibleFailure("Failed to create object: {}".format(exc.message))
         if not self.check_mode:
             try:
-                k8s_obj = self.helper.create_object(namespace, body=request_body)
+                with self.profiler.phase('create'):
+                    k8s_obj = self.helper.create_object(namespace, body=request_body)
             except KubernetesException as exc:
-                self.fail_json(msg="Failed to create object: {}".format(exc.message),
-                               error=exc.value.get('status'))
+                raise KubernetesAnsibleFailure("Failed to create object: {}".format(exc.message),
+                                               error=exc.value.get('status'))
         return k8s_obj
 
+    def _to_dict(self, k8s_obj):
+        with self.profiler.phase('to_dict'):
+            if k8s_obj is None:
+                # Nothing was sent in check mode, so return the object the request describes
+                k8s_obj = self.helper.object_from_params(self.helper_params())
+            return k8s_obj.to_dict()
+
+    def _unchanged(self, existing, request_body):
+        """
+        Compare only the fields set by the request with the same fields of the existing object, in their serialized
+        form, by hash. When they match, applying the request cannot change the object, so it is neither copied nor
+        diffed. A mismatch is not conclusive, as the server may have normalized a value, and falls back to a full
+        comparison.
+        """
+        if not request_body:
+            return False
+        requested = dict((key, value) for key, value in request_body.items()
+                         if key not in ('apiVersion', 'kind', 'status'))
+        current = project_onto(self.helper.api_client.sanitize_for_serialization(existing), requested)
+        return structural_hash(current) == structural_hash(requested)
+
+    def _json_patch(self, name, namespace, existing, k8s_obj):
+        """
+        Send only the paths that differ between the existing object and the requested one, as a JSON Patch. The
+        first operation tests the existing resourceVersion, so the patch is rejected if the object changed since it
+        was read.
+
+        :return: the patched object
+        """
+        serialize = self.helper.api_client.sanitize_for_serialization
+        source = serialize(existing)
+        operations = json_patch(source, serialize(k8s_obj))
+        resource_version = (source.get('metadata') or {}).get('resourceVersion')
+        if resource_version:
+            operations.insert(0, dict(op='test', path='/metadata/resourceVersion', value=resource_version))
+        self.helper.log('JSON Patch:')
+        self.helper.log(json.dumps(operations, indent=4))
+        try:
+            patch_method = self.helper.lookup_method('patch', namespace)
+            # The client sends a list body as application/json-patch+json
+            if namespace:
+                return patch_method(name, namespace, operations)
+            return patch_method(name, operations)
+        except KubernetesException as exc:
+            raise KubernetesAnsibleFailure("Failed to patch object: {}".format(exc.message))
+        except ApiException as exc:
+            raise KubernetesAnsibleFailure("Failed to patch object: {}".format(api_exception_message(exc)),
+                                           error=exc.status)
+
+    def _apply(self, name, namespace, return_attributes):
+        """
+        Send the request body as a server-side apply patch, the only request made. The server creates the object, if
+        it does not exist, and otherwise only stores it when the applied fields differ. With force, fields owned by
+        other managers are taken over, rather than failing with a conflict.
+
+        :return: dict: containing changed, api_version, request and <kind>
+        """
+        try:
+            request_body = self.helper.request_body_from_params(self.helper_params())
+            request = self._record_request('patch', name, namespace, {})
+        except KubernetesException as exc:
+            raise KubernetesAnsibleFailure("Failed to apply object: {}".format(exc.message))
+        request_body.setdefault('apiVersion', self._resource_api_version(request['resource_path']))
+        request_body.setdefault('kind', re.sub(r'^[A-Za-z]*?V\d+((alpha|beta)\d+)?', '', request['response_type']))
+        return_attributes['request'] = request_body
+
+        query_params = request['query_params'] + [
+            ('fieldManager', self.params.get('field_manager') or DEFAULT_FIELD_MANAGER)
+        ]
+        if self.params.get('force'):
+            query_params.append(('force', 'true'))
+        if self.check_mode:
+            query_params.append(('dryRun', 'All'))
+        header_params = request['header_params']
+        header_params['Content-Type'] = APPLY_PATCH_CONTENT_TYPE
+
+        api_client = self.helper.api_client
+        started = monotonic()
+        try:
+            with self.profiler.phase('apply'):
+                response = api_client.call_api(request['resource_path'], 'PATCH', request['path_params'], query_params,
+                                               header_params, body=json.dumps(request_body),
+                                               auth_settings=request['auth_settings'],
+                                               _return_http_data_only=True, _preload_content=False)
+        except ApiException as exc:
+            raise KubernetesAnsibleFailure("Failed to apply object: {}".format(api_exception_message(exc)),
+                                           error=exc.status)
+
+        k8s_obj = api_client.deserialize(response, request['response_type'])
+        return_attributes[self.kind] = self._to_dict(k8s_obj)
+        return_attributes['changed'] = self._applied(response, monotonic() - started)
+        return return_attributes
+
+    def _applied(self, response, elapsed):
+        """
+        True, if the apply that returned response, after elapsed seconds, created or changed the object. A dry run
+        answers the same way. The server only updates the time of the field manager's managedFields entry when the
+        apply changes the object, so a time no earlier than the request, according to the response's Date header,
+        means it did. Times are whole seconds, so an apply within a second of another change by the same manager
+        is reported as a change.
+        """
+        if response.status == 201:
+            return True
+        metadata = json.loads(response_text(response.data)).get('metadata') or {}
+        server_time = parse_server_time(response.getheader('date'), rfc1123=True)
+        field_manager = self.params.get('field_manager') or DEFAULT_FIELD_MANAGER
+        for entry in metadata.get('managedFields') or []:
+            if entry.get('manager') == field_manager and entry.get('operation') == 'Apply':
+                applied_time = parse_server_time(entry.get('time'))
+                if applied_time is None or server_time is None:
+                    return True
+                return applied_time >= server_time - int(math.ceil(elapsed))
+        return True
+
+    def _record_request(self, operation, name, namespace, body):
+        """
+        Find the request the helper would send for an operation on the object.
+
+        :return: dict: containing resource_path, method, path_params, query_params, header_params, response_type
+                 and auth_settings
+        """
+        method = self.helper.lookup_method(operation, namespace)
+        return self._record_method(method, *((name, namespace, body) if namespace else (name, body)))
+
+    def _record_method(self, method, *args):
+        """ Call a method of a generated API class with a RequestRecorder, and return the request it recorded """
+        return record_request(self.helper.api_client, method, *args)
+
+    @staticmethod
+    def _resource_api_version(resource_path):
+        """ The apiVersion of a resource path, e.g. apps/v1beta1 for /apis/apps/v1beta1/namespaces/... """
+        parts = resource_path.strip('/').split('/')
+        if parts[0] == 'apis':
+            return '/'.join(parts[1:3])
+        return parts[1]
+
     def _read(self, name, namespace):
         k8s_obj = None
         try:
             k8s_obj = self.helper.get_object(name, namespace)
         except KubernetesException as exc:
-            self.fail_json(msg='Failed to retrieve requested object',
-                           error=exc.value.get('status'))
+            raise KubernetesAnsibleFailure('Failed to retrieve requested object',
+                                           error=exc.value.get('status'))
         return k8s_obj
 
-    def load_resource_definition(self, src):
-        """ Load the requested src path """
-        result = None
+    def _list(self, namespace, project=None):
+        return list_objects(self.helper, namespace, self._list_selectors(), self.params.get('page_size'), project)
+
+    def _page_projection(self):
+        """
+        Trim each page of a plain list to return_fields as it is read, so that the fields left out of the result are
+        never held for the whole list. delete_collection needs the full items.
+        """
+        paths = self.params.get('return_fields')
+        if not paths or self.params.get('delete_collection') or not projects_per_item(paths):
+            return None
+        return lambda page: project_fields(page, paths)
+
+    def _list_watch(self, namespace, return_attributes):
+        """
+        Watch the list from since_resource_version, or, without it, list the objects and watch from the list's
+        resourceVersion. A resourceVersion the server no longer holds history for, answered with 410 Gone, is
+        handled by listing again. Adds the events received, and the last resourceVersion, to return_attributes.
+        """
+        resource_version = self.params.get('since_resource_version')
+        events = None
+        if resource_version:
+            try:
+                with self.profiler.phase('watch'):
+                    events, resource_version = self._watch(namespace, resource_version, self._watch_timeout(),
+                                                           self.params.get('max_events'))
+            except KubernetesAnsibleFailure as exc:
+                if exc.kwargs.get('error') != 410:
+                    raise
+                self.helper.log('Resource version {} expired. Listing again.'.format(resource_version))
+                return_attributes['relisted'] = True
+        if events is None:
+            with self.profiler.phase('list'):
+                return_attributes[self.kind] = self._list(namespace)
+            metadata = return_attributes[self.kind].get('metadata') or {}
+            with self.profiler.phase('watch'):
+                events, resource_version = self._watch(namespace, metadata.get('resource_version'),
+                                                       self._watch_timeout(), self.params.get('max_events'))
+        return_attributes['events'] = events
+        return_attributes['resource_version'] = resource_version
+
+    def _watch_timeout(self):
+        return self.params.get('watch_timeout') or DEFAULT_WATCH_TIMEOUT
+
+    def _sync_store(self, namespace, return_attributes):
+        """
+        Bring the list held by the store up to date, by applying the events received by a watch from its
+        resourceVersion, and store the result. The objects are only listed again when the store is empty, was
+        written for another query, or the server answers the watch with 410 Gone.
+        """
+        store = ListStore(self.params['store'], type(self.helper).__name__, self.api_version, self.kind, namespace,
+                          self.params.get('label_selector'), self.params.get('field_selector'))
+        result, resource_version = store.load()
+        if result is not None:
+            try:
+                with self.profiler.phase('watch'):
+                    events, resource_version = self._watch(namespace, resource_version, STORE_SYNC_TIMEOUT)
+                result = merge_events(result, events, resource_version)
+            except KubernetesAnsibleFailure as exc:
+                if exc.kwargs.get('error') != 410:
+                    raise
+                self.helper.log('Resource version {} expired. Listing again.'.format(resource_version))
+                return_attributes['relisted'] = True
+                result = None
+        if result is None:
+            with self.profiler.phase('list'):
+                result = self._list(namespace)
+            resource_version = (result.get('metadata') or {}).get('resource_version')
+        with self.profiler.phase('store'):
+            return_attributes[self.kind] = store.store(result, resource_version)
+        return_attributes['resource_version'] = resource_version
+
+    def _watch(self, namespace, resource_version, timeout, max_events=None):
+        """
+        Watch the list from resource_version, with the list's selectors, until max_events have been received, or
+        timeout seconds pass.
+
+        :return: tuple: (list of events, each a dict holding type and object, the last resourceVersion seen)
+        :raises: KubernetesAnsibleFailure, with the status code as error, if the watch fails
+        """
+        try:
+            list_method = self._list_method(namespace)
+        except KubernetesException as exc:
+            raise KubernetesAnsibleFailure('Failed to watch requested objects: {}'.format(exc.message))
+        args = (namespace,) if namespace else ()
+        deadline = monotonic() + timeout
+        events = []
+        stream = watch.Watch()
+        while True:
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                return events, resource_version
+            kwargs = self._list_selectors()
+            kwargs['timeout_seconds'] = max(int(remaining), 1)
+            if resource_version:
+                kwargs['resource_version'] = resource_version
+            try:
+                for event in stream.stream(list_method, *args, **kwargs):
+                    if event['type'] == 'ERROR':
+                        status = event.get('raw_object') or {}
+                        raise KubernetesAnsibleFailure('Watch failed: {}'.format(status.get('message')),
+                                                       error=status.get('code'))
+                    resource_version = event['object'].metadata.resource_version
+                    events.append(dict(type=event['type'], object=event['object'].to_dict()))
+                    if (max_events and len(events) >= max_events) or monotonic() >= deadline:
+                        stream.stop()
+                        return events, resource_version
+            except ApiException as exc:
+                raise KubernetesAnsibleFailure('Watch failed: {}'.format(api_exception_message(exc)),
+                                               error=exc.status)
+
+    def _delete_collection(self, return_attributes):
+        """
+        Delete the listed objects, with a DELETE request on the collection of each namespace holding any of them,
+        using the same selectors as the list. With wait, poll until none of the deleted objects remain.
+        """
+        items = return_attributes[self.kind].get('items') or []
+        if not items:
+            return
+        return_attributes['changed'] = True
+        if self.check_mode:
+            return
+
+        namespaces = sorted(set((item.get('metadata') or {}).get('namespace') for item in items), key=str)
+        body = dict(kind='DeleteOptions', apiVersion='v1')
+        if self.params.get('propagation_policy'):
+            body['propagationPolicy'] = self.params['propagation_policy']
+        with self.profiler.phase('delete'):
+            for namespace in namespaces:
+                self._delete_namespace_collection(namespace, body)
+
+        if self.params.get('wait'):
+            uids = set((item.get('metadata') or {}).get('uid') for item in items)
+            with self.profiler.phase('wait'):
+                self._wait_deleted(namespaces, uids)
+
+    def _delete_namespace_collection(self, namespace, body):
+        base = re.sub(r'_list$', '', self.kind)
+        try:
+            if namespace:
+                method = self.helper.lookup_method(method_name='delete_collection_namespaced_{}'.format(base))
+            else:
+                method = self.helper.lookup_method(method_name='delete_collection_{}'.format(base))
+        except KubernetesException as exc:
+            raise KubernetesAnsibleFailure('Failed to delete collection: {}'.format(exc.message))
+
+        # Older clients do not pass DeleteOptions to collection deletes, so record the request and send it directly
+        request = self._record_method(method, *((namespace,) if namespace else ()))
+
+        query_params = request['query_params'] + [(
+            {'label_selector': 'labelSelector', 'field_selector': 'fieldSelector'}[key], value
+        ) for key, value in sorted(self._list_selectors().items())]
+        header_params = request['header_params']
+        header_params['Content-Type'] = 'application/json'
+        try:
+            self.helper.api_client.call_api(request['resource_path'], 'DELETE', request['path_params'],
+                                            query_params, header_params, body=body,
+                                            auth_settings=request['auth_settings'],
+                                            _return_http_data_only=True, _preload_content=False)
+        except ApiException as exc:
+            raise KubernetesAnsibleFailure(
+                'Failed to delete collection in {}: {}'.format(namespace or 'the cluster', api_exception_message(exc)),
+                error=exc.status
+            )
+
+    def _wait_deleted(self, namespaces, uids):
+        """ List the namespaces, with exponential backoff between lists, until none of the objects remain """
+        deadline = monotonic() + (self.params.get('wait_timeout') or DEFAULT_WAIT_TIMEOUT)
+        attempt = 0
+        while True:
+            remaining = set()
+            for namespace in namespaces:
+                for item in self._list(namespace).get('items') or []:
+                    uid = (item.get('metadata') or {}).get('uid')
+                    if uid in uids:
+                        remaining.add(uid)
+            if not remaining:
+                return
+            time_left = deadline - monotonic()
+            if time_left <= 0:
+                raise KubernetesAnsibleFailure(
+                    "Timed out waiting for {} deleted objects to be gone".format(len(remaining)), changed=True
+                )
+            time.sleep(min(RETRY_BACKOFF_BASE * 2 ** attempt, RETRY_BACKOFF_MAX, time_left))
+            attempt += 1
+
+    def _list_selectors(self):
+        """ Label and field selectors passed to list requests, so that filtering happens on the server """
+        selectors = {}
+        for key in ('label_selector', 'field_selector'):
+            if self.params.get(key):
+                selectors[key] = self.params[key]
+        return selectors
+
+    def _list_method(self, namespace):
+        return list_method(self.helper, namespace)
+
+    def load_resource_definitions(self, src):
+        """
+        Lazily load the documents of a YAML or JSON file, or of every manifest in a directory, in path order.
+        Documents are yielded as they are parsed, and empty documents are skipped.
+        """
         path = os.path.normpath(src)
-        self.helper.log("Reading definition from {}".format(path))
         if not os.path.exists(path):
-            self.fail_json(msg="Error accessing {}. Does the file exist?".format(path))
+            raise KubernetesAnsibleFailure("Error accessing {}. Does the file exist?".format(path))
+        if os.path.isdir(path):
+            paths = []
+            for dirpath, dirnames, filenames in os.walk(path):
+                dirnames.sort()
+                paths.extend(os.path.join(dirpath, filename) for filename in sorted(filenames)
+                             if filename.endswith(MANIFEST_EXTENSIONS))
+        else:
+            paths = [path]
+
+        for path in paths:
+            if self.helper:
+                self.helper.log("Reading definitions from {}".format(path))
+            manifest = ManifestCache(path)
+            try:
+                if manifest.enabled:
+                    documents = manifest.load()
+                    if documents is None:
+                        documents = [document for document in yaml.load_all(manifest.content, Loader=YAML_LOADER)
+                                     if document]
+                        manifest.store(documents)
+                    for index, document in enumerate(documents):
+                        yield ManifestDocument(document, manifest, index)
+                    continue
+                with open(path, 'r') as f:
+                    for document in yaml.load_all(f, Loader=YAML_LOADER):
+                        if document:
+                            yield document
+            except (IOError, yaml.YAMLError) as exc:
+                raise KubernetesAnsibleFailure("Error loading resource_definition from {}: {}".format(path, exc))
+
+    def apply_definitions(self, definitions, dry_run=False):
+        """
+        Apply each resource definition. Ends by calling AnsibleModule.exit_json() with a dict containing:
+          changed: True, if any resource changed
+          results: a list with a result for each resource definition
+        or AnsibleModule.fail_json(), with the same dict, if any resource failed.
+        :return: None
+        """
+        results = self.execute_definitions(definitions, dry_run=dry_run)
+        changed = any(result['changed'] for result in results)
+        failed = [result for result in results if result.get('failed')]
+        if any(result.get('error') == 401 for result in failed):
+            self.invalidate_credentials()
+        if failed:
+            self.fail_json(msg="{} of {} resources failed".format(len(failed), len(results)),
+                           changed=changed, results=results)
+        self.exit_json(changed=changed, results=results)
+
+    def execute_definitions(self, definitions, dry_run=False):
+        """
+        Apply definitions as they are produced by the iterable. With a parallelism parameter greater than 1, they are
+        applied by a bounded pool of threads, reading at most twice as many definitions ahead as there are threads.
+
+        :return: list: the result of each definition, in order
+        """
+        parallelism = max(self.params.get('parallelism') or 1, 1)
+        if parallelism == 1:
+            return [self.execute_definition(definition, dry_run) for definition in self._guard(definitions)]
+
+        slots = threading.BoundedSemaphore(parallelism * 2)
+
+        def throttled():
+            for definition in self._guard(definitions):
+                slots.acquire()
+                yield definition
+
+        def execute(definition):
+            try:
+                return self.execute_definition(definition, dry_run)
+            finally:
+                slots.release()
+
+        pool = ThreadPool(parallelism)
         try:
-            result = yaml.safe_load(open(path, 'r'))
-        except (IOError, yaml.YAMLError) as exc:
-            self.fail_json(msg="Error loading resource_definition: {}".format(exc))
+            # imap() returns the results in the order of the definitions
+            return list(pool.imap(execute, throttled()))
+        finally:
+            pool.close()
+            pool.join()
+
+    @staticmethod
+    def _guard(definitions):
+        """ Yield a failure in place of a definition that could not be loaded, and stop """
+        definitions = iter(definitions)
+        while True:
+            try:
+                definition = next(definitions)
+            except StopIteration:
+                return
+            except KubernetesAnsibleFailure as exc:
+                yield exc
+                return
+            yield definition
+
+    def execute_definition(self, definition, dry_run=False):
+        """
+        Apply a single resource definition. The whole read, compare and write cycle is retried, with backoff, when
+        the API server responds with 429 or 5xx.
+
+        :return: dict: the outcome, with failed and msg set, if the operation failed
+        """
+        if isinstance(definition, KubernetesAnsibleFailure):
+            result = dict(changed=False, failed=True, msg=definition.msg)
+            result.update(definition.kwargs)
+            return result
+
+        fields = definition if isinstance(definition, dict) else {}
+        metadata = fields.get('metadata') or {}
+        result = dict(changed=False,
+                      api_version=fields.get('apiVersion'),
+                      kind=fields.get('kind'),
+                      name=metadata.get('name'),
+                      namespace=metadata.get('namespace') or self.params.get('namespace'))
+        attempt = 0
+        while True:
+            try:
+                item = self.item_module(definition)
+                if dry_run:
+                    return_attributes = item._return_attributes()
+                else:
+                    return_attributes = item.execute_resource()
+                break
+            except KubernetesAnsibleFailure as exc:
+                if attempt < (self.params.get('retries') or 0) and is_retryable(exc):
+                    time.sleep(retry_delay(attempt))
+                    attempt += 1
+                    continue
+                result.update(exc.kwargs)
+                result.update(failed=True, msg=exc.msg)
+                return result
+            except Exception as exc:
+                # An unexpected error, such as a response the client cannot read, only fails this definition
+                result.update(failed=True, msg='Failed to apply the resource definition: {}'.format(exc),
+                              exception=traceback.format_exc())
+                return result
+
+        result['changed'] = return_attributes['changed']
+        result['result'] = return_attributes.get(item.kind)
+        if result['result'] and self.params.get('return_fields'):
+            result['result'] = project_fields(result['result'], self.params['return_fields'])
+        if self.params.get('return_request', True):
+            result['request'] = return_attributes.get('request')
         return result
 
+    def item_module(self, definition):
+        """
+        Return a shallow copy of the module, bound to the helper for the definition's kind, with params holding
+        the definition's attributes. Copies share the client and the check mode setting.
+        """
+        if not isinstance(definition, dict) or not definition.get('apiVersion') or not definition.get('kind'):
+            raise KubernetesAnsibleFailure("Resource definitions require apiVersion and kind")
+        api_version = definition['apiVersion'].split('/')[-1].capitalize()
+        kind = kind_to_snake(definition['kind'])
+
+        item = copy.copy(self)
+        item.api_version = api_version
+        item.kind = kind
+        item.helper = self.get_kind_helper(api_version, kind)
+        item.params = dict((key, value) for key, value in self.params.items()
+                           if key not in ('resources', 'resource_definition', 'src'))
+        item.params.update(item.resource_to_parameters(definition))
+        return item
+
+    def get_kind_helper(self, api_version, kind):
+        """ Return the helper for a definition. Modules only manage objects of their own kind """
+        if (api_version, kind) != (self.api_version, self.kind):
+            raise KubernetesAnsibleFailure(
+                "Found a {} {} definition, which this module does not manage. Use k8s_batch to apply definitions "
+                "of different kinds.".format(api_version, kind)
+            )
+        return self.helper
+
     def resource_to_parameters(self, resource):
         """ Converts a resource definition to module parameters """
+        manifest = getattr(resource, 'manifest', None)
+        if manifest:
+            helper_key = '{}.{}.{}'.format(type(self.helper).__name__, self.api_version, self.kind)
+            parameters = manifest.get_parameters(resource.index, helper_key)
+            if parameters is not None:
+                return parameters
+
         parameters = {}
         for key, value in resource.items():
             if key in ('apiVersion', 'kind', 'status'):
@@ -291,6 +1924,8 @@ class KubernetesAnsibleModule(AnsibleModule):
             elif isinstance(value, dict):
                 self._add_parameter(value, [key], parameters)
         self.helper.log("Request to parameters: {}".format(json.dumps(parameters)))
+        if manifest:
+            manifest.set_parameters(resource.index, helper_key, parameters)
         return parameters
 
     def _add_parameter(self, request, path, parameters):
@@ -306,8 +1941,8 @@ class KubernetesAnsibleModule(AnsibleModule):
                 continue_path.append(self.helper.attribute_to_snake(key))
                 self._add_parameter(value, continue_path, parameters)
             else:
-                self.fail_json(
-                    msg=("Error parsing resource definition. Encountered {}, which does not map to a module "
-                         "parameter. If this looks like a problem with the module, please open an issue at "
-                         "github.com/openshift/openshift-restclient-python/issues").format(param_name)
+                raise KubernetesAnsibleFailure(
+                    ("Error parsing resource definition. Encountered {}, which does not map to a module "
+                     "parameter. If this looks like a problem with the module, please open an issue at "
+                     "github.com/openshift/openshift-restclient-python/issues").format(param_name)
                 )
@@ -0,0 +1,210 @@
+#
+#  Copyright 2017 Red Hat | Ansible
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+
+import importlib
+import os
+import re
+import sys
+import types
+
+LAZY_CLIENT_ENV = 'K8S_LAZY_CLIENT'
+
+# The generated client packages, whose __init__ imports every model and API class
+LAZY_PACKAGES = ('kubernetes.client', 'openshift.client')
+
+# Simple assignments in a package's __init__, such as configuration = Configuration() in older clients
+INIT_ASSIGNMENT = re.compile(r'^(\w+) = (\w+)\(\)\s*$', re.MULTILINE)
+
+# Imports in a package's __init__, such as from .api_client import ApiClient, or, in openshift.client,
+# from kubernetes.client.configuration import Configuration, ConfigurationObject, configuration
+INIT_IMPORT = re.compile(r'^from (\.*[\w.]*) import ([\w, ]+)$', re.MULTILINE)
+
+
+def module_available(name):
+    """ True if a top level module can be imported, without importing it """
+    try:
+        from importlib.util import find_spec
+    except ImportError:
+        import imp
+        try:
+            imp.find_module(name)
+        except ImportError:
+            return False
+        return True
+    return find_spec(name) is not None
+
+
+def package_directory(name):
+    """ The directory of a package, found without executing its __init__, or its parents' """
+    top, _, rest = name.partition('.')
+    try:
+        from importlib.util import find_spec
+        spec = find_spec(top)
+        locations = spec and spec.submodule_search_locations
+        directory = list(locations)[0] if locations else None
+    except ImportError:
+        import imp
+        try:
+            directory = imp.find_module(top)[1]
+        except ImportError:
+            directory = None
+    if directory is None:
+        return None
+    directory = os.path.join(directory, *rest.split('.')) if rest else directory
+    return directory if os.path.isfile(os.path.join(directory, '__init__.py')) else None
+
+
+def absolute_module(package, module):
+    """ The absolute name of a module imported by package, as in from ..client import models """
+    level = len(module) - len(module.lstrip('.'))
+    if not level:
+        return module
+    base = package.rsplit('.', level - 1)[0] if level > 1 else package
+    return '.'.join(part for part in (base, module[level:]) if part)
+
+
+def camel_to_snake(name):
+    """ Name of the generated file holding a class, e.g. core_v1_api for CoreV1Api """
+    name = re.sub(r'(.)([A-Z][a-z]+)', r'\1_\2', name)
+    return re.sub(r'([a-z0-9])([A-Z])', r'\1_\2', name).lower()
+
+
+class LazyModule(types.ModuleType):
+    """
+    Stands in for a generated client package, importing the file that defines a class, or a submodule, when the
+    attribute is first read, rather than importing every model and API class up front. Attributes that cannot be
+    found this way are read from the real package, which is then imported in full.
+    """
+
+    def __init__(self, name, directory, search):
+        super(LazyModule, self).__init__(name)
+        self.__path__ = [directory]
+        self.__file__ = os.path.join(directory, '__init__.py')
+        self.__package__ = name
+        self._lazy_search = search
+        self._lazy_assignments = {}
+        self._lazy_imports = {}
+        self._lazy_real = None
+        with open(self.__file__) as f:
+            source = f.read()
+        for attribute, factory in INIT_ASSIGNMENT.findall(source):
+            self._lazy_assignments[attribute] = factory
+        for module, names in INIT_IMPORT.findall(source):
+            if module != '__future__':
+                for attribute in names.split(','):
+                    self._lazy_imports[attribute.strip()] = absolute_module(name, module)
+
+    def __getattr__(self, name):
+        if name.startswith('__') or name.startswith('_lazy_'):
+            raise AttributeError(name)
+        if name in self._lazy_assignments:
+            value = getattr(self, self._lazy_assignments[name])()
+        elif name in self._lazy_imports:
+            value = self._lazy_import(self._lazy_imports[name])[name]
+        else:
+            value = self._lazy_find(name)
+        setattr(self, name, value)
+        return value
+
+    def _lazy_import(self, module_name):
+        """
+        Import a module the package's __init__ imports from, and bind every name imported from it. Importing a
+        submodule binds it to the package under its own name, which may be one of the names, such as configuration.
+
+        :return: dict: the names imported from the module, and their values
+        """
+        module = importlib.import_module(module_name)
+        values = dict((attribute, getattr(module, attribute))
+                      for attribute, source in self._lazy_imports.items() if source == module_name)
+        for attribute, value in values.items():
+            setattr(self, attribute, value)
+        return values
+
+    def __dir__(self):
+        names = set(self.__dict__) | set(self._lazy_imports)
+        for package, directory in self._lazy_search:
+            for filename in os.listdir(directory):
+                base, extension = os.path.splitext(filename)
+                if extension == '.py' and base != '__init__':
+                    names.add(''.join(part.capitalize() for part in base.split('_')))
+        return sorted(names)
+
+    def _lazy_find(self, name):
+        module_name = camel_to_snake(name)
+        for package, directory in self._lazy_search:
+            if os.path.isfile(os.path.join(directory, module_name + '.py')) or \
+                    os.path.isfile(os.path.join(directory, module_name, '__init__.py')):
+                module = importlib.import_module('{}.{}'.format(package, module_name))
+                return module if module_name == name else getattr(module, name)
+        return getattr(self._lazy_load_real(), name)
+
+    def _lazy_load_real(self):
+        """ Execute the package's own __init__, as a last resort """
+        if self._lazy_real is None:
+            real = types.ModuleType(self.__name__)
+            real.__path__ = self.__path__
+            real.__file__ = self.__file__
+            real.__package__ = self.__name__
+            with open(self.__file__) as f:
+                code = compile(f.read(), self.__file__, 'exec')
+            exec(code, real.__dict__)
+            self._lazy_real = real
+        return self._lazy_real
+
+
+def install_lazy_client():
+    """
+    Register lazy stand-ins for the generated client packages, and their models and apis subpackages, before they
+    are imported. The top level package is then imported with the stand-in already bound as its attribute, as its
+    __init__ imports the client. Packages that are already imported, or cannot be found, are left alone.
+    """
+    for name in LAZY_PACKAGES:
+        parent_name, _, attribute = name.rpartition('.')
+        if name in sys.modules or parent_name in sys.modules:
+            continue
+        directory = package_directory(name)
+        if directory is None:
+            continue
+        installed = []
+        subpackages = []
+        for subpackage in ('models', 'apis'):
+            subdirectory = os.path.join(directory, subpackage)
+            if os.path.isfile(os.path.join(subdirectory, '__init__.py')):
+                qualified = '{}.{}'.format(name, subpackage)
+                sys.modules[qualified] = LazyModule(qualified, subdirectory, [(qualified, subdirectory)])
+                installed.append(qualified)
+                subpackages.append((qualified, subdirectory))
+        lazy = sys.modules[name] = LazyModule(name, directory, [(name, directory)] + subpackages)
+        installed.append(name)
+
+        parent_directory = os.path.dirname(directory)
+        parent = types.ModuleType(parent_name)
+        parent.__path__ = [parent_directory]
+        parent.__file__ = os.path.join(parent_directory, '__init__.py')
+        parent.__package__ = parent_name
+        setattr(parent, attribute, lazy)
+        sys.modules[parent_name] = parent
+        installed.append(parent_name)
+        try:
+            with open(parent.__file__) as f:
+                code = compile(f.read(), parent.__file__, 'exec')
+            exec(code, parent.__dict__)
+        except Exception:
+            # Leave the package to be imported as usual
+            for qualified in installed:
+                sys.modules.pop(qualified, None)
@@ -0,0 +1,125 @@
+#
+#  Copyright 2017 Red Hat | Ansible
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import threading
+import time
+
+from contextlib import contextmanager
+
+PROFILE_ENV = 'K8S_PROFILE'
+
+try:
+    monotonic = time.monotonic
+except AttributeError:
+    # Python 2 has no monotonic clock in the standard library
+    monotonic = time.time
+
+
+class Profiler(object):
+    """
+    Accumulates the time spent in each phase of a module run, and counts the HTTP requests made by the API client,
+    along with the bytes sent and received. Phases are always timed, as it costs two clock reads, but HTTP requests
+    are only counted once the profiler is attached to an enabled client.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.timings = {}
+        self.requests = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        start = monotonic()
+        try:
+            yield
+        finally:
+            self.record(name, monotonic() - start)
+
+    def record(self, name, seconds):
+        with self.lock:
+            self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def attach(self, api_client):
+        """
+        Count the requests sent by api_client. The client's rest_client is wrapped once, and dispatches to the
+        profiler attached last, so clients kept between runs, such as the worker's, are not wrapped again.
+        """
+        rest_client = getattr(api_client, 'rest_client', None)
+        if rest_client is None:
+            return
+        if not hasattr(rest_client, 'k8s_profiler'):
+            if not self.enabled:
+                return
+            rest_client.request = _counting_request(rest_client, rest_client.request)
+        rest_client.k8s_profiler = self if self.enabled else None
+
+    def count_request(self, sent, received):
+        with self.lock:
+            self.requests += 1
+            self.bytes_sent += sent
+            self.bytes_received += received
+
+    def report(self):
+        """ :return: dict: timings, in milliseconds, and HTTP request and byte counts """
+        with self.lock:
+            return dict(
+                phases=dict((name, round(seconds * 1000.0, 3)) for name, seconds in self.timings.items()),
+                http=dict(requests=self.requests, bytes_sent=self.bytes_sent, bytes_received=self.bytes_received)
+            )
+
+
+def _counting_request(rest_client, request):
+    def counting_request(method, url, query_params=None, headers=None, body=None, post_params=None, **kwargs):
+        # Failed requests are counted too. An error status is raised as an ApiException, which holds the body.
+        received = 0
+        try:
+            response = request(method, url, query_params=query_params, headers=headers, body=body,
+                               post_params=post_params, **kwargs)
+            received = _response_size(response)
+            return response
+        except Exception as exc:
+            received = len(getattr(exc, 'body', None) or '')
+            raise
+        finally:
+            profiler = rest_client.k8s_profiler
+            if profiler is not None:
+                profiler.count_request(_body_size(body) + len(url), received)
+    return counting_request
+
+
+def _body_size(body):
+    if body is None:
+        return 0
+    if not isinstance(body, (str, bytes)):
+        body = json.dumps(body)
+    return len(body)
+
+
+def _response_size(response):
+    # A streamed response has not been read yet, so fall back to the size the server announced
+    data = getattr(response, 'data', None) if getattr(response, '_preload_content', True) else None
+    if data is not None:
+        return len(data)
+    try:
+        return int(response.getheader('content-length') or 0)
+    except (AttributeError, TypeError, ValueError):
+        return 0
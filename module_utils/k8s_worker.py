@@ -0,0 +1,343 @@
+#
+#  Copyright 2017 Red Hat | Ansible
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+
+import importlib
+import json
+import os
+import select
+import socket
+import sys
+import time
+import traceback
+
+from ansible.module_utils import basic
+from ansible.module_utils.six import StringIO
+
+WORKER_SOCKET_ENV = 'K8S_WORKER_SOCKET'
+DEFAULT_WORKER_SOCKET = '~/.ansible/k8s_worker.sock'
+
+# Environment variables sent with each request, and applied by the worker while it runs the module, as a module
+# executed in a new process would see them
+WORKER_ENVIRON_PREFIX = 'K8S_AUTH_'
+WORKER_ENVIRON = ('KUBECONFIG',)
+
+# Seconds to wait for the reply to a module request, on top of the module's wait_timeout and watch_timeout
+WORKER_REQUEST_TIMEOUT = 300
+
+
+class KubernetesWorkerException(Exception):
+    pass
+
+
+class KubernetesWorkerRequestFailed(KubernetesWorkerException):
+    """ Raised when a request was sent, but no reply came back. The worker may still run it. """
+    pass
+
+
+def _send(sock, message):
+    sock.sendall(json.dumps(message).encode('utf-8'))
+    sock.shutdown(socket.SHUT_WR)
+
+
+def _receive(sock):
+    chunks = []
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    return json.loads(b''.join(chunks).decode('utf-8'))
+
+
+def _hung_up(sock):
+    """ :return: bool: True, if the peer has closed its end of sock, rather than only shut down its writes """
+    if not hasattr(select, 'poll'):
+        return False
+    poller = select.poll()
+    poller.register(sock, select.POLLIN)
+    return any(events & select.POLLHUP for fd, events in poller.poll(0))
+
+
+def _inode(path):
+    try:
+        return os.stat(path).st_ino
+    except OSError:
+        return None
+
+
+def worker_environ(environ):
+    """ :return: dict: the variables of environ that the worker applies to a request """
+    return dict((key, value) for key, value in environ.items()
+                if key.startswith(WORKER_ENVIRON_PREFIX) or key in WORKER_ENVIRON)
+
+
+def request_timeout(args):
+    """ Seconds to wait for the worker to run a module with args, allowing for the time it may spend waiting """
+    timeout = WORKER_REQUEST_TIMEOUT
+    for key in ('wait_timeout', 'watch_timeout'):
+        try:
+            timeout += int(args.get(key) or 0)
+        except (TypeError, ValueError):
+            pass
+    return timeout
+
+
+def worker_request(socket_path, request, timeout=None):
+    """
+    Send a request to the worker listening on socket_path, and wait for its reply. When no reply arrives within
+    timeout seconds, the worker's socket is removed, so that later requests start another worker rather than
+    queueing behind the hung one, which exits once it is idle.
+
+    Once connected, the request is not safe to run elsewhere: the worker may run it even though no reply arrives,
+    so callers must report the failure rather than retry.
+
+    :return: dict: the worker's reply, or None if no worker is listening
+    :raises: KubernetesWorkerRequestFailed, if the request was sent, and no reply came back
+    """
+    path = os.path.expanduser(socket_path)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        try:
+            sock.connect(path)
+        except socket.error:
+            return None
+        inode = _inode(path)
+        try:
+            _send(sock, request)
+            return _receive(sock)
+        except socket.timeout:
+            if inode is not None and _inode(path) == inode:
+                os.unlink(path)
+            raise KubernetesWorkerRequestFailed(
+                "No reply from the worker on {} within {} seconds. The worker may still run the request.".format(
+                    socket_path, timeout)
+            )
+        except (socket.error, ValueError) as exc:
+            raise KubernetesWorkerRequestFailed(
+                "Failed to read the reply of the worker on {}: {}. The worker may have run the request.".format(
+                    socket_path, exc)
+            )
+    finally:
+        sock.close()
+
+
+def start_worker(socket_path, module_classes, idle_timeout=None, startup_timeout=10):
+    """
+    Fork a daemonized KubernetesWorker, and wait for it to start accepting connections.
+
+    :return: int: the pid of the worker
+    """
+    pid = os.fork()
+    if pid == 0:
+        os.setsid()
+        if os.fork() != 0:
+            os._exit(0)
+        # Let go of the module's stdout and stderr, or Ansible will wait on the worker to exit
+        devnull = os.open(os.devnull, os.O_RDWR)
+        for fd in (0, 1, 2):
+            os.dup2(devnull, fd)
+        try:
+            KubernetesWorker(socket_path, module_classes, idle_timeout=idle_timeout).serve()
+        finally:
+            os._exit(0)
+
+    os.waitpid(pid, 0)
+    deadline = time.time() + startup_timeout
+    while time.time() < deadline:
+        reply = worker_request(socket_path, dict(command='ping'))
+        if reply is not None:
+            return reply['pid']
+        time.sleep(0.1)
+    raise KubernetesWorkerException("Timed out waiting for the worker to listen on {}".format(socket_path))
+
+
+def stop_worker(socket_path, shutdown_timeout=10):
+    """
+    Ask the worker listening on socket_path to exit, and wait for it to remove the socket.
+
+    :return: bool: True, if a worker was listening
+    """
+    if worker_request(socket_path, dict(command='shutdown')) is None:
+        return False
+    deadline = time.time() + shutdown_timeout
+    while os.path.exists(os.path.expanduser(socket_path)) and time.time() < deadline:
+        time.sleep(0.1)
+    return True
+
+
+class KubernetesWorker(object):
+    """
+    Runs module requests received on a Unix socket, keeping helpers, and their configured API clients, warm
+    between tasks. Requests are served one at a time.
+    """
+
+    def __init__(self, socket_path, module_classes, idle_timeout=None):
+        self.socket_path = os.path.expanduser(socket_path)
+        self.module_classes = dict((cls.__name__, cls) for cls in module_classes)
+        self.idle_timeout = idle_timeout
+        self.helpers = {}
+        self.worker_classes = {}
+        self.active_key = None
+        self.configured = set()
+        self.running = False
+
+    def serve(self):
+        if os.path.exists(self.socket_path):
+            if worker_request(self.socket_path, dict(command='ping')) is not None:
+                raise KubernetesWorkerException("A worker is already listening on {}".format(self.socket_path))
+            os.unlink(self.socket_path)
+        if not os.path.isdir(os.path.dirname(self.socket_path)):
+            os.makedirs(os.path.dirname(self.socket_path))
+
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        umask = os.umask(0o077)
+        try:
+            server.bind(self.socket_path)
+        finally:
+            os.umask(umask)
+        inode = _inode(self.socket_path)
+        server.listen(16)
+        server.settimeout(self.idle_timeout)
+
+        self.running = True
+        try:
+            while self.running:
+                try:
+                    conn, _ = server.accept()
+                except socket.timeout:
+                    break
+                try:
+                    conn.settimeout(None)
+                    request = _receive(conn)
+                    # A client that timed out while the request was queued has already reported it failed
+                    if _hung_up(conn):
+                        continue
+                    _send(conn, self.handle(request))
+                except (socket.error, ValueError):
+                    pass
+                finally:
+                    conn.close()
+        finally:
+            server.close()
+            # Unless a client gave up on this worker, and another has started listening on the path since
+            if _inode(self.socket_path) == inode:
+                os.unlink(self.socket_path)
+
+    def handle(self, request):
+        command = request.get('command', 'run')
+        if command == 'ping':
+            return dict(pid=os.getpid())
+        if command == 'shutdown':
+            self.running = False
+            return dict(pid=os.getpid())
+        return self.run_module(request)
+
+    def run_module(self, request):
+        """
+        Execute a module in-process, the same way Ansible would have in a fresh interpreter.
+
+        :return: dict: containing the module's rc and stdout
+        """
+        module_class = self.module_classes.get(request.get('module_class'))
+        if module_class is None:
+            return self._failure("Worker does not support {}".format(request.get('module_class')))
+
+        environ = worker_environ(os.environ)
+        stdout = sys.stdout
+        rc = 0
+        try:
+            for key in environ:
+                del os.environ[key]
+            os.environ.update(request.get('environ', {}))
+            basic._ANSIBLE_ARGS = json.dumps(dict(ANSIBLE_MODULE_ARGS=request['args'])).encode('utf-8')
+            sys.stdout = StringIO()
+            try:
+                module = self.worker_module_class(module_class)(request['kind'], request['api_version'])
+                module.execute_module()
+            except SystemExit as exc:
+                rc = exc.code or 0
+            output = sys.stdout.getvalue()
+        except Exception as exc:
+            return self._failure("Worker failed to run the module: {}".format(exc),
+                                 exception=traceback.format_exc())
+        finally:
+            sys.stdout = stdout
+            basic._ANSIBLE_ARGS = None
+            for key in request.get('environ', {}):
+                os.environ.pop(key, None)
+            os.environ.update(environ)
+        return dict(rc=rc, stdout=output)
+
+    def worker_module_class(self, module_class):
+        """ Subclass the module, so that it runs in-process, and draws helpers from the worker """
+        if module_class in self.worker_classes:
+            return self.worker_classes[module_class]
+        worker = self
+
+        class WorkerModule(module_class):
+            delegate_to_worker = False
+
+            def get_helper(self, api_version, kind):
+                return worker.get_helper(module_class, api_version, kind)
+
+            def configure_client(self, auth_options):
+                self.helper = worker.get_configured_helper(module_class, self.api_version, self.kind,
+                                                           auth_options)
+
+        WorkerModule.__name__ = module_class.__name__
+        self.worker_classes[module_class] = WorkerModule
+        return WorkerModule
+
+    def get_helper(self, module_class, api_version, kind, auth_key=None):
+        key = (module_class.__name__, api_version, kind, auth_key)
+        if key not in self.helpers:
+            self.helpers[key] = module_class.get_helper(api_version, kind)
+        return self.helpers[key]
+
+    def get_configured_helper(self, module_class, api_version, kind, auth_options):
+        """
+        Return a helper with a client configured for auth_options. The client configuration is only reloaded
+        when the options, the environment the request was sent with, or the kubeconfig file differ from the
+        previous request.
+        """
+        kubeconfig = os.path.expanduser(auth_options.get('kubeconfig') or os.environ.get('K8S_AUTH_KUBECONFIG') or
+                                        os.environ.get('KUBECONFIG', '~/.kube/config'))
+        auth_key = (
+            tuple(sorted((key, str(value)) for key, value in auth_options.items())),
+            tuple(sorted(worker_environ(os.environ).items())),
+            os.path.getmtime(kubeconfig) if os.path.isfile(kubeconfig) else None
+        )
+        if self.active_key != auth_key:
+            # Client configuration may be process global, so reload it whenever the credentials change
+            self.active_key = auth_key
+            self.configured = set()
+        helper = self.get_helper(module_class, api_version, kind, auth_key=auth_key)
+        if id(helper) not in self.configured:
+            # The client reads KUBECONFIG when it is imported, so point it at the one the request was sent with
+            kube_config = importlib.import_module('kubernetes.config.kube_config')
+            kube_config.KUBE_CONFIG_DEFAULT_LOCATION = os.environ.get('KUBECONFIG', '~/.kube/config')
+            helper.set_client_config(**dict(auth_options))
+            self.configured.add(id(helper))
+        return helper
+
+    @staticmethod
+    def _failure(msg, **kwargs):
+        result = dict(failed=True, msg=msg)
+        result.update(kwargs)
+        return dict(rc=1, stdout=json.dumps(result))
@@ -16,14 +16,24 @@
 # You should have received a copy of the GNU General Public License
 # along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
 
-from ansible.module_utils.k8s_common import KubernetesAnsibleException, KubernetesAnsibleModule
+from ansible.module_utils.k8s_common import (ClientNotImported, KubernetesAnsibleException, KubernetesAnsibleFailure,
+                                             KubernetesAnsibleModule, import_client)
+from ansible.module_utils.k8s_lazy import module_available
 
-try:
-    from openshift.helper.ansible import OpenShiftAnsibleModuleHelper, ARG_ATTRIBUTES_BLACKLIST
-    from openshift.helper.exceptions import KubernetesException, OpenShiftException
-    HAS_OPENSHIFT_HELPER = True
-except ImportError as exc:
-    HAS_OPENSHIFT_HELPER = False
+# Bound by import_openshift_helper(), on first use
+OpenShiftAnsibleModuleHelper = None
+KubernetesException = ClientNotImported
+
+HAS_OPENSHIFT_HELPER = module_available('openshift')
+
+
+def import_openshift_helper():
+    global OpenShiftAnsibleModuleHelper, KubernetesException
+    if OpenShiftAnsibleModuleHelper is not None:
+        return
+    import_client()
+    from openshift.helper.exceptions import KubernetesException
+    from openshift.helper.ansible import OpenShiftAnsibleModuleHelper
 
 
 class OpenShiftAnsibleException(KubernetesAnsibleException):
@@ -44,6 +54,7 @@ class OpenShiftAnsibleModule(KubernetesAnsibleModule):
 
     @staticmethod
     def get_helper(api_version, kind):
+        import_openshift_helper()
         return OpenShiftAnsibleModuleHelper(api_version, kind)
 
     def _create(self, namespace):
@@ -56,14 +67,14 @@ class OpenShiftAnsibleModule(KubernetesAnsibleModule):
         new_obj = None
         k8s_obj = None
         try:
-            new_obj = self.helper.object_from_params(self.params)
+            new_obj = self.helper.object_from_params(self.helper_params())
         except KubernetesException as exc:
-            self.fail_json(msg="Failed to create object: {}".format(exc.message))
+            raise KubernetesAnsibleFailure("Failed to create object: {}".format(exc.message))
         try:
             k8s_obj = self.helper.create_project(metadata=new_obj.metadata,
                                                  display_name=self.params.get('display_name'),
                                                  description=self.params.get('description'))
         except KubernetesException as exc:
-            self.fail_json(msg='Failed to retrieve requested object',
-                           error=exc.value.get('status'))
+            raise KubernetesAnsibleFailure('Failed to retrieve requested object',
+                                           error=exc.value.get('status'))
         return k8s_obj
@@ -0,0 +1,150 @@
+#
+#  Copyright 2017 Red Hat | Ansible
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Apply a config map with apply_strategy: server, against a client whose requests are answered the way the API
+server answers a server-side apply, and count the requests sent.
+
+    python -m pytest tests/unit
+"""
+
+import copy
+import json
+import os
+import sys
+import time
+
+from email.utils import formatdate
+
+import pytest
+
+pytest.importorskip('openshift.helper.ansible')
+
+import ansible.module_utils
+ansible.module_utils.__path__.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__)))), 'module_utils'))
+
+from ansible.module_utils import basic
+from ansible.module_utils.k8s_common import KubernetesAnsibleModule
+from ansible.module_utils.six import StringIO
+
+PATH = '/api/v1/namespaces/default/configmaps/settings'
+
+
+class Response(object):
+    def __init__(self, status, body):
+        self.status = status
+        self.reason = 'OK'
+        self.data = json.dumps(body).encode('utf-8')
+        self.headers = {'content-type': 'application/json', 'date': formatdate(usegmt=True)}
+
+    def getheader(self, name, default=None):
+        return self.headers.get(name.lower(), default)
+
+    def getheaders(self):
+        return self.headers
+
+
+class APIServer(object):
+    """ Answers apply requests for one config map, updating its field manager's time only when it changes """
+
+    def __init__(self):
+        self.stored = None
+        self.requests = []
+
+    def request(self, method, url, query_params=None, headers=None, body=None, post_params=None, **kwargs):
+        query = dict(query_params or [])
+        self.requests.append((method, url.split('127.0.0.1:1', 1)[-1], query))
+        assert (method, headers['Content-Type']) == ('PATCH', 'application/apply-patch+yaml')
+        applied = json.loads(body)
+        created = self.stored is None
+        obj = copy.deepcopy(self.stored or applied)
+        if not created:
+            obj['data'] = applied['data']
+        if created or obj['data'] != self.stored['data']:
+            obj['metadata']['managedFields'] = [dict(manager=query['fieldManager'], operation='Apply',
+                                                     time=time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()))]
+            obj['metadata']['resourceVersion'] = str(int(obj['metadata'].get('resourceVersion', 0)) + 1)
+        if not query.get('dryRun'):
+            self.stored = obj
+        return Response(201 if created else 200, obj)
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = APIServer()
+    monkeypatch.setattr('kubernetes.client.rest.RESTClientObject.request',
+                        lambda self, *args, **kwargs: server.request(*args, **kwargs))
+    return server
+
+
+def apply(data, check_mode=False):
+    args = dict(host='http://127.0.0.1:1', api_key='token', name='settings', namespace='default', data=data,
+                apply_strategy='server', _ansible_check_mode=check_mode)
+    basic._ANSIBLE_ARGS = json.dumps(dict(ANSIBLE_MODULE_ARGS=args)).encode('utf-8')
+    stdout, sys.stdout = sys.stdout, StringIO()
+    try:
+        KubernetesAnsibleModule('config_map', 'V1').execute_module()
+    except SystemExit:
+        pass
+    finally:
+        output, sys.stdout = sys.stdout.getvalue(), stdout
+        basic._ANSIBLE_ARGS = None
+    result = json.loads(output)
+    assert not result.get('failed'), result.get('msg')
+    return result
+
+
+def test_create(server):
+    result = apply(dict(debug='false'))
+
+    assert result['changed'] is True
+    assert result['config_map']['data'] == dict(debug='false')
+    assert server.requests == [('PATCH', PATH, dict(fieldManager='ansible'))]
+
+
+def test_unchanged_apply_is_one_request(server):
+    apply(dict(debug='false'))
+    # Let the time recorded for the field manager fall behind the time of the next request
+    time.sleep(2)
+    del server.requests[:]
+
+    assert apply(dict(debug='false'))['changed'] is False
+    assert [method for method, path, query in server.requests] == ['PATCH']
+
+
+def test_changed(server):
+    apply(dict(debug='false'))
+    time.sleep(2)
+
+    result = apply(dict(debug='true'))
+
+    assert result['changed'] is True
+    assert result['config_map']['data'] == dict(debug='true')
+    assert server.stored['data'] == dict(debug='true')
+
+
+def test_check_mode(server):
+    apply(dict(debug='false'))
+    time.sleep(2)
+    del server.requests[:]
+
+    assert apply(dict(debug='false'), check_mode=True)['changed'] is False
+    assert apply(dict(debug='true'), check_mode=True)['changed'] is True
+    assert server.stored['data'] == dict(debug='false')
+    assert [query.get('dryRun') for method, path, query in server.requests] == ['All', 'All']
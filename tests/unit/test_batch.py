@@ -0,0 +1,99 @@
+#
+#  Copyright 2017 Red Hat | Ansible
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Configure the helpers of a k8s_batch module for Kubernetes and OpenShift kinds, in either order, and apply
+definitions that fail in unexpected ways.
+
+    python -m pytest tests/unit
+"""
+
+import json
+import os
+
+import pytest
+
+pytest.importorskip('openshift.helper.ansible')
+
+import ansible.module_utils
+ansible.module_utils.__path__.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__)))), 'module_utils'))
+
+from ansible.module_utils import basic
+from ansible.module_utils.k8s_batch import KubernetesBatchModule
+from ansible.module_utils.k8s_common import KubernetesAnsibleModule
+
+CONFIG_MAP = dict(apiVersion='v1', kind='ConfigMap', metadata=dict(name='settings', namespace='default'),
+                  data=dict(debug='false'))
+
+DEPLOYMENT_CONFIG = dict(apiVersion='v1', kind='DeploymentConfig', metadata=dict(name='web', namespace='default'),
+                         spec=dict(replicas=1, selector=dict(app='web'), template=dict(
+                             metadata=dict(labels=dict(app='web')),
+                             spec=dict(containers=[dict(name='web', image='registry.example.com/web:1')]))))
+
+
+class Response(object):
+    """ A response to a read of the DeploymentConfig """
+
+    data = json.dumps(dict(DEPLOYMENT_CONFIG, metadata=dict(DEPLOYMENT_CONFIG['metadata'], resourceVersion='1')))
+
+
+@pytest.fixture
+def batch(tmpdir, monkeypatch):
+    for key in list(os.environ):
+        if key.startswith('K8S_AUTH_') or key == 'KUBECONFIG':
+            monkeypatch.delenv(key)
+    monkeypatch.setenv('HOME', str(tmpdir))
+
+    def new(resources):
+        args = dict(resources=resources, host='http://127.0.0.1:1')
+        monkeypatch.setattr(basic, '_ANSIBLE_ARGS', json.dumps(dict(ANSIBLE_MODULE_ARGS=args)).encode('utf-8'))
+        return KubernetesBatchModule()
+    return new
+
+
+@pytest.mark.parametrize('resources', [[CONFIG_MAP, DEPLOYMENT_CONFIG], [DEPLOYMENT_CONFIG, CONFIG_MAP]])
+def test_kinds_share_the_connection_pool(batch, resources):
+    module = batch(resources)
+    helpers = [module.item_module(definition).helper for definition in resources]
+
+    # Each helper reads its own models, and sends requests through the same configuration and connection pool
+    deployment_config = helpers[resources.index(DEPLOYMENT_CONFIG)]
+    k8s_obj = deployment_config.api_client.deserialize(Response(), 'V1DeploymentConfig')
+    assert k8s_obj.spec.template.spec.containers[0].image == 'registry.example.com/web:1'
+    assert len(set(id(helper.api_client.rest_client) for helper in helpers)) == 1
+    assert len(set(id(helper.api_client.config) for helper in helpers)) == 1
+    assert all(helper.api_client.host == 'http://127.0.0.1:1' for helper in helpers)
+
+
+def test_unexpected_errors_fail_one_definition(batch, monkeypatch):
+    def execute_resource(self):
+        if self.kind == 'deployment_config':
+            raise AttributeError("module 'kubernetes.client.models' has no attribute 'V1DeploymentConfig'")
+        return dict(changed=True, config_map=CONFIG_MAP, request=None)
+
+    monkeypatch.setattr(KubernetesAnsibleModule, 'execute_resource', execute_resource)
+    module = batch([DEPLOYMENT_CONFIG, CONFIG_MAP])
+
+    failed, applied = module.execute_definitions(module.params['resources'])
+
+    assert failed['failed'] is True
+    assert 'V1DeploymentConfig' in failed['msg']
+    assert failed['name'] == 'web'
+    assert applied['changed'] is True
+    assert not applied.get('failed')
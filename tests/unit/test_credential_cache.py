@@ -0,0 +1,135 @@
+#
+#  Copyright 2017 Red Hat | Ansible
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Round trip the client configuration through the credential cache, with the installed client: configure a helper
+from a kubeconfig file, then configure another from the cache alone, and compare what their clients would send.
+
+    python -m pytest tests/unit
+"""
+
+import base64
+import os
+
+import pytest
+
+pytest.importorskip('openshift.helper.ansible')
+
+import ansible.module_utils
+ansible.module_utils.__path__.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__)))), 'module_utils'))
+
+from ansible.module_utils.k8s_cache import CredentialCache
+from ansible.module_utils.k8s_common import KubernetesAnsibleModule, client_configuration, set_client_config
+from ansible.module_utils.openshift_common import OpenShiftAnsibleModule
+
+CA_CERT = b'-----BEGIN CERTIFICATE-----\nY2VydGlmaWNhdGU=\n-----END CERTIFICATE-----\n'
+
+KUBECONFIG = """
+apiVersion: v1
+kind: Config
+current-context: test
+clusters:
+- name: test
+  cluster:
+    server: https://cluster.example.com:8443
+    certificate-authority-data: {ca}
+contexts:
+- name: test
+  context:
+    cluster: test
+    user: test
+users:
+- name: test
+  user:
+    token: cached-token
+"""
+
+
+@pytest.fixture
+def kubeconfig(tmpdir, monkeypatch):
+    for key in list(os.environ):
+        if key.startswith('K8S_AUTH_'):
+            monkeypatch.delenv(key)
+    monkeypatch.setenv('K8S_CACHE_DIR', str(tmpdir.join('cache')))
+    monkeypatch.setenv('K8S_CREDENTIAL_CACHE', 'true')
+    path = tmpdir.join('kubeconfig')
+    path.write(KUBECONFIG.format(ca=base64.b64encode(CA_CERT).decode('ascii')))
+    return str(path)
+
+
+def configure(auth_options):
+    helper = KubernetesAnsibleModule.get_helper('V1', 'pod')
+    set_client_config(helper, auth_options, CredentialCache(auth_options))
+    return helper
+
+
+def configure_from_cache(auth_options, monkeypatch, module_class=KubernetesAnsibleModule, kind='pod'):
+    """ Configure a helper, failing if it has to read the kubeconfig file """
+    helper = module_class.get_helper('V1', kind)
+
+    def set_client_config_from_kubeconfig(**auth):
+        raise AssertionError('the kubeconfig file was read, rather than the cache')
+
+    monkeypatch.setattr(helper, 'set_client_config', set_client_config_from_kubeconfig)
+    set_client_config(helper, auth_options, CredentialCache(auth_options))
+    return helper
+
+
+def sent(api_client):
+    """ The host, credentials and TLS settings a client sends requests with """
+    configuration = client_configuration(api_client)
+    ca_cert = None
+    if configuration.ssl_ca_cert:
+        with open(configuration.ssl_ca_cert, 'rb') as f:
+            ca_cert = f.read()
+    return dict(host=getattr(api_client, 'host', None) or configuration.host,
+                api_key=configuration.api_key,
+                verify_ssl=configuration.verify_ssl,
+                ca_cert=ca_cert)
+
+
+def test_configuration_round_trip(kubeconfig, monkeypatch):
+    auth_options = dict(kubeconfig=kubeconfig)
+    expected = sent(configure(auth_options).api_client)
+    assert expected['host'] == 'https://cluster.example.com:8443'
+    assert expected['api_key'] == {'authorization': 'Bearer cached-token'}
+    assert expected['ca_cert'] == CA_CERT
+
+    assert sent(configure_from_cache(auth_options, monkeypatch).api_client) == expected
+
+
+def test_auth_options_round_trip(kubeconfig, monkeypatch):
+    auth_options = dict(kubeconfig=kubeconfig, host='https://override.example.com:6443', verify_ssl=False)
+    expected = sent(configure(auth_options).api_client)
+    assert expected['host'] == 'https://override.example.com:6443'
+    assert expected['verify_ssl'] is False
+
+    assert sent(configure_from_cache(auth_options, monkeypatch).api_client) == expected
+
+
+def test_openshift_client_from_cache(kubeconfig, monkeypatch):
+    auth_options = dict(kubeconfig=kubeconfig)
+    expected = sent(configure(auth_options).api_client)
+
+    helper = configure_from_cache(auth_options, monkeypatch, OpenShiftAnsibleModule, 'deployment_config')
+
+    # Only the OpenShift client reads OpenShift models
+    from openshift.client import ApiClient
+    assert isinstance(helper.api_client, ApiClient)
+    assert sent(helper.api_client) == expected
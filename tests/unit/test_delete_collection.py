@@ -0,0 +1,97 @@
+#
+#  Copyright 2017 Red Hat | Ansible
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Delete collections of pods held by the fake API server of the benchmark harness, and count the requests sent.
+
+    python -m pytest tests/unit
+"""
+
+import os
+import sys
+
+import pytest
+
+pytest.importorskip('openshift.helper.ansible')
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                                'hacking'))
+
+import benchmark_modules
+from benchmark_modules import NAMESPACE, FakeAPIServer, make_pod, run_module
+
+basic, classes = benchmark_modules.load_module_classes()
+
+OTHER_NAMESPACE = 'other'
+
+
+@pytest.fixture
+def server():
+    server = FakeAPIServer().start()
+    for namespace in (NAMESPACE, OTHER_NAMESPACE):
+        for index in range(4):
+            server.store('api/v1', namespace, 'pods', make_pod('web-{}'.format(index), 1, revision=index % 2))
+    yield server
+    server.stop()
+
+
+def delete_pods(server, **args):
+    args.update(host=server.url, api_key='token', delete_collection=True)
+    del server.requests[:]
+    return run_module(basic, classes['KubernetesAnsibleModule'], 'pod_list', 'V1', args)
+
+
+def names(server, namespace):
+    return [pod['metadata']['name'] for pod in server.items('api/v1', namespace, 'pods')]
+
+
+def test_one_request_per_namespace(server):
+    result = delete_pods(server, label_selector='revision=1', propagation_policy='Foreground')
+
+    assert result['changed']
+    assert names(server, NAMESPACE) == names(server, OTHER_NAMESPACE) == ['web-0', 'web-2']
+    assert [method for method, path in server.requests] == ['GET', 'DELETE', 'DELETE']
+    assert sorted(path for method, path in server.requests if method == 'DELETE') == [
+        '/api/v1/namespaces/{}/pods?labelSelector=revision%3D1'.format(namespace)
+        for namespace in (NAMESPACE, OTHER_NAMESPACE)
+    ]
+
+
+def test_namespace(server):
+    result = delete_pods(server, namespace=OTHER_NAMESPACE, wait=True)
+
+    assert result['changed']
+    assert names(server, OTHER_NAMESPACE) == []
+    assert len(names(server, NAMESPACE)) == 4
+    assert [method for method, path in server.requests][:2] == ['GET', 'DELETE']
+
+
+def test_check_mode(server):
+    result = delete_pods(server, label_selector='revision=0', _ansible_check_mode=True)
+
+    assert result['changed']
+    assert [item['metadata']['name'] for item in result['pod_list']['items']] == ['web-0', 'web-2'] * 2
+    assert [method for method, path in server.requests] == ['GET']
+    assert len(names(server, NAMESPACE)) == 4
+
+
+def test_nothing_selected(server):
+    result = delete_pods(server, label_selector='revision=2')
+
+    assert not result['changed']
+    assert [method for method, path in server.requests] == ['GET']
@@ -0,0 +1,177 @@
+#
+#  Copyright 2017 Red Hat | Ansible
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Build JSON Patches, and update a config map with apply_strategy: json_patch, against a client whose requests are
+answered by a stub, checking the requests sent.
+
+    python -m pytest tests/unit
+"""
+
+import copy
+import json
+import os
+import sys
+
+import pytest
+
+pytest.importorskip('openshift.helper.ansible')
+
+from kubernetes.client.rest import ApiException
+
+import ansible.module_utils
+ansible.module_utils.__path__.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__)))), 'module_utils'))
+
+from ansible.module_utils import basic
+from ansible.module_utils.k8s_common import KubernetesAnsibleModule, json_patch
+from ansible.module_utils.six import StringIO
+
+PATH = '/api/v1/namespaces/default/configmaps/settings'
+
+CONFIG_MAP = dict(kind='ConfigMap', apiVersion='v1',
+                  metadata=dict(name='settings', namespace='default', resourceVersion='5', uid='settings-uid',
+                                creationTimestamp='2017-10-01T00:00:00Z'),
+                  data=dict(debug='false', level='info'))
+
+
+class Response(object):
+    def __init__(self, status, body):
+        self.status = status
+        self.reason = 'OK' if status < 400 else 'Conflict'
+        self.data = json.dumps(body).encode('utf-8')
+
+    def getheader(self, name, default=None):
+        return default
+
+    def getheaders(self):
+        return {}
+
+
+class APIServer(object):
+    """ Serves one config map, and applies JSON Patches to it """
+
+    def __init__(self):
+        self.stored = copy.deepcopy(CONFIG_MAP)
+        self.requests = []
+
+    def request(self, method, url, query_params=None, headers=None, body=None, post_params=None, **kwargs):
+        self.requests.append((method, url.split('127.0.0.1:1', 1)[-1], (headers or {}).get('Content-Type'), body))
+        if method == 'GET':
+            return Response(200, self.stored)
+        assert method == 'PATCH'
+        obj = copy.deepcopy(self.stored)
+        for operation in body:
+            parts = operation['path'].split('/')[1:]
+            parent = obj
+            for part in parts[:-1]:
+                parent = parent[part]
+            if operation['op'] == 'test':
+                if parent.get(parts[-1]) != operation['value']:
+                    # The rest client raises on error responses
+                    raise ApiException(http_resp=Response(409, dict(kind='Status', apiVersion='v1', status='Failure',
+                                                                    code=409, message='the object has been modified')))
+            elif operation['op'] == 'remove':
+                del parent[parts[-1]]
+            else:
+                parent[parts[-1]] = operation['value']
+        obj['metadata']['resourceVersion'] = str(int(obj['metadata']['resourceVersion']) + 1)
+        self.stored = obj
+        return Response(200, obj)
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = APIServer()
+    monkeypatch.setattr('kubernetes.client.rest.RESTClientObject.request',
+                        lambda self, *args, **kwargs: server.request(*args, **kwargs))
+    return server
+
+
+def update(data):
+    args = dict(host='http://127.0.0.1:1', api_key='token', name='settings', namespace='default', data=data,
+                apply_strategy='json_patch')
+    basic._ANSIBLE_ARGS = json.dumps(dict(ANSIBLE_MODULE_ARGS=args)).encode('utf-8')
+    stdout, sys.stdout = sys.stdout, StringIO()
+    try:
+        KubernetesAnsibleModule('config_map', 'V1').execute_module()
+    except SystemExit:
+        pass
+    finally:
+        output, sys.stdout = sys.stdout.getvalue(), stdout
+        basic._ANSIBLE_ARGS = None
+    return json.loads(output)
+
+
+def test_json_patch():
+    source = dict(metadata=dict(name='web', labels={'app': 'web', 'example.com/tier': 'front'}),
+                  spec=dict(ports=[dict(port=80), dict(port=443)], selector=dict(app='web')))
+    target = dict(metadata=dict(name='web', labels={'app': 'web', 'owner': 'team'}),
+                  spec=dict(ports=[dict(port=8080), dict(port=443)], selector=dict(app='web'), type='NodePort'))
+
+    assert json_patch(source, target) == [
+        dict(op='remove', path='/metadata/labels/example.com~1tier'),
+        dict(op='add', path='/metadata/labels/owner', value='team'),
+        dict(op='replace', path='/spec/ports/0/port', value=8080),
+        dict(op='add', path='/spec/type', value='NodePort'),
+    ]
+    assert json_patch(source, source) == []
+
+
+def test_lists_of_another_length_are_replaced():
+    assert json_patch(dict(args=['a']), dict(args=['a', 'b'])) == [dict(op='replace', path='/args', value=['a', 'b'])]
+
+
+def test_only_changed_paths_are_sent(server):
+    result = update(dict(debug='true', level='info'))
+
+    assert not result.get('failed'), result.get('msg')
+    assert result['changed'] is True
+    assert result['config_map']['data'] == dict(debug='true', level='info')
+    assert server.requests == [
+        ('GET', PATH, 'application/json', None),
+        ('PATCH', PATH, 'application/json-patch+json', [
+            dict(op='test', path='/metadata/resourceVersion', value='5'),
+            dict(op='replace', path='/data/debug', value='true'),
+        ]),
+    ]
+
+
+def test_unchanged_object_is_not_patched(server):
+    result = update(dict(debug='false', level='info'))
+
+    assert result['changed'] is False
+    assert [method for method, path, content_type, body in server.requests] == ['GET']
+
+
+def test_object_changed_since_read(server, monkeypatch):
+    get = server.request
+
+    def request(method, url, **kwargs):
+        response = get(method, url, **kwargs)
+        if method == 'GET':
+            # Another client updates the object once it has been read
+            server.stored['metadata']['resourceVersion'] = '6'
+        return response
+
+    monkeypatch.setattr(server, 'request', request)
+    result = update(dict(debug='true', level='info'))
+
+    assert result['failed']
+    assert 'the object has been modified' in result['msg']
+    assert server.stored['data'] == CONFIG_MAP['data']
@@ -0,0 +1,162 @@
+#
+#  Copyright 2017 Red Hat | Ansible
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Run a list module against a client whose requests are answered a page at a time, as the API server answers
+limit and continue, and check the requests sent.
+
+    python -m pytest tests/unit
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+pytest.importorskip('openshift.helper.ansible')
+
+import ansible.module_utils
+ansible.module_utils.__path__.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__)))), 'module_utils'))
+
+from ansible.module_utils import basic, k8s_common
+from ansible.module_utils.k8s_common import KubernetesAnsibleModule
+from ansible.module_utils.six import StringIO
+
+PODS = [dict(metadata=dict(name='web-{}'.format(index), namespace='default', labels=dict(app='web')),
+             spec=dict(containers=[dict(name='web', image='registry.example.com/web:{}'.format(index))]))
+        for index in range(7)]
+
+
+class Response(object):
+    def __init__(self, body):
+        self.status = 200
+        self.reason = 'OK'
+        self.data = json.dumps(body).encode('utf-8')
+
+    def getheader(self, name, default=None):
+        return default
+
+    def getheaders(self):
+        return {}
+
+
+class APIServer(object):
+    """ Lists PODS, limit items at a time, with the offset of the next page as the continue token """
+
+    def __init__(self):
+        self.queries = []
+
+    def request(self, method, url, query_params=None, headers=None, body=None, post_params=None, **kwargs):
+        query = dict((key, str(value)) for key, value in query_params or [])
+        self.queries.append(query)
+        assert (method, url) == ('GET', 'http://127.0.0.1:1/api/v1/namespaces/default/pods')
+        start = int(query.get('continue') or 0)
+        end = start + int(query['limit']) if query.get('limit') else len(PODS)
+        metadata = dict(resourceVersion='10')
+        if end < len(PODS):
+            metadata['continue'] = str(end)
+        return Response(dict(kind='PodList', apiVersion='v1', metadata=metadata, items=PODS[start:end]))
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = APIServer()
+    monkeypatch.setattr('kubernetes.client.rest.RESTClientObject.request',
+                        lambda self, *args, **kwargs: server.request(*args, **kwargs))
+    return server
+
+
+def run_list(**args):
+    args.update(host='http://127.0.0.1:1', api_key='token', namespace='default')
+    basic._ANSIBLE_ARGS = json.dumps(dict(ANSIBLE_MODULE_ARGS=args)).encode('utf-8')
+    stdout, sys.stdout = sys.stdout, StringIO()
+    try:
+        KubernetesAnsibleModule('pod_list', 'V1').execute_module()
+    except SystemExit:
+        pass
+    finally:
+        output, sys.stdout = sys.stdout.getvalue(), stdout
+        basic._ANSIBLE_ARGS = None
+    result = json.loads(output)
+    assert not result.get('failed'), result.get('msg')
+    return result
+
+
+def list_pods(**args):
+    return run_list(**args)['pod_list']
+
+
+@pytest.fixture
+def projected(monkeypatch):
+    """ The number of items in each list trimmed to return_fields """
+    projected = []
+    project_fields = k8s_common.project_fields
+
+    def counting_project_fields(obj, paths):
+        projected.append(len(obj.get('items') or []))
+        return project_fields(obj, paths)
+
+    monkeypatch.setattr(k8s_common, 'project_fields', counting_project_fields)
+    return projected
+
+
+def test_pages(server):
+    pod_list = list_pods(page_size=3)
+
+    assert [pod['metadata']['name'] for pod in pod_list['items']] == [pod['metadata']['name'] for pod in PODS]
+    assert pod_list['items'][6]['spec']['containers'][0]['image'] == 'registry.example.com/web:6'
+    assert pod_list['metadata']['resource_version'] == '10'
+    assert server.queries == [dict(limit='3'), dict(limit='3', **{'continue': '3'}),
+                              dict(limit='3', **{'continue': '6'})]
+
+
+def test_selectors_are_sent_with_every_page(server):
+    list_pods(page_size=4, label_selector='app=web')
+
+    assert server.queries == [dict(labelSelector='app=web', limit='4'),
+                              dict(labelSelector='app=web', limit='4', **{'continue': '4'})]
+
+
+def test_single_response(server):
+    pod_list = list_pods(page_size=0)
+
+    assert len(pod_list['items']) == len(PODS)
+    assert server.queries == [{}]
+
+
+def test_pages_are_trimmed_as_they_are_read(server, projected):
+    pod_list = list_pods(page_size=3, return_fields=['items[*].metadata.name', 'metadata.resource_version'])
+
+    assert pod_list == dict(items=[dict(metadata=dict(name=pod['metadata']['name'])) for pod in PODS],
+                            metadata=dict(resource_version='10'))
+    # Each page, then the whole list once more on exit, which leaves it unchanged
+    assert projected == [3, 3, 1, 7]
+
+
+def test_item_indexes_are_applied_to_the_whole_list(server, projected):
+    pod_list = list_pods(page_size=3, return_fields=['items[-1].metadata.name'])
+
+    assert pod_list == dict(items=[dict(metadata=dict(name='web-6'))])
+    assert projected == [7]
+
+
+def test_return_request(server):
+    assert 'request' in run_list()
+    assert 'request' not in run_list(return_request=False)
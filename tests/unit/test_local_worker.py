@@ -0,0 +1,101 @@
+#
+#  Copyright 2017 Red Hat | Ansible
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Run a task through the k8s_local action plugin, and check when it falls back to executing the module as usual.
+
+    python -m pytest tests/unit
+"""
+
+import os
+import socket
+import sys
+
+import pytest
+
+pytest.importorskip('openshift.helper.ansible')
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                                'action_plugins'))
+
+import k8s_local
+
+from ansible.module_utils.k8s_worker import KubernetesWorkerException
+
+
+class Task(object):
+    action = 'k8s_v1_config_map'
+    async_val = 0
+
+    def __init__(self, socket_path):
+        self.args = dict(name='web', namespace='default')
+        self.environment = [{k8s_local.WORKER_SOCKET_ENV: socket_path}]
+
+
+class Connection(object):
+    transport = 'local'
+
+
+class PlayContext(object):
+    become = False
+
+
+class NormalAction(object):
+    runs = 0
+
+    def run(self, tmp, task_vars):
+        NormalAction.runs += 1
+        return dict(changed=True, executed='as usual')
+
+
+@pytest.fixture
+def action(tmpdir, monkeypatch):
+    monkeypatch.setenv(k8s_local.LOCAL_WORKER_ENV, 'true')
+    monkeypatch.setitem(k8s_local._module_calls, Task.action, ('KubernetesAnsibleModule', 'config_map', 'v1'))
+    monkeypatch.setattr(k8s_local.ActionBase, 'run', lambda self, tmp=None, task_vars=None: {})
+    monkeypatch.setattr(k8s_local.ActionModule, '_update_module_args', lambda self, name, args, task_vars: None)
+    monkeypatch.setattr(k8s_local.ActionModule, 'normal_action', lambda self: NormalAction())
+    monkeypatch.setattr(k8s_local, 'request_timeout', lambda args: 0.3)
+    NormalAction.runs = 0
+    return k8s_local.ActionModule(Task(str(tmpdir.join('worker.sock'))), Connection(), PlayContext(), None, None, None)
+
+
+def test_unanswered_task_fails(action):
+    # A worker that never accepts the request
+    socket_path = action._task.environment[0][k8s_local.WORKER_SOCKET_ENV]
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    server.listen(1)
+    try:
+        result = action.run(task_vars={})
+    finally:
+        server.close()
+
+    assert result['failed'] is True
+    assert 'may still run the request' in result['msg']
+    assert NormalAction.runs == 0
+
+
+def test_unreachable_worker_falls_back(action, monkeypatch):
+    def ensure_worker(socket_path):
+        raise KubernetesWorkerException('Timed out waiting for the worker to listen on {}'.format(socket_path))
+
+    monkeypatch.setattr(k8s_local.ActionModule, 'ensure_worker', staticmethod(ensure_worker))
+
+    assert action.run(task_vars={}) == dict(changed=True, executed='as usual')
+    assert NormalAction.runs == 1
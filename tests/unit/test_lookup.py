@@ -0,0 +1,111 @@
+#
+#  Copyright 2017 Red Hat | Ansible
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Read objects held by the fake API server of the benchmark harness with the k8s_read lookup, and count the requests
+sent.
+
+    python -m pytest tests/unit
+"""
+
+import os
+import sys
+
+import pytest
+
+pytest.importorskip('openshift.helper.ansible')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(ROOT, 'hacking'))
+sys.path.insert(0, os.path.join(ROOT, 'lookup_plugins'))
+
+from benchmark_modules import NAMESPACE, FakeAPIServer, make_deployment_config, make_pod
+
+import k8s_read
+
+VARIABLES = dict(ansible_play_name='play')
+
+
+@pytest.fixture
+def server(tmpdir, monkeypatch):
+    monkeypatch.setenv('K8S_CACHE_DIR', str(tmpdir.join('cache')))
+    server = FakeAPIServer().start()
+    for index in range(3):
+        server.store('api/v1', NAMESPACE, 'pods', make_pod('web-{}'.format(index), 1))
+    server.store('oapi/v1', NAMESPACE, 'deploymentconfigs', make_deployment_config('web-0', 1))
+    yield server
+    server.stop()
+
+
+def read(server, *terms, **kwargs):
+    kwargs.update(host=server.url, api_key='token', namespace=NAMESPACE)
+    del server.requests[:]
+    lookup = k8s_read.LookupModule()
+    return lookup.run(list(terms), VARIABLES, **kwargs), lookup
+
+
+def names(objects):
+    return [obj['metadata']['name'] for obj in objects]
+
+
+def test_reads_are_memoized(server):
+    objects, _ = read(server, kind='Pod', name='web-0')
+    assert names(objects) == ['web-0']
+    assert len(server.requests) == 1
+
+    assert read(server, kind='Pod', name='web-0')[0] == objects
+    assert server.requests == []
+
+
+def test_cache_ttl(server):
+    read(server, kind='Pod', name='web-0', cache_ttl=0)
+    read(server, kind='Pod', name='web-0', cache_ttl=0)
+
+    assert len(server.requests) == 1
+
+
+def test_names_are_read_with_one_list(server):
+    objects, _ = read(server, dict(name='web-0'), dict(name='web-2'), dict(name='missing'), kind='Pod')
+
+    assert names(objects) == ['web-0', 'web-2']
+    assert [path.split('?')[0] for method, path in server.requests] == [
+        '/api/v1/namespaces/{}/pods'.format(NAMESPACE)
+    ]
+
+
+def test_selectors(server):
+    server.store('api/v1', NAMESPACE, 'pods', make_pod('web-3', 1, revision=1))
+
+    objects, _ = read(server, kind='Pod', label_selector='revision=1')
+
+    assert names(objects) == ['web-3']
+
+
+@pytest.mark.parametrize('kinds', [('Pod', 'DeploymentConfig'), ('DeploymentConfig', 'Pod')])
+def test_kinds_share_a_client(server, kinds):
+    first, lookup = read(server, kind=kinds[0], name='web-0')
+    # Read the second kind with the helpers and client of the first read
+    second = lookup.read([('v1', kinds[1], 'web-0', NAMESPACE, None, None)]).values()
+
+    objects = dict((obj['kind'], obj) for obj in first + list(second))
+    assert objects['DeploymentConfig']['spec']['replicas'] == 1
+    assert objects['Pod']['spec']['containers']
+    pod_client = lookup.helpers[('V1', 'pod')].api_client
+    deployment_config_client = lookup.helpers[('V1', 'deployment_config')].api_client
+    assert pod_client.rest_client is deployment_config_client.rest_client
+    assert len(server.requests) == 2
@@ -0,0 +1,118 @@
+#
+#  Copyright 2017 Red Hat | Ansible
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Run modules in check mode against a snapshot, with an API server that cannot be reached.
+
+    python -m pytest tests/unit
+"""
+
+import copy
+import json
+import os
+import sys
+
+import pytest
+import yaml
+
+pytest.importorskip('openshift.helper.ansible')
+
+import ansible.module_utils
+ansible.module_utils.__path__.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__)))), 'module_utils'))
+
+from ansible.module_utils import basic
+from ansible.module_utils.k8s_common import KubernetesAnsibleModule
+from ansible.module_utils.openshift_common import OpenShiftAnsibleModule
+from ansible.module_utils.six import StringIO
+
+POD = dict(apiVersion='v1', kind='Pod', metadata=dict(name='web', namespace='default', labels=dict(revision='0')),
+           spec=dict(containers=[dict(name='web', image='registry.example.com/web:1')]))
+
+DEPLOYMENT_CONFIG = dict(apiVersion='v1', kind='DeploymentConfig',
+                         metadata=dict(name='web', namespace='default', labels=dict(revision='0')),
+                         spec=dict(replicas=1, selector=dict(app='web'), template=dict(
+                             metadata=dict(labels=dict(app='web')),
+                             spec=dict(containers=[dict(name='web', image='registry.example.com/web:1')]))))
+
+
+def stored(definition):
+    obj = copy.deepcopy(definition)
+    obj['metadata'].update(resourceVersion='5', uid='0f6d3b7e', creationTimestamp='2017-10-01T00:00:00Z')
+    obj['status'] = {}
+    return obj
+
+
+@pytest.fixture
+def snapshot(tmpdir):
+    path = tmpdir.join('snapshot.yml')
+    path.write(yaml.safe_dump_all([dict(kind='PodList', items=[stored(POD)]), stored(DEPLOYMENT_CONFIG)]))
+    return str(path)
+
+
+def run_module(module_class, kind, args):
+    basic._ANSIBLE_ARGS = json.dumps(dict(ANSIBLE_MODULE_ARGS=args)).encode('utf-8')
+    stdout, sys.stdout = sys.stdout, StringIO()
+    try:
+        module_class(kind, 'V1').execute_module()
+    except SystemExit:
+        pass
+    finally:
+        output, sys.stdout = sys.stdout.getvalue(), stdout
+        basic._ANSIBLE_ARGS = None
+    return json.loads(output)
+
+
+def check(module_class, kind, snapshot, definition):
+    return run_module(module_class, kind, dict(host='http://127.0.0.1:1', api_key='token', offline_check=snapshot,
+                                               resource_definition=definition, _ansible_check_mode=True))
+
+
+@pytest.mark.parametrize('module_class, kind, definition', [
+    (KubernetesAnsibleModule, 'pod', POD),
+    (OpenShiftAnsibleModule, 'deployment_config', DEPLOYMENT_CONFIG),
+])
+def test_unchanged(snapshot, module_class, kind, definition):
+    result = check(module_class, kind, snapshot, definition)
+    assert not result.get('failed'), result.get('msg')
+    assert result['changed'] is False
+
+
+@pytest.mark.parametrize('module_class, kind, definition', [
+    (KubernetesAnsibleModule, 'pod', POD),
+    (OpenShiftAnsibleModule, 'deployment_config', DEPLOYMENT_CONFIG),
+])
+def test_changed(snapshot, module_class, kind, definition):
+    definition = copy.deepcopy(definition)
+    definition['metadata']['labels']['revision'] = '1'
+
+    result = check(module_class, kind, snapshot, definition)
+
+    assert not result.get('failed'), result.get('msg')
+    assert result['changed'] is True
+    assert result[kind]['metadata']['labels']['revision'] == '1'
+
+
+def test_missing_object_is_created(snapshot):
+    definition = copy.deepcopy(POD)
+    definition['metadata']['name'] = 'worker'
+
+    result = check(KubernetesAnsibleModule, 'pod', snapshot, definition)
+
+    assert not result.get('failed'), result.get('msg')
+    assert result['changed'] is True
@@ -0,0 +1,104 @@
+#
+#  Copyright 2017 Red Hat | Ansible
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Count the requests sent through a profiled client, including the ones that fail.
+
+    python -m pytest tests/unit
+"""
+
+import os
+
+import pytest
+
+import ansible.module_utils
+ansible.module_utils.__path__.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__)))), 'module_utils'))
+
+from ansible.module_utils.k8s_profile import Profiler
+
+
+class Response(object):
+    def __init__(self, data):
+        self.data = data
+
+    def getheader(self, name, default=None):
+        return default
+
+
+class ApiError(Exception):
+    """ Stands in for the client's ApiException, which holds the response body """
+
+    def __init__(self, status, body):
+        super(ApiError, self).__init__(status)
+        self.status = status
+        self.body = body
+
+
+class RESTClient(object):
+    def __init__(self, responses):
+        self.responses = list(responses)
+
+    def request(self, method, url, query_params=None, headers=None, body=None, post_params=None, **kwargs):
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+class ApiClient(object):
+    def __init__(self, *responses):
+        self.rest_client = RESTClient(responses)
+
+
+def test_failed_requests_are_counted():
+    api_client = ApiClient(ApiError(404, b'{"kind": "Status"}'), Response(b'{"kind": "Pod"}'))
+    profiler = Profiler(enabled=True)
+    profiler.attach(api_client)
+
+    with pytest.raises(ApiError):
+        api_client.rest_client.request('GET', '/api/v1/namespaces/default/pods/missing')
+    api_client.rest_client.request('POST', '/api/v1/namespaces/default/pods', body={'kind': 'Pod'})
+
+    http = profiler.report()['http']
+    assert http['requests'] == 2
+    assert http['bytes_received'] == len(b'{"kind": "Status"}') + len(b'{"kind": "Pod"}')
+
+
+def test_responses_without_a_body():
+    api_client = ApiClient(ApiError(0, None), Response(None))
+    profiler = Profiler(enabled=True)
+    profiler.attach(api_client)
+
+    with pytest.raises(ApiError):
+        api_client.rest_client.request('GET', '/api/v1/pods')
+    api_client.rest_client.request('DELETE', '/api/v1/namespaces/default/pods/web')
+
+    assert profiler.report()['http'] == dict(requests=2, bytes_sent=len('/api/v1/pods') + len(
+        '/api/v1/namespaces/default/pods/web'), bytes_received=0)
+
+
+def test_disabled_profiler_counts_nothing():
+    api_client = ApiClient(Response(b'{}'))
+    profiler = Profiler(enabled=True)
+    profiler.attach(api_client)
+    Profiler(enabled=False).attach(api_client)
+
+    api_client.rest_client.request('GET', '/api/v1/pods')
+
+    assert profiler.report()['http']['requests'] == 0
@@ -0,0 +1,108 @@
+#
+#  Copyright 2017 Red Hat | Ansible
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Keep lists of the pods held by the fake API server of the benchmark harness in a store, and count the requests sent.
+
+    python -m pytest tests/unit
+"""
+
+import os
+import sys
+
+import pytest
+
+pytest.importorskip('openshift.helper.ansible')
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                                'hacking'))
+
+import benchmark_modules
+from benchmark_modules import NAMESPACE, FakeAPIServer, make_pod, run_module
+
+basic, classes = benchmark_modules.load_module_classes()
+
+
+@pytest.fixture
+def server():
+    server = FakeAPIServer().start()
+    for index in range(3):
+        server.store('api/v1', NAMESPACE, 'pods', make_pod('web-{}'.format(index), 1))
+    yield server
+    server.stop()
+
+
+def list_pods(server, store, **args):
+    args.update(host=server.url, api_key='token', namespace=NAMESPACE, store=str(store))
+    del server.requests[:]
+    return run_module(basic, classes['KubernetesAnsibleModule'], 'pod_list', 'V1', args)
+
+
+def methods(server):
+    """ The requests sent, as list or watch """
+    return ['watch' if 'watch=true' in path.lower() else method for method, path in server.requests]
+
+
+def pods(result):
+    return [(pod['metadata']['name'], pod['metadata']['labels']['revision']) for pod in result['pod_list']['items']]
+
+
+def test_changes_are_applied_to_the_stored_list(server, tmpdir):
+    store = tmpdir.join('pods.store')
+    result = list_pods(server, store)
+
+    assert pods(result) == [('web-0', '0'), ('web-1', '0'), ('web-2', '0')]
+    assert methods(server) == ['GET']
+    assert store.check()
+
+    server.store('api/v1', NAMESPACE, 'pods', make_pod('web-0', 1, revision=1))
+    server.remove('api/v1', NAMESPACE, 'pods', 'web-1')
+    server.store('api/v1', NAMESPACE, 'pods', make_pod('web-3', 1))
+    result = list_pods(server, store)
+
+    assert pods(result) == [('web-0', '1'), ('web-2', '0'), ('web-3', '0')]
+    assert result['resource_version'] == str(server.resource_version)
+    assert not result.get('relisted')
+    assert methods(server) == ['watch']
+
+    # The list stored is the one returned
+    assert pods(list_pods(server, store)) == pods(result)
+    assert methods(server) == ['watch']
+
+
+def test_expired_resource_version_lists_again(server, tmpdir):
+    store = tmpdir.join('pods.store')
+    list_pods(server, store)
+    server.remove('api/v1', NAMESPACE, 'pods', 'web-2')
+    server.oldest_resource_version = server.resource_version
+
+    result = list_pods(server, store)
+
+    assert result['relisted']
+    assert pods(result) == [('web-0', '0'), ('web-1', '0')]
+    assert methods(server) == ['watch', 'GET']
+
+
+def test_another_query_lists_again(server, tmpdir):
+    store = tmpdir.join('pods.store')
+    list_pods(server, store)
+
+    result = list_pods(server, store, label_selector='revision=1')
+
+    assert pods(result) == []
+    assert methods(server) == ['GET']
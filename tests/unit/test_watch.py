@@ -0,0 +1,104 @@
+#
+#  Copyright 2017 Red Hat | Ansible
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Watch pods held by the fake API server of the benchmark harness, and count the requests sent.
+
+    python -m pytest tests/unit
+"""
+
+import os
+import sys
+import threading
+
+import pytest
+
+pytest.importorskip('openshift.helper.ansible')
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                                'hacking'))
+
+import benchmark_modules
+from benchmark_modules import NAMESPACE, FakeAPIServer, make_pod, run_module
+
+basic, classes = benchmark_modules.load_module_classes()
+
+
+@pytest.fixture
+def server():
+    server = FakeAPIServer().start()
+    for index in range(3):
+        server.store('api/v1', NAMESPACE, 'pods', make_pod('web-{}'.format(index), 1))
+    yield server
+    server.stop()
+
+
+def watch_pods(server, **args):
+    args.update(host=server.url, api_key='token', namespace=NAMESPACE, watch=True)
+    del server.requests[:]
+    return run_module(basic, classes['KubernetesAnsibleModule'], 'pod_list', 'V1', args)
+
+
+def methods(server):
+    """ The requests sent, as list or watch """
+    return ['watch' if 'watch=true' in path.lower() else method for method, path in server.requests]
+
+
+def events(result):
+    return [(event['type'], event['object']['metadata']['name']) for event in result['events']]
+
+
+def test_list_then_watch(server):
+    later = threading.Timer(0.5, lambda: [server.store('api/v1', NAMESPACE, 'pods', make_pod(name, 1))
+                                          for name in ('web-3', 'web-4')])
+    later.start()
+    try:
+        result = watch_pods(server, watch_timeout=10, max_events=2)
+    finally:
+        later.join()
+
+    assert [pod['metadata']['name'] for pod in result['pod_list']['items']] == ['web-0', 'web-1', 'web-2']
+    assert events(result) == [('ADDED', 'web-3'), ('ADDED', 'web-4')]
+    assert result['resource_version'] == server.get('api/v1', NAMESPACE, 'pods', 'web-4')['metadata'][
+        'resourceVersion']
+    assert methods(server) == ['GET', 'watch']
+
+
+def test_resume(server):
+    resource_version = server.resource_version
+    server.store('api/v1', NAMESPACE, 'pods', make_pod('web-0', 1, revision=1))
+    server.remove('api/v1', NAMESPACE, 'pods', 'web-1')
+
+    result = watch_pods(server, since_resource_version=str(resource_version), watch_timeout=10, max_events=2)
+
+    assert events(result) == [('MODIFIED', 'web-0'), ('DELETED', 'web-1')]
+    assert result['resource_version'] == str(server.resource_version)
+    assert result['pod_list'] == {}
+    assert methods(server) == ['watch']
+
+
+def test_expired_resource_version_lists_again(server):
+    server.oldest_resource_version = server.resource_version
+
+    result = watch_pods(server, since_resource_version='1', watch_timeout=1)
+
+    assert result['relisted']
+    assert len(result['pod_list']['items']) == 3
+    assert result['events'] == []
+    assert result['resource_version'] == str(server.resource_version)
+    assert methods(server) == ['watch', 'GET', 'watch']
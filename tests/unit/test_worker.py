@@ -0,0 +1,149 @@
+#
+#  Copyright 2017 Red Hat | Ansible
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Send module requests to a worker running in a thread, and check that each one runs at most once, including the
+requests whose client gives up waiting for the reply.
+
+    python -m pytest tests/unit
+"""
+
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+import pytest
+
+import ansible.module_utils
+ansible.module_utils.__path__.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__)))), 'module_utils'))
+
+from ansible.module_utils import basic
+from ansible.module_utils.k8s_worker import KubernetesWorker, KubernetesWorkerRequestFailed, worker_request
+
+
+class FakeModule(object):
+    """ Records the requests it runs, taking as long as their sleep argument """
+
+    runs = []
+
+    def __init__(self, kind, api_version):
+        self.args = json.loads(basic._ANSIBLE_ARGS.decode('utf-8'))['ANSIBLE_MODULE_ARGS']
+
+    def execute_module(self):
+        FakeModule.runs.append(self.args['name'])
+        time.sleep(self.args.get('sleep', 0))
+        sys.stdout.write(json.dumps(dict(changed=True, name=self.args['name'])))
+        sys.exit(0)
+
+
+def request(name, sleep=0):
+    return dict(module_class='FakeModule', kind='config_map', api_version='v1', args=dict(name=name, sleep=sleep),
+                environ={})
+
+
+class WorkerThread(threading.Thread):
+    """ A worker serving socket_path, which exits after a second without a request """
+
+    def __init__(self, socket_path):
+        super(WorkerThread, self).__init__(target=KubernetesWorker(socket_path, [FakeModule], idle_timeout=1).serve)
+        self.socket_path = socket_path
+
+
+@pytest.fixture
+def worker(tmpdir):
+    FakeModule.runs = []
+    thread = WorkerThread(str(tmpdir.join('worker.sock')))
+    thread.start()
+    deadline = time.time() + 5
+    while worker_request(thread.socket_path, dict(command='ping')) is None and time.time() < deadline:
+        time.sleep(0.05)
+    yield thread
+    thread.join(10)
+
+
+def test_reply(worker):
+    reply = worker_request(worker.socket_path, request('web'), timeout=5)
+    assert reply['rc'] == 0
+    assert json.loads(reply['stdout']) == dict(changed=True, name='web')
+    assert FakeModule.runs == ['web']
+
+
+def test_timed_out_requests_are_not_run(worker):
+    replies = {}
+    failures = {}
+
+    def send(name, sleep, timeout):
+        try:
+            replies[name] = worker_request(worker.socket_path, request(name, sleep), timeout=timeout)
+        except KubernetesWorkerRequestFailed as exc:
+            failures[name] = exc
+
+    busy = threading.Thread(target=send, args=('busy', 1.5, 10))
+    busy.start()
+    while not FakeModule.runs:
+        time.sleep(0.01)
+    # Three clients queue behind the busy request, and give up before the worker gets to them
+    clients = [threading.Thread(target=send, args=('queued-{}'.format(i), 0, 0.3)) for i in range(3)]
+    for client in clients:
+        client.start()
+    for client in clients + [busy]:
+        client.join(10)
+
+    assert sorted(failures) == ['queued-0', 'queued-1', 'queued-2']
+    assert json.loads(replies['busy']['stdout'])['name'] == 'busy'
+    # The timed out clients removed the socket, so later requests start another worker
+    assert not os.path.exists(worker.socket_path)
+    # Once the worker has served its queue and exited, only the request that was waited on has run
+    worker.join(10)
+    assert not worker.is_alive()
+    assert FakeModule.runs == ['busy']
+
+
+def test_no_worker(tmpdir):
+    assert worker_request(str(tmpdir.join('missing.sock')), request('web'), timeout=1) is None
+
+
+def test_module_fails_rather_than_running_again(tmpdir, monkeypatch, capsys):
+    pytest.importorskip('openshift.helper.ansible')
+    from ansible.module_utils import k8s_common
+
+    # A worker that never accepts the request
+    socket_path = str(tmpdir.join('hung.sock'))
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    server.listen(1)
+    monkeypatch.setattr(k8s_common, 'request_timeout', lambda args: 0.3)
+    monkeypatch.setattr(basic, '_ANSIBLE_ARGS', json.dumps(dict(ANSIBLE_MODULE_ARGS=dict(name='web'))).encode())
+    module = k8s_common.KubernetesAnsibleModule.__new__(k8s_common.KubernetesAnsibleModule)
+    module.kind = 'config_map'
+    module.api_version = 'v1'
+
+    try:
+        with pytest.raises(SystemExit) as exc:
+            module.execute_in_worker(socket_path)
+    finally:
+        server.close()
+
+    assert exc.value.code == 1
+    result = json.loads(capsys.readouterr().out)
+    assert result['failed'] is True
+    assert 'may still run the request' in result['msg']